@@ -0,0 +1,140 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+import constants
+import lexer
+import ll1_generator
+import ll1_parser
+import ll1_tables
+import scanner_table
+import syntax
+import token_buffer
+import token_kinds
+from line_table import LineTable
+from token_buffer import TokenBuffer, pack_header, unpack_sections
+
+MAGIC = b"RKC2"
+EXTENSION = ".rookc"
+DEFAULT_DIRECTORY = ".rookcache"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# sections stored after the token buffer ones
+CODE_SECTION = -2
+PARSE_ERROR_SECTION = -1
+
+
+# hash of everything that changes the tokens or the parse result of a source
+def version_stamp():
+    digest = hashlib.sha256(f"{sys.byteorder}:{array('I').itemsize}".encode())
+    for module in [
+        constants,
+        scanner_table,
+        lexer,
+        token_buffer,
+        token_kinds,
+        syntax,
+        ll1_generator,
+        ll1_parser,
+        ll1_tables,
+    ]:
+        with open(module.__file__, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+class Artifact:
+    def __init__(self, tokens: TokenBuffer, parse_error: str | None):
+        self.tokens = tokens
+        # the rendered ParseError, None if parsing was successful
+        self.parse_error = parse_error
+
+
+class ArtifactCache:
+    # the entries of each cache class have their own extension, a class only evicts its own
+    extension = EXTENSION
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_DIRECTORY,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        parser: str = "recursive",
+        max_errors: int = syntax.DEFAULT_MAX_ERRORS,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # the parsers report different errors and the parse error stops at max_errors, so each
+        # combination has its own entries
+        self._version = f"{version_stamp()}:{parser}:{max_errors}"
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, source: bytes):
+        key = hashlib.sha256(self._version.encode() + source).hexdigest()
+        return os.path.join(self.directory, key + self.extension)
+
+    # returns the cached artifact of the source, or None on a miss
+    def load(self, source: bytes):
+        path = self.path_for(source)
+        try:
+            with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                artifact = self.decode(data)
+            # the modification time orders the entries for eviction
+            os.utime(path)
+        except (OSError, ValueError, struct.error, UnicodeDecodeError):
+            # missing, evicted by another process, or unreadable entries are misses
+            return None
+        return artifact
+
+    def store(self, source: bytes, tokens: TokenBuffer, parse_error: str | None):
+        path = self.path_for(source)
+        sections = tokens.to_sections()
+        sections.append(tokens.lines.get_code().encode())
+        sections.append((parse_error or "").encode())
+        self.write_entry(path, [pack_header(MAGIC, sections), *sections])
+        self.evict()
+
+    # writers never touch the final file, readers see either nothing or a complete entry
+    def write_entry(self, path: str, chunks: list):
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                for chunk in chunks:
+                    file.write(chunk)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
+    def decode(self, data):
+        sections = unpack_sections(MAGIC, data)
+        lines = LineTable(sections[CODE_SECTION].decode())
+        tokens = TokenBuffer.from_sections(sections[:CODE_SECTION], lines)
+        parse_error = sections[PARSE_ERROR_SECTION].decode() or None
+        return Artifact(tokens, parse_error)
+
+    # removes the least recently used entries until the cache fits in max_bytes
+    def evict(self):
+        entries = []
+        total_size = 0
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(self.extension):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total_size += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
@@ -0,0 +1,234 @@
+from array import array
+from bisect import bisect_left
+from enum import IntEnum
+from typing import Optional
+
+from token_buffer import TokenBuffer
+from token_kinds import TokenKind
+
+# no node, or no token in the token and data columns
+NO_NODE = -1
+NO_TOKEN = -1
+
+
+# the token, data and children each kind of node has
+class NodeKind(IntEnum):
+    # children: statements
+    PROGRAM = 0
+    BLOCK = 1
+    # token: first name, children: a NAMES node when more names follow it, then values, or one INPUT
+    DECLARATION = 2
+    # token: name, data: operator, children: value
+    ASSIGN = 3
+    # token: 'input', children: the prompt STRING if given
+    INPUT = 4
+    # token: 'print', data: separator string, children: values
+    PRINT = 5
+    # token: name, children: arguments
+    CALL = 6
+    # token: 'if', children: condition, BLOCK, then ELIF and ELSE nodes
+    IF = 7
+    # token: 'elif', children: condition, BLOCK
+    ELIF = 8
+    # token: 'else', children: BLOCK
+    ELSE = 9
+    # token: name, children: INSTANCE nodes, then a DEFAULT node
+    WHICH = 10
+    # token: label, data: relational operator, children: BLOCK
+    INSTANCE = 11
+    # token: 'default', children: BLOCK
+    DEFAULT = 12
+    # token: 'while', children: condition, BLOCK
+    WHILE = 13
+    # token: first name, data: second name, children: iterable, BLOCK
+    FOR = 14
+    # token: name, children: PARAMETER nodes, BLOCK
+    FUNCTION = 15
+    # token: name, children: the default value if given
+    PARAMETER = 16
+    # token: the name or literal
+    NAME = 17
+    NUMBER = 18
+    FLOAT = 19
+    STRING = 20
+    BOOLEAN = 21
+    # token: '[', children: elements
+    ARRAY = 22
+    # token: 'to', data: step, children: start elements, end NUMBER
+    RANGE = 23
+    # token: operator, 'not' for 'not in', children: left, right
+    BINARY = 24
+    # token: 'not', children: operand
+    NOT = 25
+    # token: module name, children: a NAME per imported name, none for 'import'
+    IMPORT = 26
+    # token: the first name of a declaration, children: a NAME per name after it
+    NAMES = 27
+    # token: '+' or '-', children: operand
+    UNARY = 28
+
+
+NODE_NAMES = tuple(kind.name.lower() for kind in NodeKind)
+# the node of each token kind that is a value on its own
+LEAF_KINDS = {
+    TokenKind.IDENTIFIER: NodeKind.NAME,
+    TokenKind.NUMBER: NodeKind.NUMBER,
+    TokenKind.FLOAT: NodeKind.FLOAT,
+    TokenKind.STRING: NodeKind.STRING,
+    TokenKind.BOOLEAN_LITERAL: NodeKind.BOOLEAN,
+}
+
+
+# the name tokens and the value nodes of a DECLARATION node
+def declaration_parts(arena, node: int):
+    names = [arena.token(node)]
+    values = arena.children(node)
+    if values and arena.kind(values[0]) == NodeKind.NAMES:
+        names += [arena.token(name) for name in arena.children(values[0])]
+        values = values[1:]
+    return names, values
+
+
+# the nodes of a syntax tree as columns of arrays, a node is its index in every column; a node is
+# added after its children, so the root is the last node, and source spans are token indices
+class AstArena:
+    def __init__(self, tokens: Optional[TokenBuffer] = None):
+        self.tokens = tokens
+        self.root = NO_NODE
+
+        self._kinds = array("B")
+        self._tokens = array("i")
+        # the node covers the tokens from start up to (without) end
+        self._starts = array("i")
+        self._ends = array("i")
+        # the children of a node are children[first_children[node]:first_children[node + 1]], the
+        # children of the last node run to the end
+        self._first_children = array("I")
+        self._children = array("i")
+        # few nodes have a second token (see NodeKind), it is data_tokens[i] for the node data_nodes[i]
+        self._data_nodes = array("i")
+        self._data_tokens = array("i")
+
+    def __len__(self):
+        return len(self._kinds)
+
+    def add(self, kind: NodeKind, token: int, start: int, end: int, children=(), data: int = NO_TOKEN):
+        node = len(self._kinds)
+        self._kinds.append(kind)
+        self._tokens.append(token)
+        self._starts.append(start)
+        self._ends.append(end)
+        self._first_children.append(len(self._children))
+        self._children.extend(children)
+        if data != NO_TOKEN:
+            self._data_nodes.append(node)
+            self._data_tokens.append(data)
+        return node
+
+    def kind(self, node: int):
+        return NodeKind(self._kinds[node])
+
+    def token(self, node: int):
+        return self._tokens[node]
+
+    def data(self, node: int):
+        index = bisect_left(self._data_nodes, node)
+        if index < len(self._data_nodes) and self._data_nodes[index] == node:
+            return self._data_tokens[index]
+        return NO_TOKEN
+
+    def span(self, node: int):
+        return self._starts[node], self._ends[node]
+
+    # the range of the children of the node in the children column
+    def child_range(self, node: int):
+        end = self._first_children[node + 1] if node + 1 < len(self._kinds) else len(self._children)
+        return self._first_children[node], end
+
+    def children(self, node: int):
+        first, end = self.child_range(node)
+        return self._children[first:end]
+
+    def child(self, node: int, index: int):
+        return self._children[self._first_children[node] + index]
+
+    def child_count(self, node: int):
+        first, end = self.child_range(node)
+        return end - first
+
+    # the lexeme of a token column of the node, read from the token buffer
+    def lexeme(self, node: int, data: bool = False):
+        token = self.data(node) if data else self._tokens[node]
+        if token == NO_TOKEN or self.tokens is None:
+            return ""
+        return self.tokens.fields_at(token)[1]
+
+    def line_no(self, node: int):
+        start = self._tokens[node] if self._tokens[node] != NO_TOKEN else self._starts[node]
+        if self.tokens is None or start >= len(self.tokens):
+            return 0
+        return self.tokens[start].line_no
+
+    # yields (node, True) before the children of a node and (node, False) after them, with a stack
+    # instead of recursion, so any depth can be walked
+    def walk(self, root: int = NO_NODE):
+        root = self.root if root == NO_NODE else root
+        stack = [(root, True)]
+        while stack:
+            node, entering = stack.pop()
+            yield node, entering
+            if entering:
+                stack.append((node, False))
+                first, end = self.child_range(node)
+                for index in range(end - 1, first - 1, -1):
+                    stack.append((self._children[index], True))
+
+    # bytes used by the columns
+    def nbytes(self):
+        columns = [self._kinds, self._tokens, self._starts, self._ends, self._first_children, self._children]
+        columns += [self._data_nodes, self._data_tokens]
+        return sum(column.itemsize * len(column) for column in columns)
+
+    # one line per node, indented by depth, for debugging and --ast
+    def dump(self, root: int = NO_NODE):
+        lines = []
+        depth = 0
+        for node, entering in self.walk(root):
+            if not entering:
+                depth -= 1
+                continue
+            text = NODE_NAMES[self._kinds[node]]
+            if self._tokens[node] != NO_TOKEN and self.tokens is not None:
+                text += f" {self.lexeme(node)}"
+            if self.data(node) != NO_TOKEN and self.tokens is not None:
+                text += f" ({self.lexeme(node, True)})"
+            lines.append("  " * depth + text)
+            depth += 1
+        return "\n".join(lines)
+
+
+# calls enter_<kind>(node) before the children of every node and leave_<kind>(node) after them,
+# for the kinds that have such a method; when enter returns False the children and leave are skipped
+class Visitor:
+    def visit(self, arena: AstArena, root: int = NO_NODE):
+        root = arena.root if root == NO_NODE else root
+        kinds, first_children, children = arena._kinds, arena._first_children, arena._children
+        last_node = len(kinds) - 1
+        enter = [getattr(self, "enter_" + name, None) for name in NODE_NAMES]
+        leave = [getattr(self, "leave_" + name, None) for name in NODE_NAMES]
+
+        stack = [(root, True)]
+        while stack:
+            node, entering = stack.pop()
+            kind = kinds[node]
+            if not entering:
+                if leave[kind] is not None:
+                    leave[kind](node)
+                continue
+
+            if enter[kind] is not None and enter[kind](node) is False:
+                continue
+            stack.append((node, False))
+            end = first_children[node + 1] if node < last_node else len(children)
+            for index in range(end - 1, first_children[node] - 1, -1):
+                stack.append((children[index], True))
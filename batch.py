@@ -0,0 +1,154 @@
+import argparse
+import glob
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from lexer import Lexer, LexerError
+from regex_lexer import RegexLexer
+from syntax import DEFAULT_MAX_ERRORS, Parser
+
+ENGINES = {"table": Lexer, "regex": RegexLexer}
+
+
+class FileError:
+    def __init__(self, kind: str, message: str, line_no: int = 0, column_no: int = 0):
+        # "lexer", "parser", "read", or "internal" for an unexpected exception of the lexer or parser
+        self.kind = kind
+        self.message = message
+        self.line_no = line_no
+        self.column_no = column_no
+
+    def to_dict(self):
+        return {"kind": self.kind, "line_no": self.line_no, "column_no": self.column_no, "message": self.message}
+
+
+class FileResult:
+    def __init__(self, path: str, errors: list[FileError] | None = None):
+        self.path = path
+        # empty if the file is valid
+        self.errors = errors or []
+
+    def is_ok(self):
+        return not self.errors
+
+    def to_dict(self):
+        return {"path": self.path, "ok": self.is_ok(), "errors": [error.to_dict() for error in self.errors]}
+
+    def __str__(self):
+        if self.is_ok():
+            return f"{self.path}: ok"
+        return "\n".join(
+            f"{self.path}:{error.line_no}:{error.column_no}: {error.kind} error: {error.message}"
+            for error in self.errors
+        )
+
+
+# expands directories (recursively) and glob patterns into a sorted list of .rook files
+def collect_files(patterns: list[str]):
+    files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.update(glob.glob(os.path.join(glob.escape(pattern), "**", "*.rook"), recursive=True))
+        elif os.path.isfile(pattern):
+            files.add(pattern)
+        else:
+            files.update(path for path in glob.glob(pattern, recursive=True) if path.endswith(".rook"))
+    return sorted(files)
+
+
+# lexes and parses one file, errors are returned instead of raised, so one bad file does not stop
+# the other files of the batch
+def check_file(path: str, engine: str = "table", max_errors: int = DEFAULT_MAX_ERRORS):
+    try:
+        with open(path, "rb") as file:
+            code = io.TextIOWrapper(io.BytesIO(file.read())).read()
+    except (OSError, UnicodeDecodeError) as error:
+        return FileResult(path, [FileError("read", str(error))])
+
+    try:
+        lexer = ENGINES[engine](path, code)
+        lexer.start_parse()
+        diagnostics = Parser(lexer.get_tokens(), max_errors=max_errors).parse()
+    except LexerError as error:
+        return FileResult(path, [FileError("lexer", error.message, error.line_no, error.column_no)])
+    except RecursionError:
+        return FileResult(path, [FileError("parser", "Script is nested too deeply")])
+    except Exception as error:
+        return FileResult(path, [FileError("internal", f"{type(error).__name__}: {error}")])
+    return FileResult(
+        path, [FileError("parser", error.message, error.line_no, error.column_no) for error in diagnostics]
+    )
+
+
+def check_chunk(paths: list[str], engine: str, max_errors: int = DEFAULT_MAX_ERRORS):
+    return [check_file(path, engine, max_errors) for path in paths]
+
+
+# checks the files across a process pool, results are in the same order as files
+def check_files(
+    files: list[str],
+    engine: str = "table",
+    workers: int | None = None,
+    chunk_size: int = 0,
+    max_errors: int = DEFAULT_MAX_ERRORS,
+):
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(files) <= 1:
+        return check_chunk(files, engine, max_errors)
+
+    # a few chunks per worker keeps the pool busy when some files take longer than others
+    chunk_size = chunk_size or max(1, min(256, len(files) // (workers * 4)))
+    chunks = [files[start : start + chunk_size] for start in range(0, len(files), chunk_size)]
+    results = []
+    with ProcessPoolExecutor(workers) as executor:
+        for chunk_results in executor.map(check_chunk, chunks, [engine] * len(chunks), [max_errors] * len(chunks)):
+            results.extend(chunk_results)
+    return results
+
+
+def print_report(results: list[FileResult], elapsed: float, as_json: bool = False, verbose: bool = False):
+    failed = [result for result in results if not result.is_ok()]
+    if as_json:
+        report = {
+            "files": len(results),
+            "ok": len(results) - len(failed),
+            "failed": len(failed),
+            "seconds": round(elapsed, 3),
+            "results": [result.to_dict() for result in (results if verbose else failed)],
+        }
+        print(json.dumps(report, indent=2))
+        return
+
+    for result in results if verbose else failed:
+        print(result)
+    print(f"{len(results)} files, {len(results) - len(failed)} ok, {len(failed)} failed in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Checks the syntax of many Rookie scripts in parallel.")
+    arg_parser.add_argument("paths", nargs="+", help="directories, .rook files or glob patterns")
+    arg_parser.add_argument("--workers", type=int, default=0, help="number of worker processes (default: all cores)")
+    arg_parser.add_argument(
+        "--chunk-size", type=int, default=0, help="files sent to a worker at once (default: picked from the file count)"
+    )
+    arg_parser.add_argument("--engine", choices=ENGINES, default="table", help="lexing engine")
+    arg_parser.add_argument(
+        "--max-errors", type=int, default=DEFAULT_MAX_ERRORS, metavar="N", help="syntax errors reported per file"
+    )
+    arg_parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    arg_parser.add_argument("--verbose", action="store_true", help="also list the files without errors")
+    args = arg_parser.parse_args()
+
+    files = collect_files(args.paths)
+    if not files:
+        print("No .rook files found", file=sys.stderr)
+        sys.exit(2)
+
+    start = time.perf_counter()
+    results = check_files(files, args.engine, args.workers, args.chunk_size, args.max_errors)
+    print_report(results, time.perf_counter() - start, args.json, args.verbose)
+    sys.exit(0 if all(result.is_ok() for result in results) else 1)
@@ -0,0 +1,58 @@
+# Compares lexing and parsing a large script from scratch with loading its
+# tokens and parse result from the .rookc cache.
+# Run from the project root: python -m benchmarks.artifact_cache
+import os
+import tempfile
+import time
+
+from artifact_cache import ArtifactCache
+from lexer import Lexer
+from syntax import Parser
+
+SAMPLE_PATH = os.path.join("rookie-scripts", "file2.rook")
+COPIES = 20000
+REPEATS = 3
+
+
+def lex_and_parse(path: str):
+    lexer = Lexer(path)
+    lexer.start_parse()
+    diagnostics = Parser(lexer.get_tokens()).parse()
+    parse_error = "\n".join(str(error) for error in diagnostics) if diagnostics else None
+    return lexer.get_tokens().get_tokens(), parse_error
+
+
+def best_time(function):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+if __name__ == "__main__":
+    with open(SAMPLE_PATH, "r") as file:
+        sample = file.read().rstrip("\n") + "\n"
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.rook")
+        with open(path, "w") as file:
+            file.write(sample * COPIES)
+        with open(path, "rb") as file:
+            source = file.read()
+
+        cache = ArtifactCache(os.path.join(directory, "cache"))
+        (tokens, parse_error), cold = best_time(lambda: lex_and_parse(path))
+        cache.store(source, tokens, parse_error)
+        artifact, hit = best_time(lambda: cache.load(source))
+
+        if list(artifact.tokens.rows()) != list(tokens.rows()) or artifact.parse_error != parse_error:
+            raise AssertionError("Cached artifact differs from a fresh run")
+
+        entry_size = os.path.getsize(cache.path_for(source))
+
+    print(f"source size:    {len(source) / 1024:>10.1f} KiB, {len(tokens)} tokens")
+    print(f"cache entry:    {entry_size / 1024:>10.1f} KiB")
+    print(f"lex and parse:  {cold * 1000:>10.1f} ms")
+    print(f"cache hit:      {hit * 1000:>10.1f} ms ({cold / hit:.0f}x)")
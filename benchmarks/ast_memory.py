@@ -0,0 +1,122 @@
+# Measures the syntax tree the parser builds with build_ast=True on a generated
+# program of about 1 MB: the bytes held by the AstArena columns compared to the
+# source size, the same tree as one object per node with a __dict__, what building
+# the tree adds to the parse time, and how fast the tree is walked with a Visitor.
+# Run from the project root: python -m benchmarks.ast_memory
+import gc
+import time
+import tracemalloc
+
+from ast_arena import AstArena, Visitor
+from benchmarks.program_generator import generate_program
+from lexer import Lexer
+from syntax import Parser
+
+TARGET_SIZE = 1024 * 1024
+REPEATS = 3
+# the arena may hold at most this many bytes per byte of source
+MAX_SOURCE_MULTIPLE = 4
+
+
+# a node as a plain object, how a tree is usually built, for comparison
+class ObjectNode:
+    def __init__(self, kind: int, token: int, data: int, start: int, end: int, children: list):
+        self.kind = kind
+        self.token = token
+        self.data = data
+        self.start = start
+        self.end = end
+        self.children = children
+
+
+# the arena copied into ObjectNodes, children first, like the parser adds them
+def build_objects(arena: AstArena):
+    nodes = []
+    for node in range(len(arena)):
+        start, end = arena.span(node)
+        children = [nodes[child] for child in arena.children(node)]
+        nodes.append(ObjectNode(arena._kinds[node], arena.token(node), arena.data(node), start, end, children))
+    return nodes[arena.root]
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def parse_tree(tokens):
+    parser = Parser(tokens, build_ast=True)
+    parser.parse()
+    return parser.ast
+
+
+def parse_time(tokens, build_ast: bool):
+    best = float("inf")
+    for _ in range(REPEATS):
+        tokens.reset(0)
+        start = time.perf_counter()
+        parser = Parser(tokens, build_ast=build_ast)
+        diagnostics = parser.parse()
+        best = min(best, time.perf_counter() - start)
+    if diagnostics:
+        raise AssertionError(f"Generated program does not parse:\n{diagnostics[0]}")
+    return best, parser
+
+
+# counts the nodes of every kind, a visitor with one method for all of them
+class KindCounter(Visitor):
+    def __init__(self, arena: AstArena):
+        self.arena = arena
+        self.counts = {}
+
+    def __getattr__(self, name: str):
+        if not name.startswith("enter_"):
+            raise AttributeError(name)
+        kind = name[len("enter_") :]
+        return lambda node: self.counts.__setitem__(kind, self.counts.get(kind, 0) + 1)
+
+
+if __name__ == "__main__":
+    source = generate_program("mixed", TARGET_SIZE)
+    lexer = Lexer("bench.rook", source)
+    lexer.start_parse()
+    tokens = lexer.get_tokens()
+    token_count = len(tokens.get_tokens())
+
+    recognize_seconds, _ = parse_time(tokens, False)
+    build_seconds, parser = parse_time(tokens, True)
+    arena = parser.ast
+    source_bytes = len(source.encode())
+    print(f"source: {source_bytes} bytes, {token_count} tokens, {len(arena)} nodes")
+    print(
+        f"arena columns: {arena.nbytes()} bytes, {arena.nbytes() / len(arena):.1f} per node, "
+        f"{arena.nbytes() / source_bytes:.2f}x the source"
+    )
+
+    tokens.reset(0)
+    _, traced = measure(lambda: parse_tree(tokens))
+    _, objects = measure(lambda: build_objects(arena))
+    print(f"traced after parsing:       {traced} bytes ({traced / source_bytes:.2f}x the source)")
+    print(f"as ObjectNodes:             {objects} bytes ({objects / source_bytes:.2f}x the source)")
+    if arena.nbytes() > MAX_SOURCE_MULTIPLE * source_bytes:
+        raise AssertionError(f"The arena is more than {MAX_SOURCE_MULTIPLE}x the source")
+
+    print(f"\nparse only:       {recognize_seconds * 1e9 / token_count:>6.0f} ns/token")
+    print(
+        f"parse and build:  {build_seconds * 1e9 / token_count:>6.0f} ns/token "
+        f"({build_seconds / recognize_seconds:.2f}x)"
+    )
+
+    counter = KindCounter(arena)
+    start = time.perf_counter()
+    counter.visit(arena)
+    visit_seconds = time.perf_counter() - start
+    if sum(counter.counts.values()) != len(arena):
+        raise AssertionError("The visitor did not reach every node")
+    print(f"visiting every node: {visit_seconds * 1e9 / len(arena):.0f} ns/node")
+    top = sorted(counter.counts.items(), key=lambda item: -item[1])[:6]
+    print("most frequent: " + ", ".join(f"{kind} {count}" for kind, count in top))
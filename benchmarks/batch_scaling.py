@@ -0,0 +1,40 @@
+# Measures how batch.check_files scales with the number of worker processes.
+# Run from the project root: python -m benchmarks.batch_scaling
+import os
+import tempfile
+import time
+
+import batch
+
+SAMPLE_PATHS = [os.path.join("rookie-scripts", "file1.rook"), os.path.join("rookie-scripts", "file2.rook")]
+FILES = 2000
+COPIES_PER_FILE = 20
+
+
+if __name__ == "__main__":
+    samples = []
+    for sample_path in SAMPLE_PATHS:
+        with open(sample_path, "r") as file:
+            samples.append(file.read().rstrip("\n") + "\n")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for index in range(FILES):
+            with open(os.path.join(directory, f"submission{index}.rook"), "w") as file:
+                file.write(samples[index % len(samples)] * COPIES_PER_FILE)
+        files = batch.collect_files([directory])
+
+        cores = os.cpu_count() or 1
+        worker_counts = sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1)))
+        reference = None
+        serial = None
+        for workers in worker_counts:
+            start = time.perf_counter()
+            results = batch.check_files(files, workers=workers)
+            elapsed = time.perf_counter() - start
+
+            outcomes = [result.to_dict() for result in results]
+            if reference is None:
+                reference, serial = outcomes, elapsed
+            elif outcomes != reference:
+                raise AssertionError(f"Results with {workers} workers differ from a serial run")
+            print(f"{workers:>3} workers: {elapsed * 1000:>10.1f} ms, speedup {serial / elapsed:>5.2f}x")
@@ -0,0 +1,228 @@
+# Runs the CPU-bound Rookie programs in benchmarks/programs with a naive tree-walking
+# interpreter (one method call per node, variables in dicts) and with the bytecode
+# compiler and virtual machine, checks that both print the same output, and reports
+# the time of each and the speedup of the virtual machine.
+# Run from the project root: python -m benchmarks.execution
+import glob
+import io
+import os
+import sys
+import time
+
+from ast_arena import NO_TOKEN, AstArena, NodeKind, declaration_parts
+from bytecode import BINARY_FUNCTIONS, UNDEFINED
+from compiler import ASSIGN_OPCODES, BINARY_OPCODES, compile_program, literal_value
+from lexer import Lexer
+from scopes import LocalNames
+from syntax import Parser
+from token_kinds import TokenKind
+from vm import build_range, format_value, input_value, run_program
+
+PROGRAMS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "programs")
+REPEATS = 3
+
+
+# a function of the tree-walker, its locals are found like the compiler finds them
+class WalkedFunction:
+    def __init__(self, node: int, parameters: list, defaults: list, local_names: set):
+        self.node = node
+        self.parameters = parameters
+        self.defaults = defaults
+        self.local_names = local_names
+
+
+# the semantics of the virtual machine, evaluated straight from the syntax tree with recursion
+class TreeWalker:
+    def __init__(self, arena: AstArena, output, input_stream=None):
+        self.arena = arena
+        self.output = output
+        self.input = input_stream
+        self.globals = {}
+        # the variables of the running call and the names that are its locals
+        self.locals = None
+        self.local_names = set()
+
+    def run(self):
+        for statement in self.arena.children(self.arena.root):
+            self.execute(statement)
+
+    def execute(self, node: int):
+        getattr(self, "execute_" + self.arena.kind(node).name.lower())(node)
+
+    def block(self, node: int):
+        for statement in self.arena.children(node):
+            self.execute(statement)
+
+    def load(self, name: str):
+        scope = self.locals if name in self.local_names else self.globals
+        if name not in scope:
+            raise ValueError(f"Variable '{name}' is not defined")
+        return scope[name]
+
+    def store(self, name: str, value):
+        (self.locals if name in self.local_names else self.globals)[name] = value
+
+    def evaluate(self, node: int):
+        arena = self.arena
+        kind = arena.kind(node)
+        if kind == NodeKind.NAME:
+            return self.load(arena.lexeme(node))
+        if kind in (NodeKind.NUMBER, NodeKind.FLOAT, NodeKind.STRING, NodeKind.BOOLEAN):
+            return literal_value(arena.tokens.kind_at(arena.token(node)), arena.lexeme(node))
+        if kind == NodeKind.NOT:
+            return not self.evaluate(arena.child(node, 0))
+        if kind == NodeKind.UNARY:
+            value = self.evaluate(arena.child(node, 0))
+            return -value if arena.tokens.kind_at(arena.token(node)) == TokenKind.MINUS else +value
+        if kind == NodeKind.ARRAY:
+            return [self.evaluate(child) for child in arena.children(node)]
+        if kind == NodeKind.RANGE:
+            children = arena.children(node)
+            step = 1 if arena.data(node) == NO_TOKEN else int(arena.lexeme(node, True))
+            return build_range([self.evaluate(child) for child in children[:-1]], self.evaluate(children[-1]), step)
+        if kind == NodeKind.INPUT:
+            prompt = arena.children(node)
+            self.output.write(format_value(self.evaluate(prompt[0])) if prompt else "")
+            return input_value(self.input.readline().rstrip("\n"))
+
+        left, right = arena.children(node)
+        operator = arena.tokens.kind_at(arena.token(node))
+        if operator == TokenKind.AND:
+            value = self.evaluate(left)
+            return self.evaluate(right) if value else value
+        if operator == TokenKind.OR:
+            value = self.evaluate(left)
+            return value if value else self.evaluate(right)
+        return BINARY_FUNCTIONS[BINARY_OPCODES[operator]](self.evaluate(left), self.evaluate(right))
+
+    def execute_declaration(self, node: int):
+        names, values = declaration_parts(self.arena, node)
+        values = [self.evaluate(value) for value in values]
+        if len(names) > 1:
+            for name, value in zip(names, values):
+                self.store(self.arena.tokens.fields_at(name)[1], value)
+            return
+        self.store(self.arena.lexeme(node), values[0] if len(values) == 1 else values)
+
+    def execute_assign(self, node: int):
+        name = self.arena.lexeme(node)
+        function = BINARY_FUNCTIONS[ASSIGN_OPCODES[self.arena.tokens.kind_at(self.arena.data(node))]]
+        self.store(name, function(self.load(name), self.evaluate(self.arena.child(node, 0))))
+
+    def execute_print(self, node: int):
+        values = [format_value(self.evaluate(value)) for value in self.arena.children(node)]
+        separator = " " if self.arena.data(node) == NO_TOKEN else self.arena.lexeme(node, True)[1:-1]
+        self.output.write(separator.join(values) + "\n")
+
+    def execute_call(self, node: int):
+        function = self.load(self.arena.lexeme(node))
+        arguments = [self.evaluate(argument) for argument in self.arena.children(node)]
+        arguments += function.defaults[len(arguments) :]
+        caller = self.locals, self.local_names
+        self.locals = dict(zip(function.parameters, arguments))
+        self.local_names = function.local_names
+        self.block(self.arena.children(function.node)[-1])
+        self.locals, self.local_names = caller
+
+    def execute_if(self, node: int):
+        arena = self.arena
+        children = arena.children(node)
+        if self.evaluate(children[0]):
+            self.block(children[1])
+            return
+        for branch in children[2:]:
+            if arena.kind(branch) == NodeKind.ELSE:
+                self.block(arena.child(branch, 0))
+                return
+            condition, block = arena.children(branch)
+            if self.evaluate(condition):
+                self.block(block)
+                return
+
+    def execute_which(self, node: int):
+        arena = self.arena
+        value = self.load(arena.lexeme(node))
+        for arm in arena.children(node):
+            if arena.kind(arm) == NodeKind.DEFAULT:
+                self.block(arena.child(arm, 0))
+                return
+            label = literal_value(arena.tokens.kind_at(arena.token(arm)), arena.lexeme(arm))
+            operator = arena.data(arm)
+            opcode = BINARY_OPCODES[TokenKind.EQUAL if operator == NO_TOKEN else arena.tokens.kind_at(operator)]
+            if BINARY_FUNCTIONS[opcode](value, label):
+                self.block(arena.child(arm, 0))
+                return
+
+    def execute_while(self, node: int):
+        condition, block = self.arena.children(node)
+        while self.evaluate(condition):
+            self.block(block)
+
+    def execute_for(self, node: int):
+        arena = self.arena
+        iterable, block = arena.children(node)
+        pair = arena.data(node) != NO_TOKEN
+        for index, value in enumerate(self.evaluate(iterable)):
+            if pair:
+                self.store(arena.lexeme(node), index)
+                self.store(arena.lexeme(node, True), value)
+            else:
+                self.store(arena.lexeme(node), value)
+            self.block(block)
+
+    def execute_function(self, node: int):
+        arena = self.arena
+        parameters = arena.children(node)[:-1]
+        names = [arena.lexeme(parameter) for parameter in parameters]
+        defaults = [
+            self.evaluate(arena.child(parameter, 0)) if arena.child_count(parameter) else UNDEFINED
+            for parameter in parameters
+        ]
+        collector = LocalNames(arena)
+        collector.visit(arena, arena.children(node)[-1])
+        self.store(arena.lexeme(node), WalkedFunction(node, names, defaults, set(names) | set(collector.names)))
+
+
+def parse(path: str):
+    lexer = Lexer(path)
+    lexer.start_parse()
+    parser = Parser(lexer.get_tokens(), build_ast=True)
+    diagnostics = parser.parse()
+    if diagnostics:
+        raise AssertionError(f"{path} does not parse:\n{diagnostics[0]}")
+    return parser.ast
+
+
+# the best time of run(output) and the output it printed
+def best_time(run):
+    best = float("inf")
+    for _ in range(REPEATS):
+        output = io.StringIO()
+        start = time.perf_counter()
+        run(output)
+        best = min(best, time.perf_counter() - start)
+    return best, output.getvalue()
+
+
+if __name__ == "__main__":
+    # the tree-walker recurses once per nested call and expression
+    sys.setrecursionlimit(100000)
+    paths = sorted(glob.glob(os.path.join(PROGRAMS_DIRECTORY, "*.rook")))
+    print(f"{'program':<18}{'tree-walker':>14}{'compile':>12}{'vm':>12}{'speedup':>10}")
+    totals = [0.0, 0.0]
+    for path in paths:
+        arena = parse(path)
+        walked, expected = best_time(lambda output: TreeWalker(arena, output).run())
+        start = time.perf_counter()
+        program = compile_program(arena)
+        compile_seconds = time.perf_counter() - start
+        executed, output = best_time(lambda output: run_program(program, output))
+        if output != expected:
+            raise AssertionError(f"The virtual machine printed\n{output}\nbut the tree-walker printed\n{expected}")
+        totals = [totals[0] + walked, totals[1] + executed]
+        name = os.path.basename(path).split(".")[0]
+        print(
+            f"{name:<18}{walked * 1000:>11.1f} ms{compile_seconds * 1000:>9.2f} ms{executed * 1000:>9.1f} ms"
+            f"{walked / executed:>9.2f}x"
+        )
+    print(f"{'all':<18}{totals[0] * 1000:>11.1f} ms{'':>12}{totals[1] * 1000:>9.1f} ms{totals[0] / totals[1]:>9.2f}x")
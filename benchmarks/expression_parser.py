@@ -0,0 +1,137 @@
+# Times the precedence-climbing expression parser against the previous recursive
+# descent productions on long expressions and shows how deep each can nest.
+# tests/test_expression_parser.py checks that both accept the same language.
+# Run from the project root: python -m benchmarks.expression_parser
+import sys
+import time
+
+from benchmarks.program_generator import generate_program
+from lexer import Lexer
+from syntax import ADDITIVE_OPERATORS, ARRAY_VALUES_END, COMPARISON_OPERATORS, VALUE_FIRST, Parser
+from token_kinds import KEYWORD_KINDS, TokenKind
+
+PROGRAM_SIZE = 256 * 1024
+REPEATS = 3
+NESTING_DEPTHS = [100, 1000, 10000, 100000]
+
+
+# the expression productions of new_grammar.ebnf as recursive descent, the way they were written
+# before parse_expression, kept as the reference
+class ReferenceParser(Parser):
+    def expression(self):
+        self.and_test()
+        while self.consume(TokenKind.OR):
+            self.and_test()
+
+    def and_test(self):
+        self.not_test()
+        while self.consume(TokenKind.AND):
+            self.not_test()
+
+    def not_test(self):
+        self.consume(TokenKind.NOT)
+        self.comparison()
+
+    def comparison(self):
+        self.expr()
+        while self.match_any(COMPARISON_OPERATORS):
+            if self.consume(TokenKind.NOT):
+                if not self.consume(TokenKind.IN):
+                    self.print_error("Expected 'in' keyword after 'not' keyword")
+            else:
+                self.consume(self.current_kind)
+            self.expr()
+
+    def expr(self):
+        self.factor()
+        while self.match_any([TokenKind.PLUS, TokenKind.MINUS]):
+            self.consume(self.current_kind)
+            self.factor()
+
+    def factor(self):
+        self.term()
+        while self.match_any([TokenKind.MULTIPLY, TokenKind.DIVIDE, TokenKind.MODULO]):
+            self.consume(self.current_kind)
+            self.term()
+
+    def term(self):
+        self.consume_any(ADDITIVE_OPERATORS)
+        self.value()
+
+    def value(self):
+        if self.match_any(VALUE_FIRST):
+            self.consume(self.current_kind)
+        elif self.match(TokenKind.LBRACKET):
+            self.array()
+        elif self.consume(TokenKind.LPAREN):
+            self.expression()
+            if not self.consume(TokenKind.RPAREN):
+                self.print_error("Expected closing parenthesis ')'")
+        else:
+            self.print_error("Invalid value")
+
+    def array(self):
+        self.consume(TokenKind.LBRACKET)
+        while not self.match_any(ARRAY_VALUES_END):
+            self.expression()
+            if not self.consume(TokenKind.COMMA):
+                break
+
+        if self.consume_any(KEYWORD_KINDS):
+            if not self.consume(TokenKind.NUMBER):
+                self.print_error("Expected integer after 'to' keyword")
+            if self.consume(TokenKind.STEP):
+                if not self.consume(TokenKind.COLON):
+                    self.print_error("Expected colon ':'")
+                if not self.consume(TokenKind.NUMBER):
+                    self.print_error("Expected integer after 'step' keyword")
+
+        if not self.consume(TokenKind.RBRACKET):
+            self.print_error("Expected closing bracket ']'")
+
+
+def tokenize(code: str):
+    lexer = Lexer("expression.rook", code)
+    lexer.start_parse()
+    return lexer.get_tokens()
+
+
+def parse_time(parser_class, tokens):
+    best = float("inf")
+    for _ in range(REPEATS):
+        tokens.reset(0)
+        start = time.perf_counter()
+        parser_class(tokens).parse()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# the deepest nested parentheses and arrays of NESTING_DEPTHS that parses without RecursionError
+def max_nesting(parser_class):
+    deepest = 0
+    for depth in NESTING_DEPTHS:
+        nested = "(" * depth + "1" + ")" * depth + " + " + "[" * depth + "2" + "]" * depth
+        tokens = tokenize(f"x = {nested}\n")
+        try:
+            if parser_class(tokens).parse():
+                break
+        except RecursionError:
+            break
+        deepest = depth
+    return deepest
+
+
+if __name__ == "__main__":
+    tokens = tokenize(generate_program("long_expressions", PROGRAM_SIZE))
+    token_count = len(tokens.get_tokens())
+    reference = parse_time(ReferenceParser, tokens)
+    precedence_climbing = parse_time(Parser, tokens)
+    print(f"recursive descent:   {reference * 1e9 / token_count:>6.0f} ns/token")
+    print(
+        f"precedence climbing: {precedence_climbing * 1e9 / token_count:>6.0f} ns/token"
+        f" ({reference / precedence_climbing:.2f}x)"
+    )
+
+    print(f"recursion limit {sys.getrecursionlimit()}, deepest nesting parsed:")
+    print(f"recursive descent:   {max_nesting(ReferenceParser)}")
+    print(f"precedence climbing: {max_nesting(Parser)}")
@@ -0,0 +1,95 @@
+# Applies randomized edits to a large document and times updating it incrementally
+# against lexing and parsing the whole file again. tests/test_incremental.py checks
+# that both give the same result.
+# Run from the project root: python -m benchmarks.incremental_edits
+import os
+import random
+import tempfile
+import time
+
+from incremental import IncrementalDocument
+from lexer import Lexer
+from syntax import ParseError, Parser
+
+SAMPLE_PATH = os.path.join("rookie-scripts", "file2.rook")
+COPIES = 1500
+EDITS = 200
+SEED = 1903
+
+EDIT_LINES = [
+    "x = 5",
+    "    x = 5",
+    "        print(x, y)",
+    "total += x * (y - 2)",
+    '    name = input("what\'s your name?")',
+    "print(1 to 2)",
+    "    y = [1 to 5 step: 2]",
+    "if x < 5:",
+    "    while x:",
+    "x = 1.",
+    'a_ = "unterminated',
+    "",
+    "/* comment",
+    "end of comment */ x = 1",
+    "// comment",
+]
+
+
+# the tokens and error of a full lex and parse, in a comparable form
+def full_result(path: str):
+    lexer = Lexer(path)
+    try:
+        lexer.start_parse()
+    except Exception as error:
+        return None, f"{type(error).__name__}: {error}"
+
+    tokens = lexer.get_tokens()
+    try:
+        parser = Parser(tokens, recover=False)
+        parser.rook_pl()
+        error = None
+    except ParseError as parse_error:
+        error = str(parse_error)
+    return token_rows(tokens.get_tokens()), error
+
+
+def token_rows(tokens):
+    return [
+        (token.kind, token.lexeme, token.line_no, token.column_no, token.indent_level, token.line_code)
+        for token in tokens
+    ]
+
+
+def random_edit(rng: random.Random, line_count: int):
+    start_line = rng.randint(1, line_count)
+    end_line = min(line_count, start_line + rng.choice([-1, 0, 0, 0, 1, 2]))
+    text = "\n".join(rng.choice(EDIT_LINES) for _ in range(rng.randint(0 if end_line >= start_line else 1, 2)))
+    return start_line, end_line, text
+
+
+if __name__ == "__main__":
+    rng = random.Random(SEED)
+    with open(SAMPLE_PATH, "r") as file:
+        sample = file.read().rstrip("\n") + "\n"
+    document = IncrementalDocument(sample * COPIES)
+
+    incremental_time = 0.0
+    full_time = 0.0
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.rook")
+
+        for _ in range(EDITS):
+            start_line, end_line, text = random_edit(rng, len(document.get_text().split("\n")))
+
+            start = time.perf_counter()
+            document.edit(start_line, end_line, text)
+            incremental_time += time.perf_counter() - start
+
+            with open(path, "w") as file:
+                file.write(document.get_text())
+            start = time.perf_counter()
+            full_result(path)
+            full_time += time.perf_counter() - start
+
+    print(f"full re-run:  {full_time / EDITS * 1000:>8.2f} ms/edit")
+    print(f"incremental:  {incremental_time / EDITS * 1000:>8.2f} ms/edit ({full_time / incremental_time:.1f}x)")
@@ -0,0 +1,158 @@
+# Measures lexing throughput of the table-driven scanner and the regex engine
+# against the previous per-character if/elif state machine, and checks they all
+# produce the same tokens and errors on every sample script.
+# Run from the project root: python -m benchmarks.lexer_throughput
+import os
+import tempfile
+import time
+
+import constants
+from lexer import Lexer
+from regex_lexer import RegexLexer
+from token_kinds import TokenKind
+
+SAMPLE_PATH = os.path.join("rookie-scripts", "file1.rook")
+TARGET_SIZE = 1024 * 1024
+REPEATS = 3
+
+
+# the scanner as it was before the transition table, kept as the reference implementation
+class ReferenceLexer(Lexer):
+    def generate_tokens(self, line: str):
+        while self._cursor < len(line):
+            current_char = line[self._cursor]
+            # initial state
+            if self._current_state == 0:
+                # skip whitespaces
+                if current_char in constants.SPACES:
+                    self._cursor += 1
+                    continue
+
+                self.update_lexeme(current_char)
+                if current_char in constants.DELIMITERS:
+                    self.add_token(line)
+                elif current_char in constants.ALPHABET:
+                    self._current_state = 1
+                elif current_char in constants.DIGITS:
+                    self._current_state = 3
+                elif current_char in constants.OPERATORS:
+                    self._current_state = 5
+                elif current_char == "!":
+                    self._current_state = 7
+                elif current_char == '"':
+                    self._current_state = 8
+                else:
+                    raise Exception(f"Invalid lexeme: {self._lexeme}")
+            # identifier, keyword, and boolean literals
+            elif self._current_state == 1:
+                if current_char in constants.ALPHABET + constants.DIGITS:
+                    self.update_lexeme(current_char)
+                elif current_char == "_":
+                    self._current_state = 2
+                else:
+                    self.add_token(line)
+            # identifier with underscore
+            elif self._current_state == 2:
+                if current_char == "_":
+                    self.update_lexeme(current_char)
+                elif current_char in constants.ALPHABET + constants.DIGITS:
+                    self._current_state = 1
+                else:
+                    raise Exception(f"Invalid lexeme: {self._lexeme + current_char}")
+            # number
+            elif self._current_state == 3:
+                if current_char in constants.ALPHABET:
+                    raise Exception(f"Invalid lexeme: {self._lexeme + current_char}")
+
+                if current_char in constants.DIGITS:
+                    self.update_lexeme(current_char)
+                elif current_char == ".":
+                    self._current_state = 4
+                    self.update_lexeme(current_char)
+                else:
+                    self.add_token(line)
+            # float number
+            elif self._current_state == 4:
+                if current_char in constants.DIGITS:
+                    self._current_state = 3
+                else:
+                    raise Exception(f"Invalid lexeme: {self._lexeme + current_char}")
+            # single operators (+ - * / % > < =)
+            elif self._current_state in [5, 7]:
+                if current_char == "=":
+                    self._current_state = 6
+                    self.update_lexeme(current_char)
+                else:
+                    # invalid double operators (-+, ++, =+, --) and not equal (!=)
+                    if current_char in constants.OPERATORS or self._current_state == 7:
+                        raise Exception(f"Invalid lexeme: {self._lexeme + current_char}")
+                    self.add_token(line)
+            # double operators (+= -= *= /= >= <= ==)
+            elif self._current_state == 6:
+                if current_char == "=":
+                    raise Exception(f"Invalid lexeme: {self._lexeme + current_char}")
+                else:
+                    self.add_token(line)
+            # string
+            elif self._current_state == 8:
+                self.update_lexeme(current_char)
+                if current_char == '"':  # closing quote
+                    self.add_token(line)
+
+        # checks if string is closed
+        if self._current_state == 8:
+            raise Exception(f"String was not closed: {self._lexeme}")
+
+        self.add_token(line)
+
+    def update_lexeme(self, current_char):
+        self._cursor += 1
+        self._lexeme += current_char
+
+    def classify_token(self):
+        kind = TokenKind.IDENTIFIER
+        if self._lexeme in constants.KEYWORDS:
+            kind = TokenKind[self._lexeme.upper()]
+        elif self._lexeme in constants.BOOLEAN_LITERAL:
+            kind = TokenKind.BOOLEAN_LITERAL
+        elif self._lexeme in constants.LOGICAL_OPERATORS:
+            kind = TokenKind[constants.LOGICAL_OPERATORS[self._lexeme]]
+        elif self._lexeme in constants.OPERATORS:
+            kind = TokenKind[constants.OPERATORS[self._lexeme]]
+        elif self._lexeme in constants.DELIMITERS:
+            kind = TokenKind[constants.DELIMITERS[self._lexeme]]
+        elif self._lexeme in constants.BUILT_IN_FUNCTIONS:
+            kind = TokenKind[self._lexeme.upper()]
+        elif self._current_state == 3:
+            kind = TokenKind.FLOAT if "." in self._lexeme else TokenKind.NUMBER
+        elif self._current_state == 8:
+            kind = TokenKind.STRING
+        return (kind, self._lexeme)
+
+
+def throughput(lexer_class, path: str):
+    best = float("inf")
+    for _ in range(REPEATS):
+        lexer = lexer_class(path)
+        start = time.perf_counter()
+        lexer.start_parse()
+        best = min(best, time.perf_counter() - start)
+    return os.path.getsize(path) / (1024 * 1024) / best
+
+
+if __name__ == "__main__":
+    with open(SAMPLE_PATH, "r") as file:
+        sample = file.read().rstrip("\n") + "\n"
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.rook")
+        with open(path, "w") as file:
+            file.write(sample * (TARGET_SIZE // len(sample) + 1))
+
+        reference = throughput(ReferenceLexer, path)
+        table_driven = throughput(Lexer, path)
+        regex = throughput(RegexLexer, path)
+
+    print(f"if/elif scanner:      {reference:>6.2f} MB/s")
+    print(f"table-driven scanner: {table_driven:>6.2f} MB/s ({table_driven / reference:.2f}x)")
+    print(f"regex engine:         {regex:>6.2f} MB/s ({regex / reference:.2f}x)")
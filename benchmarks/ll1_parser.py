@@ -0,0 +1,88 @@
+# Runs the hand-written parser and the LL(1) parser generated from new_grammar.ebnf
+# side by side: the time per token of each on generated programs of every shape,
+# the scripts they disagree on, and what generating the tables costs compared to
+# loading the generated module.
+# Run from the project root: python -m benchmarks.ll1_parser
+import glob
+import importlib
+import os
+import time
+
+import ll1_generator
+from benchmarks.program_generator import SHAPES, generate_program
+from lexer import Lexer
+from ll1_parser import LL1Parser
+from syntax import Parser
+
+PROGRAM_SIZE = 256 * 1024
+REPEATS = 3
+SCRIPT_PATTERNS = [os.path.join("rookie-scripts", "*.rook")]
+
+
+def parse_time(create_parser, tokens):
+    best = float("inf")
+    for _ in range(REPEATS):
+        tokens.reset(0)
+        start = time.perf_counter()
+        diagnostics = create_parser(tokens).parse()
+        best = min(best, time.perf_counter() - start)
+    if diagnostics:
+        raise AssertionError(f"Generated program does not parse:\n{diagnostics[0]}")
+    return best
+
+
+# the scripts that one parser accepts and the other rejects, with the error given
+def disagreements(paths: list[str]):
+    results = []
+    for path in paths:
+        lexer = Lexer(path)
+        try:
+            lexer.start_parse()
+        except Exception:
+            continue
+        tokens = lexer.get_tokens()
+        recursive = Parser(tokens).parse()
+        tokens.reset(0)
+        ll1 = LL1Parser(tokens).parse()
+        if bool(recursive) != bool(ll1):
+            results.append((path, (recursive or ll1)[0].message, "ll1" if ll1 else "recursive"))
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'shape':<18}{'tokens':>9}{'recursive':>14}{'ll1':>14}")
+    totals = [0, 0.0, 0.0]
+    for shape in SHAPES:
+        lexer = Lexer(f"{shape}.rook", generate_program(shape, PROGRAM_SIZE))
+        lexer.start_parse()
+        tokens = lexer.get_tokens()
+        token_count = len(tokens.get_tokens())
+        recursive = parse_time(Parser, tokens)
+        ll1 = parse_time(LL1Parser, tokens)
+        totals = [totals[0] + token_count, totals[1] + recursive, totals[2] + ll1]
+        print(
+            f"{shape:<18}{token_count:>9}{recursive * 1e9 / token_count:>8.0f} ns/tk"
+            f"{ll1 * 1e9 / token_count:>8.0f} ns/tk"
+        )
+    token_count, recursive, ll1 = totals
+    print(
+        f"{'all':<18}{token_count:>9}{recursive * 1e9 / token_count:>8.0f} ns/tk{ll1 * 1e9 / token_count:>8.0f} ns/tk"
+    )
+
+    paths = sorted(path for pattern in SCRIPT_PATTERNS for path in glob.glob(pattern))
+    different = disagreements(paths)
+    print(f"\n{len(paths) - len(different)} of {len(paths)} scripts get the same result")
+    for path, message, rejected_by in different:
+        print(f"  {path}: only {rejected_by} rejects it, {message}")
+
+    start = time.perf_counter()
+    ll1_generator.generate()
+    generate_seconds = time.perf_counter() - start
+    import ll1_tables
+
+    start = time.perf_counter()
+    importlib.reload(ll1_tables)
+    load_seconds = time.perf_counter() - start
+    print(
+        f"\ngenerating the tables: {generate_seconds * 1000:.1f} ms, loading ll1_tables: {load_seconds * 1000:.1f} ms"
+    )
@@ -0,0 +1,105 @@
+# Generates a program split into many modules that import each other in layers, and reports how long
+# loading its modules takes: compiled from scratch by one process and by a worker pool, loaded again
+# from the module cache, with one module changed, and once more by the same loader.
+# Run from the project root: python -m benchmarks.modules [--modules N] [--workers N]
+import argparse
+import io
+import os
+import tempfile
+import time
+
+from compiler import compile_program
+from lexer import Lexer
+from modules import ModuleCache, ModuleLoader
+from syntax import Parser
+from vm import run_program
+
+FUNCTIONS_PER_MODULE = 20
+# the modules of a layer import the modules of the layer below
+LAYER_SIZE = 10
+
+
+def module_source(index: int):
+    lines = []
+    if index >= LAYER_SIZE:
+        lines.append(f"import module{index - LAYER_SIZE}")
+    lines.append(f"value{index} = {index}")
+    for function in range(FUNCTIONS_PER_MODULE):
+        lines += [
+            f"define function{index}_{function}(n, k = {function + 1}):",
+            "    total = 0",
+            "    i = 1",
+            "    while i <= n:",
+            "        if i % k == 0:",
+            "            total += i",
+            "        elif i > 1000 and total < 5:",
+            '            print("unreachable")',
+            "        i += 1",
+            "    print(total)",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+# writes the modules and the script importing the top layer, returns the path of the script
+def write_program(directory: str, count: int):
+    for index in range(count):
+        with open(os.path.join(directory, f"module{index}.rook"), "w") as file:
+            file.write(module_source(index))
+    top_layer = range(max(0, count - LAYER_SIZE), count)
+    path = os.path.join(directory, "main.rook")
+    with open(path, "w") as file:
+        file.write("".join(f"import module{index}\n" for index in top_layer))
+        file.write(f"function{count - 1}_0(10)\n")
+    return path
+
+
+def compile_script(path: str):
+    with open(path) as file:
+        lexer = Lexer(path, file.read())
+    lexer.start_parse()
+    parser = Parser(lexer.get_tokens(), build_ast=True)
+    parser.parse()
+    return compile_program(parser.ast)
+
+
+def timed_load(loader: ModuleLoader, path: str, program):
+    start = time.perf_counter()
+    modules = loader.load(path, program)
+    return time.perf_counter() - start, modules
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Times loading the modules of a generated program.")
+    arg_parser.add_argument("--modules", type=int, default=200, help="number of modules")
+    arg_parser.add_argument("--workers", type=int, default=0, help="worker processes (default: all cores)")
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_program(directory, args.modules)
+        program = compile_script(path)
+        cache_directory = os.path.join(directory, "cache")
+        print(f"{args.modules} modules, {FUNCTIONS_PER_MODULE} functions each")
+
+        serial, _ = timed_load(ModuleLoader([directory], workers=1), path, program)
+        print(f"{'compiled, 1 process':<32}{serial * 1000:>10.1f} ms")
+        loader = ModuleLoader([directory], ModuleCache(cache_directory), args.workers)
+        parallel, modules = timed_load(loader, path, program)
+        print(f"{f'compiled, {loader.workers} workers':<32}{parallel * 1000:>10.1f} ms")
+
+        warm_loader = ModuleLoader([directory], ModuleCache(cache_directory), args.workers)
+        warm, _ = timed_load(warm_loader, path, program)
+        print(f"{'from the cache':<32}{warm * 1000:>10.1f} ms{serial / warm:>9.1f}x")
+
+        with open(os.path.join(directory, "module0.rook"), "a") as file:
+            file.write("changed = true\n")
+        changed_loader = ModuleLoader([directory], ModuleCache(cache_directory), args.workers)
+        changed, _ = timed_load(changed_loader, path, program)
+        print(f"{'one module changed':<32}{changed * 1000:>10.1f} ms   {changed_loader.stats}")
+
+        reused, _ = timed_load(changed_loader, path, program)
+        print(f"{'same loader again':<32}{reused * 1000:>10.1f} ms   {changed_loader.stats}")
+
+        output = io.StringIO()
+        run_program(program, output, modules=modules)
+        if output.getvalue() != "55\n":
+            raise AssertionError(f"The program printed {output.getvalue()!r}")
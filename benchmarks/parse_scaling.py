@@ -0,0 +1,49 @@
+# Measures how Parser.parse scales with the number of tokens.
+# Run from the project root: python -m benchmarks.parse_scaling
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from lexer import Lexer
+from syntax import Parser
+
+SAMPLE_PATH = os.path.join("rookie-scripts", "file2.rook")
+SIZES = [250, 500, 1000, 2000, 4000, 8000]
+REPEATS = 3
+
+
+def lex_replicated(copies: int):
+    with open(SAMPLE_PATH, "r") as file:
+        sample = file.read().rstrip("\n") + "\n"
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.rook")
+        with open(path, "w") as file:
+            file.write(sample * copies)
+
+        lexer = Lexer(path)
+        lexer.start_parse()
+        return lexer.get_tokens()
+
+
+def time_parse(copies: int):
+    tokens = lex_replicated(copies)
+    token_count = len(tokens.get_tokens())
+
+    best = float("inf")
+    for _ in range(REPEATS):
+        view = tokens.view()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            Parser(view).parse()
+        best = min(best, time.perf_counter() - start)
+    return token_count, best
+
+
+if __name__ == "__main__":
+    print(f"{'copies':>8} {'tokens':>10} {'seconds':>10} {'ns/token':>10}")
+    for copies in SIZES:
+        token_count, elapsed = time_parse(copies)
+        print(f"{copies:>8} {token_count:>10} {elapsed:>10.4f} {elapsed / token_count * 1e9:>10.1f}")
@@ -0,0 +1,35 @@
+# Measures the parser's time per token on generated programs of every shape.
+# Run from the project root: python -m benchmarks.parser_dispatch
+import time
+
+from benchmarks.program_generator import SHAPES, generate_program
+from lexer import Lexer
+from syntax import Parser
+
+PROGRAM_SIZE = 256 * 1024
+REPEATS = 5
+
+
+if __name__ == "__main__":
+    total_tokens = 0
+    total_seconds = 0.0
+    for shape in SHAPES:
+        lexer = Lexer(f"{shape}.rook", generate_program(shape, PROGRAM_SIZE))
+        lexer.start_parse()
+        token_count = len(lexer.get_tokens().get_tokens())
+
+        best = float("inf")
+        for _ in range(REPEATS):
+            parser = Parser(lexer.get_tokens())
+            start = time.perf_counter()
+            diagnostics = parser.parse()
+            best = min(best, time.perf_counter() - start)
+        if diagnostics:
+            raise AssertionError(f"Generated {shape} program does not parse:\n{diagnostics[0]}")
+
+        total_tokens += token_count
+        total_seconds += best
+        print(f"{shape:<18}{token_count:>8} tokens {best * 1000:>9.1f} ms {best * 1e9 / token_count:>8.0f} ns/token")
+    print(
+        f"{'all':<18}{total_tokens:>8} tokens {total_seconds * 1000:>9.1f} ms {total_seconds * 1e9 / total_tokens:>8.0f} ns/token"
+    )
@@ -0,0 +1,97 @@
+# Generates print-heavy Rookie programs and reports how long the virtual machine takes to run them
+# when every print is written straight to an unbuffered file, to a line-buffered one as on a
+# terminal, and through the output buffer of runtime_io.py with each flush policy and in capture
+# mode. Every run must write the same output.
+# Run from the project root: python -m benchmarks.print_output [--lines N]
+import argparse
+import io
+import os
+import tempfile
+import time
+
+from benchmarks.which_dispatch import parse
+from compiler import compile_program
+from runtime_io import FLUSH_POLICIES, OutputBuffer, input_from
+from vm import run_program
+
+REPEATS = 3
+
+
+# one number per line
+def numbers_source(lines: int):
+    return f"for i in [1 to {lines}]:\n    print(i)\n"
+
+
+# several values per line joined by a separator
+def records_source(lines: int):
+    return "\n".join(
+        [
+            f"for i in [1 to {lines}]:",
+            '    print(i, "name", i * 0.5, i % 7 == 0, separator=", ")',
+        ]
+    )
+
+
+# a number read with input() before every few hundred lines
+def prompts_source(lines: int):
+    return "\n".join(
+        [
+            f"for round in [1 to {lines // 500}]:",
+            '    n = input("next: ")',
+            "    for i in [1 to 500]:",
+            "        print(n + i)",
+        ]
+    )
+
+
+# a text stream over a file, writing through to it on every write or at the end of every line
+def file_stream(path: str, mode: str):
+    if mode == "unbuffered":
+        return io.TextIOWrapper(open(path, "wb", buffering=0), write_through=True)
+    return io.TextIOWrapper(open(path, "wb"), line_buffering=True)
+
+
+# the best time of running the program with its output going to a new stream, and that output
+def best_run(program, stdin: str, path: str, mode: str, policy: str | None = None):
+    best = float("inf")
+    for _ in range(REPEATS):
+        stream = None if mode == "capture" else file_stream(path, mode)
+        output = OutputBuffer(stream, policy or "exit") if policy or mode == "capture" else stream
+        start = time.perf_counter()
+        run_program(program, output, input_from(stdin))
+        if isinstance(output, OutputBuffer):
+            output.close()
+        best = min(best, time.perf_counter() - start)
+        if stream is not None:
+            stream.close()
+    if mode == "capture":
+        return best, output.getvalue()
+    with open(path) as file:
+        return best, file.read()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Times print-heavy programs with each way of writing output.")
+    arg_parser.add_argument("--lines", type=int, default=200000, help="lines each program prints")
+    args = arg_parser.parse_args()
+
+    stdin = "".join(f"{round}\n" for round in range(args.lines // 500))
+    sinks = [("unbuffered", "unbuffered", None), ("line-buffered", "line", None)]
+    sinks += [(f"buffer, {policy}", "unbuffered", policy) for policy in FLUSH_POLICIES]
+    sinks.append(("capture", "capture", None))
+    print(f"{'program':<12}{'output':<20}{'time':>12}{'lines/s':>14}{'speedup':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "output.txt")
+        for name, generate in [("numbers", numbers_source), ("records", records_source), ("prompts", prompts_source)]:
+            program = compile_program(parse(generate(args.lines)))
+            baseline = expected = None
+            for label, mode, policy in sinks:
+                elapsed, output = best_run(program, stdin, path, mode, policy)
+                if expected is None:
+                    baseline, expected = elapsed, output
+                elif output != expected:
+                    raise AssertionError(f"{name} wrote different output through {label}")
+                print(
+                    f"{name:<12}{label:<20}{elapsed * 1000:>9.1f} ms{args.lines / elapsed:>14,.0f}"
+                    f"{baseline / elapsed:>9.2f}x"
+                )
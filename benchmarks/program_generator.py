@@ -0,0 +1,222 @@
+# Generates valid Rookie programs of a given size and shape for the benchmarks.
+# Only constructs the parser accepts are produced, so a generated program always
+# parses without errors. Only the first statement of the first block of a
+# compound statement can be compound again, so the size grows linearly with depth.
+# Run from the project root to print a program of about 4 KiB:
+# python -m benchmarks.program_generator --shape mixed --size 4096
+import argparse
+import random
+
+import constants
+
+# the knobs of every shape, see ProgramGenerator
+SHAPES = {
+    "mixed": {},
+    "deep_nesting": {"max_depth": 40, "nesting_chance": 1.0},
+    "long_expressions": {"expression_terms": 200},
+    "huge_arrays": {"array_size": 2000},
+    "many_arms": {"which_arms": 300, "nesting_chance": 0.5, "compound": "which"},
+    "long_lines": {"expression_terms": 60, "call_arguments": 40, "identifier_length": 24},
+}
+
+COMPOUND_STATEMENTS = ["if", "while", "for", "define", "which"]
+REL_OPS = ["<", ">", "==", "!=", ">=", "<="]
+ARITH_OPS = ["+", "-", "*", "/", "%"]
+ASSIGN_OPS = ["+=", "-=", "*=", "/="]
+RESERVED = set(constants.KEYWORDS + constants.BOOLEAN_LITERAL + constants.BUILT_IN_FUNCTIONS) | set(
+    constants.LOGICAL_OPERATORS
+)
+
+
+class ProgramGenerator:
+    def __init__(
+        self,
+        seed: int = 0,
+        max_depth: int = 4,
+        block_statements: int = 3,
+        nesting_chance: float = 0.3,
+        expression_terms: int = 6,
+        array_size: int = 8,
+        which_arms: int = 4,
+        call_arguments: int = 3,
+        identifier_length: int = 6,
+        compound: str | None = None,
+    ):
+        self._random = random.Random(seed)
+        self.max_depth = max_depth
+        self.block_statements = block_statements
+        self.nesting_chance = nesting_chance
+        self.expression_terms = expression_terms
+        self.array_size = array_size
+        self.which_arms = which_arms
+        self.call_arguments = call_arguments
+        self.identifier_length = identifier_length
+        # the only compound statement generated, any of COMPOUND_STATEMENTS when None
+        self.compound = compound
+        self._lines = []
+        self._size = 0
+
+    # top-level statements are added until the program has at least size characters
+    def generate(self, size: int):
+        self._lines = []
+        self._size = 0
+        while self._size < size:
+            self.statement(0)
+        return "\n".join(self._lines) + "\n"
+
+    def emit(self, depth: int, text: str):
+        line = " " * (constants.INDENT_SIZE * depth) + text
+        self._lines.append(line)
+        self._size += len(line) + 1
+
+    # ---- Values and expressions ----
+
+    def identifier(self):
+        length = self._random.randint(1, self.identifier_length)
+        name = self._random.choice(constants.ALPHABET[26:]) + "".join(
+            self._random.choice("abcdefghijklmnopqrstuvwxyz0123456789_") for _ in range(length - 1)
+        )
+        # an identifier cannot end with an underscore or be a reserved word
+        name = name.rstrip("_") or "v"
+        return name + "v" if name in RESERVED else name
+
+    def number(self):
+        if self._random.random() < 0.2:
+            return f"{self._random.randint(0, 999)}.{self._random.randint(0, 99)}"
+        return str(self._random.randint(0, 9999))
+
+    def string(self):
+        words = ["hello", "world", "rookie", "value:", "x + y", "(a, b)", "[1 to 3]", "#1!"]
+        return '"' + " ".join(self._random.choices(words, k=self._random.randint(0, 3))) + '"'
+
+    def value(self, depth: int = 0):
+        choice = self._random.random()
+        if choice < 0.45:
+            return self.identifier()
+        if choice < 0.75:
+            return self.number()
+        if choice < 0.85:
+            return self.string()
+        if choice < 0.9:
+            return self._random.choice(constants.BOOLEAN_LITERAL)
+        if choice < 0.95 and depth < 3:
+            return "(" + self.expression(max(2, self.expression_terms // 4), depth + 1) + ")"
+        return self.array(min(self.array_size, 4), depth + 1)
+
+    def arith(self, terms: int, depth: int):
+        parts = [self.value(depth)]
+        for _ in range(terms - 1):
+            parts.append(self._random.choice(ARITH_OPS))
+            parts.append(self.value(depth))
+        return " ".join(parts)
+
+    def comparison(self, terms: int, depth: int):
+        if terms < 2 or self._random.random() < 0.5:
+            return self.arith(terms, depth)
+        left = self._random.randint(1, terms - 1)
+        operator = self._random.choice(REL_OPS + ["in"])
+        return f"{self.arith(left, depth)} {operator} {self.arith(terms - left, depth)}"
+
+    # the parser accepts a single 'and' and no 'or', see Parser.and_test and Parser.expression
+    def expression(self, terms: int | None = None, depth: int = 0):
+        terms = terms or self._random.randint(1, self.expression_terms)
+        test = "not " if self._random.random() < 0.2 else ""
+        if terms > 1 and self._random.random() < 0.3:
+            left = self._random.randint(1, terms - 1)
+            return test + self.comparison(left, depth) + " and " + self.comparison(terms - left, depth)
+        return test + self.comparison(terms, depth)
+
+    def array(self, size: int | None = None, depth: int = 0):
+        size = self.array_size if size is None else size
+        if self._random.random() < 0.2:
+            start = self._random.randint(0, 10)
+            step = f" step: {self._random.randint(1, 5)}" if self._random.random() < 0.5 else ""
+            return f"[{start} to {start + size}{step}]"
+        return "[" + ", ".join(self.expression(1, depth) for _ in range(size)) + "]"
+
+    def arguments(self, count: int):
+        return ", ".join(self.expression(self._random.randint(1, 3)) for _ in range(count))
+
+    # ---- Statements ----
+
+    def simple_statement(self, depth: int):
+        choice = self._random.random()
+        if choice < 0.25:
+            values = ", ".join(self.expression() for _ in range(self._random.randint(1, 3)))
+            self.emit(depth, f"{self.identifier()} = {values}")
+        elif choice < 0.35:
+            prompt = self.string() if self._random.random() < 0.5 else ""
+            self.emit(depth, f"{self.identifier()} = input({prompt})")
+        elif choice < 0.5:
+            self.emit(depth, f"{self.identifier()} {self._random.choice(ASSIGN_OPS)} {self.expression()}")
+        elif choice < 0.6:
+            self.emit(depth, f"{self.identifier()} = {self.array()}")
+        elif choice < 0.85:
+            arguments = [self.arguments(self._random.randint(0, self.call_arguments))]
+            if self._random.random() < 0.2:
+                arguments.append('separator = ", "')
+            self.emit(depth, f"print({', '.join(argument for argument in arguments if argument)})")
+        else:
+            self.emit(depth, f"{self.identifier()}({self.arguments(self._random.randint(0, self.call_arguments))})")
+
+    def block(self, depth: int, nest: bool = False):
+        for index in range(self._random.randint(1, self.block_statements)):
+            self.statement(depth, nest and index == 0)
+
+    def statement(self, depth: int, nest: bool = True):
+        if not nest or depth >= self.max_depth or self._random.random() >= self.nesting_chance:
+            self.simple_statement(depth)
+            return
+
+        choice = self.compound or self._random.choice(COMPOUND_STATEMENTS)
+        if choice == "if":
+            self.emit(depth, f"if {self.expression()}:")
+            self.block(depth + 1, True)
+            for _ in range(self._random.randint(0, 2)):
+                self.emit(depth, f"elif {self.expression()}:")
+                self.block(depth + 1)
+            if self._random.random() < 0.5:
+                self.emit(depth, "else:")
+                self.block(depth + 1)
+        elif choice == "while":
+            self.emit(depth, f"while {self.expression()}:")
+            self.block(depth + 1, True)
+        elif choice == "for":
+            names = self.identifier() + (f", {self.identifier()}" if self._random.random() < 0.3 else "")
+            iterable = self.identifier() if self._random.random() < 0.5 else self.array()
+            self.emit(depth, f"for {names} in {iterable}:")
+            self.block(depth + 1, True)
+        elif choice == "define":
+            params = []
+            for _ in range(self._random.randint(0, self.call_arguments)):
+                default = f" = {self.expression(2)}" if self._random.random() < 0.3 else ""
+                params.append(self.identifier() + default)
+            self.emit(depth, f"define {self.identifier()}({', '.join(params)}):")
+            self.block(depth + 1, True)
+        else:
+            self.which_statement(depth)
+
+    def which_statement(self, depth: int):
+        self.emit(depth, f"which {self.identifier()}:")
+        for index in range(self._random.randint(1, self.which_arms)):
+            operator = self._random.choice(REL_OPS + ["", ""])
+            label = self.string() if self._random.random() < 0.3 else str(self._random.randint(0, 9999))
+            self.emit(depth + 1, f"instance {operator + ' ' if operator else ''}{label}:")
+            self.block(depth + 2, index == 0)
+        if self._random.random() < 0.5:
+            self.emit(depth + 1, "default:")
+            self.block(depth + 2)
+
+
+# a program of the given shape with at least size characters, see SHAPES
+def generate_program(shape: str = "mixed", size: int = 64 * 1024, seed: int = 0):
+    return ProgramGenerator(seed, **SHAPES[shape]).generate(size)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Prints a generated Rookie program.")
+    arg_parser.add_argument("--shape", choices=SHAPES, default="mixed")
+    arg_parser.add_argument("--size", type=int, default=64 * 1024, help="minimum number of characters")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+    print(generate_program(args.shape, args.size, args.seed), end="")
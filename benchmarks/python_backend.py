@@ -0,0 +1,68 @@
+# Runs the CPU-bound Rookie programs in benchmarks/programs with the tree-walking interpreter, the
+# virtual machine and the code transpiled to Python, checks that all three print the same output,
+# and reports the time of each. The second table compares the start-up cost of the Python backend:
+# lexing, parsing, transpiling and compiling a script against loading its code from the code cache.
+# Run from the project root: python -m benchmarks.python_backend
+import glob
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.execution import PROGRAMS_DIRECTORY, TreeWalker, best_time, parse
+from compiler import compile_program
+from python_backend import CodeCache, compile_python, run_python
+from vm import run_program
+
+LOADS = 20
+
+
+# the best time of calling load()
+def best_load_time(load):
+    best = float("inf")
+    for _ in range(LOADS):
+        start = time.perf_counter()
+        load()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    # the tree-walker recurses once per nested call and expression
+    sys.setrecursionlimit(100000)
+    paths = sorted(glob.glob(os.path.join(PROGRAMS_DIRECTORY, "*.rook")))
+    print(f"{'program':<18}{'tree-walker':>14}{'vm':>12}{'python':>12}{'vs walker':>11}{'vs vm':>9}")
+    totals = [0.0, 0.0, 0.0]
+    for path in paths:
+        arena = parse(path)
+        walked, expected = best_time(lambda output: TreeWalker(arena, output).run())
+        program = compile_program(arena)
+        executed, vm_output = best_time(lambda output: run_program(program, output))
+        module = compile_python(arena)
+        transpiled, python_output = best_time(lambda output: run_python(module, output))
+        for name, output in [("virtual machine", vm_output), ("Python backend", python_output)]:
+            if output != expected:
+                raise AssertionError(f"The {name} printed\n{output}\nbut the tree-walker printed\n{expected}")
+        totals = [totals[0] + walked, totals[1] + executed, totals[2] + transpiled]
+        name = os.path.basename(path).split(".")[0]
+        print(
+            f"{name:<18}{walked * 1000:>11.1f} ms{executed * 1000:>9.1f} ms{transpiled * 1000:>9.1f} ms"
+            f"{walked / transpiled:>10.2f}x{executed / transpiled:>8.2f}x"
+        )
+    print(
+        f"{'all':<18}{totals[0] * 1000:>11.1f} ms{totals[1] * 1000:>9.1f} ms{totals[2] * 1000:>9.1f} ms"
+        f"{totals[0] / totals[2]:>10.2f}x{totals[1] / totals[2]:>8.2f}x"
+    )
+
+    print()
+    print(f"{'program':<18}{'front end':>12}{'cache load':>13}{'speedup':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        cache = CodeCache(directory)
+        for path in paths:
+            with open(path, "rb") as file:
+                source = file.read()
+            cache.store(source, compile_python(parse(path)))
+            compiled = best_load_time(lambda: compile_python(parse(path)))
+            loaded = best_load_time(lambda: cache.load(source))
+            name = os.path.basename(path).split(".")[0]
+            print(f"{name:<18}{compiled * 1000:>9.2f} ms{loaded * 1000:>10.3f} ms{compiled / loaded:>9.1f}x")
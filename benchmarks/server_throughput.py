@@ -0,0 +1,131 @@
+# Runs a batch of small beginner-style scripts through the worker pool of server.py with 1, 2 and 4
+# workers and reports the runs per second, against starting a new interpreter with main.py for
+# every run. Every batch also holds a runaway 'while' loop, which must time out without holding up
+# the other runs. Every run must print what the script prints when run in this process.
+# Run from the project root: python -m benchmarks.server_throughput [--workers N ...] [--runs N]
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from server import WorkerPool, run_source
+
+SCRIPTS = [
+    (
+        "\n".join(
+            [
+                'limit = input("limit: ")',
+                "count = 0",
+                "n = 2",
+                "while n <= limit:",
+                "    prime = true",
+                "    d = 2",
+                "    while d * d <= n and prime:",
+                "        if n % d == 0:",
+                "            prime = false",
+                "        d += 1",
+                "    if prime:",
+                "        count += 1",
+                "    n += 1",
+                "print(count)",
+            ]
+        ),
+        "2000\n",
+    ),
+    (
+        "\n".join(
+            [
+                "define fib(n):",
+                "    a = 0",
+                "    b = 1",
+                "    i = 0",
+                "    while i < n:",
+                "        c = a + b",
+                "        a = b",
+                "        b = c",
+                "        i += 1",
+                "    print(a)",
+                "for n in [1 to 60]:",
+                "    fib(n)",
+            ]
+        ),
+        "",
+    ),
+    (
+        "\n".join(
+            [
+                'name = input("name: ")',
+                'line = ""',
+                "for i in [1 to 200]:",
+                "    r = i % 3",
+                "    which r:",
+                "        instance 0:",
+                '            line += "a"',
+                "        default:",
+                "            line += name",
+                "print(line)",
+            ]
+        ),
+        "rook\n",
+    ),
+]
+RUNAWAY = "i = 0\nwhile true:\n    i += 1\n"
+TIMEOUT = 1.0
+COLD_RUNS = 10
+
+
+# runs every (source, stdin) through the pool from twice as many threads as it has workers; returns the
+# seconds it took and the results in order
+def run_batch(pool: WorkerPool, jobs: list):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(pool.workers * 2) as executor:
+        results = list(executor.map(lambda job: pool.run(*job), jobs))
+    return time.perf_counter() - start, results
+
+
+# the seconds a new interpreter takes to lex, parse and run each script with main.py
+def cold_time(jobs: list):
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for index, (source, _) in enumerate(SCRIPTS):
+            paths.append(os.path.join(directory, f"script{index}.rook"))
+            with open(paths[-1], "w") as file:
+                file.write(source)
+        start = time.perf_counter()
+        for index in range(len(jobs)):
+            source_index = index % len(SCRIPTS)
+            subprocess.run(
+                [sys.executable, "main.py", paths[source_index], "--run", "--no-table"],
+                input=SCRIPTS[source_index][1],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Times running many scripts through the worker pool.")
+    arg_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="pool sizes to time")
+    arg_parser.add_argument("--runs", type=int, default=300, help="scripts run per pool size")
+    args = arg_parser.parse_args()
+
+    jobs = [SCRIPTS[index % len(SCRIPTS)] for index in range(args.runs)]
+    expected = [run_source(source, stdin).stdout for source, stdin in SCRIPTS]
+    print(f"{os.cpu_count()} cores, {args.runs} runs with one runaway loop, timeout {TIMEOUT:g} s")
+    print(f"{'workers':<22}{'time':>12}{'runs/s':>10}{'runaway':>12}")
+    cold = cold_time(jobs[:COLD_RUNS])
+    print(f"{'new process per run':<22}{cold * 1000:>9.1f} ms{COLD_RUNS / cold:>10.1f}{'':>12}")
+    for workers in args.workers:
+        with WorkerPool(workers, TIMEOUT) as pool:
+            # every worker runs once so the first runs are not slower
+            run_batch(pool, SCRIPTS * workers)
+            elapsed, results = run_batch(pool, [(RUNAWAY, "")] + jobs)
+        runaway, results = results[0], results[1:]
+        for index, result in enumerate(results):
+            if result.status != "ok" or result.stdout != expected[index % len(SCRIPTS)]:
+                raise AssertionError(f"Run {index} ended with {result.status}: {result.diagnostics}")
+        print(f"{workers:<22}{elapsed * 1000:>9.1f} ms{args.runs / elapsed:>10.1f}{runaway.status:>12}")
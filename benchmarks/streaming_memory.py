@@ -0,0 +1,55 @@
+# Compares the peak memory of checking a script with the eager lexer and with
+# the streaming lexer, for growing replications of file2.rook.
+# Run from the project root: python -m benchmarks.streaming_memory
+import contextlib
+import gc
+import io
+import os
+import tempfile
+import tracemalloc
+
+from lexer import Lexer
+from stream_lexer import StreamingLexer
+from syntax import Parser
+from token_stream import LazyTokenStream
+
+SAMPLE_PATH = os.path.join("rookie-scripts", "file2.rook")
+SIZES = [1000, 4000, 16000]
+
+
+def check_eager(path: str):
+    lexer = Lexer(path)
+    lexer.start_parse()
+    Parser(lexer.get_tokens()).parse()
+
+
+def check_streaming(path: str):
+    lexer = StreamingLexer(path)
+    Parser(LazyTokenStream(lexer.tokens())).parse()
+
+
+def peak_memory(check, path: str):
+    gc.collect()
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        check(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+if __name__ == "__main__":
+    with open(SAMPLE_PATH, "r") as file:
+        sample = file.read().rstrip("\n") + "\n"
+
+    print(f"{'copies':>8} {'source KiB':>12} {'eager KiB':>12} {'streaming KiB':>14}")
+    with tempfile.TemporaryDirectory() as directory:
+        for copies in SIZES:
+            path = os.path.join(directory, f"bench{copies}.rook")
+            with open(path, "w") as file:
+                file.write(sample * copies)
+
+            eager = peak_memory(check_eager, path)
+            streaming = peak_memory(check_streaming, path)
+            size = os.path.getsize(path)
+            print(f"{copies:>8} {size / 1024:>12.1f} {eager / 1024:>12.1f} {streaming / 1024:>14.1f}")
@@ -0,0 +1,164 @@
+# Runs the lexer and parser on generated programs of every shape and reports the
+# wall time of each phase, tokens/sec, lines/sec and peak memory. Results can be
+# saved as a JSON baseline, and a later run fails when a phase got slower than the
+# baseline by more than the threshold.
+# Run from the project root: python -m benchmarks.suite [--save FILE | --baseline FILE]
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.program_generator import SHAPES, generate_program
+from lexer import Lexer
+from syntax import Parser
+
+# characters of every generated program at scale 1
+PROGRAM_SIZE = 256 * 1024
+PHASES = ["load", "start_parse", "get_tokens", "output_table", "parse"]
+# phases faster than this are too noisy to compare against the baseline
+MIN_COMPARED_SECONDS = 0.005
+BASELINE_VERSION = 1
+
+
+# runs every phase once, returns the seconds of each phase, the token count and the diagnostics
+def run_phases(path: str):
+    times = {}
+    start = time.perf_counter()
+    lexer = Lexer(path)
+    times["load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lexer.start_parse()
+    times["start_parse"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tokens = lexer.get_tokens()
+    times["get_tokens"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lexer.output_table(output_path=os.path.join(os.path.dirname(path), "tokens.rtable"))
+    times["output_table"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    diagnostics = Parser(tokens).parse()
+    times["parse"] = time.perf_counter() - start
+    return times, len(tokens.get_tokens()), diagnostics
+
+
+def peak_memory(path: str):
+    tracemalloc.start()
+    try:
+        run_phases(path)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_shape(shape: str, scale: float, repeats: int, seed: int):
+    code = generate_program(shape, round(PROGRAM_SIZE * scale), seed)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f"{shape}.rook")
+        with open(path, "w") as file:
+            file.write(code)
+
+        best = dict.fromkeys(PHASES, float("inf"))
+        for _ in range(repeats):
+            times, token_count, diagnostics = run_phases(path)
+            if diagnostics:
+                raise AssertionError(f"Generated {shape} program does not parse:\n{diagnostics[0]}")
+            best = {phase: min(best[phase], times[phase]) for phase in PHASES}
+        memory = peak_memory(path)
+
+    line_count = code.count("\n")
+    lex_seconds = best["load"] + best["start_parse"]
+    return {
+        "tokens": token_count,
+        "lines": line_count,
+        "bytes": len(code),
+        "phases": best,
+        "total": sum(best.values()),
+        "lex_tokens_per_second": token_count / lex_seconds,
+        "lex_lines_per_second": line_count / lex_seconds,
+        "parse_tokens_per_second": token_count / best["parse"],
+        "peak_memory": memory,
+    }
+
+
+# the phases (and peak memory) that are slower than the baseline by more than threshold
+def find_regressions(results: dict, baseline: dict, threshold: float):
+    regressions = []
+    for shape, result in results.items():
+        previous = baseline["results"].get(shape)
+        if previous is None:
+            continue
+
+        for phase in PHASES:
+            before, after = previous["phases"][phase], result["phases"][phase]
+            if max(before, after) >= MIN_COMPARED_SECONDS and after > before * (1 + threshold):
+                regressions.append(f"{shape} {phase}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms")
+
+        before, after = previous["peak_memory"], result["peak_memory"]
+        if after > before * (1 + threshold):
+            regressions.append(f"{shape} peak memory: {before / 1024:.0f} KiB -> {after / 1024:.0f} KiB")
+    return regressions
+
+
+def print_results(results: dict):
+    header = f"{'shape':<18}{'tokens':>9}{'lines':>8}" + "".join(f"{phase:>14}" for phase in PHASES)
+    print(header + f"{'tokens/s':>12}{'lines/s':>10}{'peak KiB':>10}")
+    for shape, result in results.items():
+        phases = "".join(f"{result['phases'][phase] * 1000:>11.1f} ms" for phase in PHASES)
+        print(
+            f"{shape:<18}{result['tokens']:>9}{result['lines']:>8}{phases}"
+            f"{result['lex_tokens_per_second']:>12.0f}{result['lex_lines_per_second']:>10.0f}"
+            f"{result['peak_memory'] / 1024:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmarks the lexer and parser on generated programs.")
+    arg_parser.add_argument("--shapes", nargs="+", choices=SHAPES, default=list(SHAPES), help="program shapes to run")
+    arg_parser.add_argument("--scale", type=float, default=1.0, help="multiplies the size of every program")
+    arg_parser.add_argument("--repeats", type=int, default=3, help="runs per shape, the best time is kept")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--save", metavar="FILE", help="write the results as a JSON baseline")
+    arg_parser.add_argument("--baseline", metavar="FILE", help="compare against a JSON baseline")
+    arg_parser.add_argument(
+        "--threshold", type=float, default=0.25, help="allowed slowdown against the baseline, 0.25 is 25%%"
+    )
+    args = arg_parser.parse_args()
+
+    results = {shape: benchmark_shape(shape, args.scale, args.repeats, args.seed) for shape in args.shapes}
+    print_results(results)
+
+    if args.save:
+        report = {
+            "version": BASELINE_VERSION,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "scale": args.scale,
+            "seed": args.seed,
+            "results": results,
+        }
+        with open(args.save, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)
+        recorded = (baseline.get("version"), baseline.get("scale"), baseline.get("seed"))
+        if recorded != (BASELINE_VERSION, args.scale, args.seed):
+            print("Baseline was recorded with a different version, scale or seed", file=sys.stderr)
+            sys.exit(2)
+
+        regressions = find_regressions(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regressions over {args.threshold:.0%}:")
+            for regression in regressions:
+                print("  " + regression)
+            sys.exit(1)
+        print(f"\nNo regressions over {args.threshold:.0%}")
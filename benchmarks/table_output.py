@@ -0,0 +1,57 @@
+# Compares writing the token table of a large script with PrettyTable against
+# the table_writer formats. The .rtable output is checked to be identical.
+# Needs prettytable, which the compiler itself no longer uses (pip install -r requirements-bench.txt).
+# Run from the project root: python -m benchmarks.table_output
+import os
+import tempfile
+import time
+
+from prettytable import PrettyTable
+
+import table_writer
+from lexer import Lexer
+
+SAMPLE_PATH = os.path.join("rookie-scripts", "file2.rook")
+COPIES = 5000
+REPEATS = 3
+
+
+def write_prettytable(tokens, output_path: str):
+    table = PrettyTable(table_writer.HEADERS)
+    for name, lexeme, _, column_no, _ in tokens.rows():
+        table.add_row([name, lexeme, column_no])
+    with open(output_path, "w", encoding="utf-8") as file:
+        file.write(table.get_string())
+
+
+def best_time(function):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    with open(SAMPLE_PATH, "r") as file:
+        sample = file.read().rstrip("\n") + "\n"
+
+    lexer = Lexer(SAMPLE_PATH, sample * COPIES)
+    lexer.start_parse()
+    tokens = lexer.get_tokens().get_tokens()
+
+    with tempfile.TemporaryDirectory() as directory:
+        reference_path = os.path.join(directory, "reference.rtable")
+        elapsed = best_time(lambda: write_prettytable(tokens, reference_path))
+        print(f"{len(tokens)} tokens")
+        print(f"prettytable:  {elapsed * 1000:>10.1f} ms, {os.path.getsize(reference_path) / 1024:>10.1f} KiB")
+
+        for table_format, extension in table_writer.FORMATS.items():
+            path = os.path.join(directory, "output" + extension)
+            elapsed = best_time(lambda: table_writer.write_table(tokens, path, table_format))
+            print(f"{table_format + ':':<13} {elapsed * 1000:>10.1f} ms, {os.path.getsize(path) / 1024:>10.1f} KiB")
+
+        with open(reference_path, "rb") as reference, open(os.path.join(directory, "output.rtable"), "rb") as output:
+            if reference.read() != output.read():
+                raise AssertionError("table_writer output differs from PrettyTable")
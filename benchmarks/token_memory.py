@@ -0,0 +1,71 @@
+# Compares the memory held by the token representation before and after
+# the struct-of-arrays TokenBuffer, on file1.rook replicated to about 1 MB.
+# Run from the project root: python -m benchmarks.token_memory
+import gc
+import os
+import tempfile
+import tracemalloc
+
+from lexer import Lexer
+
+SAMPLE_PATH = os.path.join("rookie-scripts", "file1.rook")
+TARGET_SIZE = 1024 * 1024
+
+
+# the Token class as it was before the buffer, with a __dict__ and its own line copy
+class LegacyToken:
+    def __init__(self, name: str, lexeme: str, line_no: int, line_code="", column_no=0, indent_level=0) -> None:
+        self.name = name
+        self.lexeme = lexeme
+        self.line_no = line_no
+        self.column_no = column_no
+        self.line_code = "  " + line_code.strip()
+        self.indent_level = indent_level
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak
+
+
+def build_legacy(lexer: Lexer):
+    lines = lexer._lines
+    code_lines = [lines.line(line_no) for line_no in range(1, len(lines) + 1)]
+    tokens = []
+    for token in lexer.get_tokens().get_tokens():
+        line_code = code_lines[token.line_no - 1] if token._lines is not None else ""
+        tokens.append(
+            LegacyToken(token.name, token.lexeme, token.line_no, line_code, token.column_no, token.indent_level)
+        )
+    return code_lines, tokens
+
+
+if __name__ == "__main__":
+    with open(SAMPLE_PATH, "r") as file:
+        sample = file.read().rstrip("\n") + "\n"
+    source = sample * (TARGET_SIZE // len(sample) + 1)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.rook")
+        with open(path, "w") as file:
+            file.write(source)
+
+        def build_current():
+            lexer = Lexer(path)
+            lexer.start_parse()
+            return lexer
+
+        lexer, current_size, current_peak = measure(build_current)
+        _, legacy_size, _ = measure(lambda: build_legacy(lexer))
+
+    token_count = len(lexer.get_tokens().get_tokens())
+    print(f"source size:   {len(source) / 1024:>10.1f} KiB")
+    print(f"tokens:        {token_count:>10}")
+    print(f"legacy tokens: {legacy_size / 1024:>10.1f} KiB ({legacy_size / token_count:.1f} B/token)")
+    print(f"token buffer:  {current_size / 1024:>10.1f} KiB ({current_size / token_count:.1f} B/token)")
+    print(f"lexing peak:   {current_peak / 1024:>10.1f} KiB")
+    print(f"reduction:     {legacy_size / current_size:>10.1f}x")
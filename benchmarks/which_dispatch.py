@@ -0,0 +1,75 @@
+# Generates loops over a 'which' with 10, 100 and 1000 arms and reports how long the virtual machine
+# takes to run them when the arms are compared with the value one by one and when they are compiled
+# to a jump table: a dict for the equality arms, sorted boundaries searched with bisect for the
+# relational ones. Both must print the same output.
+# Run from the project root: python -m benchmarks.which_dispatch [--arms N ...] [--iterations N]
+import argparse
+
+import compiler
+from benchmarks.execution import best_time
+from compiler import compile_program
+from lexer import Lexer
+from syntax import Parser
+from vm import run_program
+
+
+# a 'which' on i % arms matching every remainder with its own label
+def equality_source(arms: int, iterations: int):
+    lines = ["total = 0", f"for i in [0 to {iterations}]:", f"    r = i % {arms}", "    which r:"]
+    for label in range(arms):
+        lines += [f"        instance {label}:", f"            total += {label % 7}"]
+    lines += ["        default:", "            total -= 1", "print(total)"]
+    return "\n".join(lines) + "\n"
+
+
+# a 'which' on i % (10 * arms) with one '<' arm every ten values, overlapping an equality arm
+# that the earlier '<' arms shadow
+def relational_source(arms: int, iterations: int):
+    lines = ["total = 0", f"for i in [0 to {iterations}]:", f"    r = i % {10 * arms}", "    which r:"]
+    for label in range(arms - 1):
+        lines += [f"        instance < {10 * (label + 1)}:", f"            total += {label % 7}"]
+    lines += ["        instance 15:", "            total += 100"]
+    lines += ["        default:", "            total -= 1", "print(total)"]
+    return "\n".join(lines) + "\n"
+
+
+def parse(source: str):
+    lexer = Lexer("which.rook", source)
+    lexer.start_parse()
+    parser = Parser(lexer.get_tokens(), build_ast=True)
+    diagnostics = parser.parse()
+    if diagnostics:
+        raise AssertionError(f"The generated script does not parse:\n{diagnostics[0]}")
+    return parser.ast
+
+
+# the program with the arms compared one by one, and with the jump table
+def compile_both(source: str):
+    arena = parse(source)
+    table_arms = compiler.MIN_TABLE_ARMS
+    compiler.MIN_TABLE_ARMS = float("inf")
+    try:
+        linear = compile_program(arena)
+    finally:
+        compiler.MIN_TABLE_ARMS = table_arms
+    return linear, compile_program(arena)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Times 'which' statements with and without jump tables.")
+    arg_parser.add_argument("--arms", type=int, nargs="+", default=[10, 100, 1000], help="numbers of arms")
+    arg_parser.add_argument("--iterations", type=int, default=20000, help="times each 'which' runs")
+    args = arg_parser.parse_args()
+
+    print(f"{'which':<20}{'arms':>6}{'linear':>12}{'table':>12}{'speedup':>10}")
+    for kind, generate in [("equality", equality_source), ("relational", relational_source)]:
+        for arms in args.arms:
+            linear, table = compile_both(generate(arms, args.iterations))
+            linear_time, expected = best_time(lambda output: run_program(linear, output))
+            table_time, output = best_time(lambda output: run_program(table, output))
+            if output != expected:
+                raise AssertionError(f"The jump table printed {output!r} but the linear arms printed {expected!r}")
+            print(
+                f"{kind:<20}{arms:>6}{linear_time * 1000:>9.1f} ms{table_time * 1000:>9.1f} ms"
+                f"{linear_time / table_time:>9.2f}x"
+            )
@@ -0,0 +1,278 @@
+import operator
+from array import array
+from bisect import bisect_left
+from enum import IntEnum
+
+
+# the value of a variable that was not assigned yet, and of a parameter without a default
+class Undefined:
+    def __repr__(self):
+        return "UNDEFINED"
+
+    # compiled modules are pickled, the copy must be the same object
+    def __reduce__(self):
+        return "UNDEFINED"
+
+
+UNDEFINED = Undefined()
+
+
+# one instruction is an opcode in Code.ops and its argument in Code.args, the opcodes the
+# dispatch loop sees most often come first
+class Opcode(IntEnum):
+    # arg: local slot
+    LOAD_LOCAL = 0
+    # arg: constant index
+    LOAD_CONST = 1
+    # arg: global slot
+    LOAD_GLOBAL = 2
+    STORE_LOCAL = 3
+    STORE_GLOBAL = 4
+    # arg: target, pops the condition
+    JUMP_IF_FALSE = 5
+    JUMP = 6
+    # arg: target, pushes the next item of the iterator on top or pops it and jumps when exhausted
+    FOR_ITER = 7
+
+    # pop the right operand and replace the left one with the result, see BINARY_FUNCTIONS
+    ADD = 8
+    SUBTRACT = 9
+    MULTIPLY = 10
+    DIVIDE = 11
+    MODULO = 12
+    LESS = 13
+    GREATER = 14
+    EQUAL = 15
+    NOT_EQUAL = 16
+    GREATER_OR_EQUAL = 17
+    LESS_OR_EQUAL = 18
+    IN = 19
+    NOT_IN = 20
+
+    # a comparison fused with the JUMP_IF_FALSE after it, arg: target, see BINARY_FUNCTIONS
+    JUMP_UNLESS_LESS = 21
+    JUMP_UNLESS_GREATER = 22
+    JUMP_UNLESS_EQUAL = 23
+    JUMP_UNLESS_NOT_EQUAL = 24
+    JUMP_UNLESS_GREATER_OR_EQUAL = 25
+    JUMP_UNLESS_LESS_OR_EQUAL = 26
+
+    NOT = 27
+    # arg: target, 'and' and 'or' keep the left operand when it decides the result
+    JUMP_IF_FALSE_OR_POP = 28
+    JUMP_IF_TRUE_OR_POP = 29
+    # like FOR_ITER, pushes the item then its index
+    FOR_ITER_PAIR = 30
+    # replaces an array or string with an iterator over it
+    GET_ITER = 31
+    GET_PAIR_ITER = 32
+    # arg: number of elements
+    BUILD_ARRAY = 33
+    # arg: number of start elements, which are followed by the end and the step on the stack
+    BUILD_RANGE = 34
+    # arg: number of values, PRINT_SEPARATOR has the separator on top of them
+    PRINT = 35
+    PRINT_SEPARATOR = 36
+    # arg: 1 when the prompt is on the stack
+    INPUT = 37
+    # arg: constant index of the Code, pops one default per parameter
+    MAKE_FUNCTION = 38
+    # arg: number of arguments, which are on top of the function
+    CALL = 39
+    RETURN = 40
+    HALT = 41
+    # arg: number of start elements, 0 or 1, which are followed by the end and the step on the stack;
+    # pushes an iterator counting through the range of a for loop without building the array
+    GET_RANGE_ITER = 42
+    # arg: constant index of the module name, runs the module the first time it is imported
+    IMPORT = 43
+    # arg: constant index of the module name, copies every name the module defines to the globals
+    IMPORT_ALL = 44
+    # arg: constant index of (module name, name), pushes the value of a global of the module
+    LOAD_IMPORTED = 45
+    # arg: constant index of a JumpTable, pops the value of a 'which' and jumps to the arm it matches
+    WHICH_TABLE = 46
+    # arg: number of instructions, charged to the instruction budget of the run; only in code compiled
+    # with count_instructions, at the start of every code and before the jump back of every loop
+    CHARGE = 47
+    # replace the value on top with its negation, or with itself as a number for the '+' sign
+    NEGATE = 48
+    POSITIVE = 49
+    # arg: constant index of (depth, slot, name), pushes a local of the enclosing function at that depth
+    LOAD_OUTER = 50
+    # arg: constant index of (depth, slot, name), pops the value into a local of the enclosing function
+    STORE_OUTER = 51
+
+
+def membership(element, container):
+    return element in container
+
+
+def non_membership(element, container):
+    return element not in container
+
+
+# the operation of every binary opcode and of the fused comparison jumps
+BINARY_FUNCTIONS = {
+    Opcode.ADD: operator.add,
+    Opcode.SUBTRACT: operator.sub,
+    Opcode.MULTIPLY: operator.mul,
+    Opcode.DIVIDE: operator.truediv,
+    Opcode.MODULO: operator.mod,
+    Opcode.LESS: operator.lt,
+    Opcode.GREATER: operator.gt,
+    Opcode.EQUAL: operator.eq,
+    Opcode.NOT_EQUAL: operator.ne,
+    Opcode.GREATER_OR_EQUAL: operator.ge,
+    Opcode.LESS_OR_EQUAL: operator.le,
+    Opcode.IN: membership,
+    Opcode.NOT_IN: non_membership,
+}
+# the fused jump of each comparison opcode
+COMPARISON_JUMPS = {
+    Opcode.LESS: Opcode.JUMP_UNLESS_LESS,
+    Opcode.GREATER: Opcode.JUMP_UNLESS_GREATER,
+    Opcode.EQUAL: Opcode.JUMP_UNLESS_EQUAL,
+    Opcode.NOT_EQUAL: Opcode.JUMP_UNLESS_NOT_EQUAL,
+    Opcode.GREATER_OR_EQUAL: Opcode.JUMP_UNLESS_GREATER_OR_EQUAL,
+    Opcode.LESS_OR_EQUAL: Opcode.JUMP_UNLESS_LESS_OR_EQUAL,
+}
+BINARY_FUNCTIONS.update({jump: BINARY_FUNCTIONS[opcode] for opcode, jump in COMPARISON_JUMPS.items()})
+# how the operator of a binary opcode is written in Rookie, for error messages
+OPERATOR_SYMBOLS = {
+    Opcode.ADD: "+",
+    Opcode.SUBTRACT: "-",
+    Opcode.MULTIPLY: "*",
+    Opcode.DIVIDE: "/",
+    Opcode.MODULO: "%",
+    Opcode.LESS: "<",
+    Opcode.GREATER: ">",
+    Opcode.EQUAL: "==",
+    Opcode.NOT_EQUAL: "!=",
+    Opcode.GREATER_OR_EQUAL: ">=",
+    Opcode.LESS_OR_EQUAL: "<=",
+    Opcode.IN: "in",
+    Opcode.NOT_IN: "not in",
+}
+OPERATOR_SYMBOLS.update({jump: OPERATOR_SYMBOLS[opcode] for opcode, jump in COMPARISON_JUMPS.items()})
+# the same for the sign of a value
+UNARY_SYMBOLS = {Opcode.NEGATE: "-", Opcode.POSITIVE: "+"}
+
+
+# the arms of a 'which' as a jump table: the first equality arm of every label in a dict, and the
+# relational arms as sorted boundaries splitting the numbers or the strings into regions, each with
+# the first relational arm it matches; the earlier of the two is the first arm that matches
+class JumpTable:
+    def __init__(self, arms: list, lines: list):
+        # (comparison opcode, label) of every arm but the default, in order, and the line of each
+        self.arms = arms
+        self.lines = lines
+        # the target of every arm then of the default, set once their blocks are compiled
+        self.targets = [0] * (len(arms) + 1)
+        self.equal = {}
+        relational = []
+        for index, (opcode, label) in enumerate(arms):
+            if opcode == Opcode.EQUAL:
+                self.equal.setdefault(label, index)
+            else:
+                relational.append((index, opcode, label))
+        self.bounds = sorted({label for _, _, label in relational})
+        # the values the boundaries can be compared with, the others are matched arm by arm
+        self.value_types = (str,) if self.bounds and type(self.bounds[0]) is str else (int, float, bool)
+        # region 2i is between bounds[i - 1] and bounds[i], region 2i + 1 is bounds[i] itself
+        positions = {label: 2 * index + 1 for index, label in enumerate(self.bounds)}
+        self.regions = []
+        for region in range(2 * len(self.bounds) + 1):
+            first = len(arms)
+            for index, opcode, label in relational:
+                # how every value of the region compares with the label: -1, 0 or 1
+                sign = (region > positions[label]) - (region < positions[label])
+                if BINARY_FUNCTIONS[opcode](sign, 0):
+                    first = index
+                    break
+            self.regions.append(first)
+
+    # whether the relational arms can be put in a table: their labels are all numbers or all strings
+    @staticmethod
+    def supports(arms: list):
+        labels = [type(label) is str for opcode, label in arms if opcode != Opcode.EQUAL]
+        return all(labels) or not any(labels)
+
+    # the index of the first arm the value matches, len(arms) for the default, or None when the
+    # value cannot be compared with the boundaries and the arms have to be tried one by one
+    def arm(self, value):
+        try:
+            index = self.equal.get(value, len(self.arms))
+        except TypeError:
+            # arrays equal no label
+            if self.bounds:
+                return None
+            return len(self.arms)
+        if self.bounds:
+            if type(value) not in self.value_types or value != value:
+                return None
+            bounds = self.bounds
+            position = bisect_left(bounds, value)
+            if position < len(bounds) and bounds[position] == value:
+                region = self.regions[2 * position + 1]
+            else:
+                region = self.regions[2 * position]
+            if region < index:
+                index = region
+        return index
+
+
+# the compiled instructions of the program or of one function
+class Code:
+    def __init__(self, name: str, module: str = "", global_names: list | None = None):
+        self.name = name
+        # the module the code is part of, empty for the script that was run
+        self.module = module
+        # the names of the global slots, shared by every code of the module
+        self.global_names = global_names if global_names is not None else []
+        self.ops = array("B")
+        self.args = array("i")
+        # the source line of every instruction, for runtime errors
+        self.lines = array("i")
+        self.constants = []
+        # slots of the locals, the parameters come first
+        self.local_names = []
+        self.parameter_names = []
+
+    def __len__(self):
+        return len(self.ops)
+
+    # one line per instruction, for debugging
+    def disassemble(self):
+        lines = []
+        for index, (opcode, arg) in enumerate(zip(self.ops, self.args)):
+            lines.append(f"{self.lines[index]:>5} {index:>6} {Opcode(opcode).name:<28} {arg}")
+        return "\n".join(lines)
+
+
+# a function value, created when its 'define' statement runs
+class Function:
+    def __init__(self, code: Code, defaults: list, global_values: list | None = None, outer_values: tuple = ()):
+        self.code = code
+        # the default of every parameter, UNDEFINED for the ones without
+        self.defaults = defaults
+        # the globals of the module that defined the function
+        self.global_values = global_values
+        # the locals of the code that defined the function and of the codes enclosing it by depth, the
+        # top level's are empty, so a LOAD_OUTER reads outer_values[depth]; a function cannot outlive the
+        # call that defined it, it is never returned or stored in a global
+        self.outer_values = outer_values
+
+    def __repr__(self):
+        return f"<function {self.code.name}>"
+
+
+# the compiled program, the global slots are shared by the program and every function in it
+class Program:
+    def __init__(self, code: Code, global_names: list, imports: list | None = None, warnings: list | None = None):
+        self.code = code
+        self.global_names = global_names
+        # (module name, line) of every import statement
+        self.imports = imports if imports is not None else []
+        # the ScopeWarning of every variable or function the scope pass found missing
+        self.warnings = warnings if warnings is not None else []
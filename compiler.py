@@ -0,0 +1,481 @@
+from ast_arena import NO_TOKEN, AstArena, NodeKind, declaration_parts
+from bytecode import COMPARISON_JUMPS, UNDEFINED, Code, JumpTable, Opcode, Program
+from scopes import resolve_scopes
+from token_kinds import TokenKind
+
+# the opcode of every binary operator token, 'not' is the operator of 'not in'
+BINARY_OPCODES = {
+    TokenKind.PLUS: Opcode.ADD,
+    TokenKind.MINUS: Opcode.SUBTRACT,
+    TokenKind.MULTIPLY: Opcode.MULTIPLY,
+    TokenKind.DIVIDE: Opcode.DIVIDE,
+    TokenKind.MODULO: Opcode.MODULO,
+    TokenKind.LESS: Opcode.LESS,
+    TokenKind.GREATER: Opcode.GREATER,
+    TokenKind.EQUAL: Opcode.EQUAL,
+    TokenKind.NOTEQUAL: Opcode.NOT_EQUAL,
+    TokenKind.GREATEROREQUAL: Opcode.GREATER_OR_EQUAL,
+    TokenKind.LESSOREQUAL: Opcode.LESS_OR_EQUAL,
+    TokenKind.IN: Opcode.IN,
+    TokenKind.NOT: Opcode.NOT_IN,
+}
+ASSIGN_OPCODES = {
+    TokenKind.PLUSASSIGN: Opcode.ADD,
+    TokenKind.MINUSASSIGN: Opcode.SUBTRACT,
+    TokenKind.MULTIPLYASSIGN: Opcode.MULTIPLY,
+    TokenKind.DIVIDEASSIGN: Opcode.DIVIDE,
+}
+# the opcode of the sign of a value
+UNARY_OPCODES = {TokenKind.MINUS: Opcode.NEGATE, TokenKind.PLUS: Opcode.POSITIVE}
+# the jump after the left operand of 'and' and 'or'
+SHORT_CIRCUIT_OPCODES = {
+    TokenKind.AND: Opcode.JUMP_IF_FALSE_OR_POP,
+    TokenKind.OR: Opcode.JUMP_IF_TRUE_OR_POP,
+}
+LITERAL_TYPES = frozenset([int, float, str, bool])
+LITERAL_KINDS = frozenset([NodeKind.NUMBER, NodeKind.FLOAT, NodeKind.STRING, NodeKind.BOOLEAN])
+NUMBER_KINDS = frozenset([NodeKind.NUMBER, NodeKind.FLOAT])
+# a 'which' with fewer arms compares the value with each label in turn, which is faster than a table
+MIN_TABLE_ARMS = 4
+# the steps of compiling an expression node
+COMPILE_CHILDREN = 0
+EMIT = 1
+SHORT_CIRCUIT_JUMP = 2
+
+
+# an error of a script that parses but cannot be compiled
+class CompileError(Exception):
+    def __init__(self, message: str, line_no: int):
+        super().__init__(message)
+        self.message = message
+        self.line_no = line_no
+
+    def __str__(self):
+        return f"Error at line {self.line_no}: {self.message}"
+
+
+# the value of a literal token, strings keep their quotes in the lexeme
+def literal_value(kind: TokenKind, lexeme: str):
+    if kind == TokenKind.NUMBER:
+        return int(lexeme)
+    if kind == TokenKind.FLOAT:
+        # the lexer accepts more than one dot
+        if lexeme.count(".") != 1:
+            raise ValueError(f"Invalid number '{lexeme}'")
+        return float(lexeme)
+    if kind == TokenKind.STRING:
+        return lexeme[1:-1]
+    if kind == TokenKind.BOOLEAN_LITERAL:
+        return lexeme == "true"
+    raise Exception(f"Token kind {kind.name} is not a literal")
+
+
+# the step of a range node, 1 without 'step:'
+def range_step(arena: AstArena, node: int):
+    return 1 if arena.data(node) == NO_TOKEN else int(arena.lexeme(node, True))
+
+
+# a range with at most one start element, a for loop over it only needs to count
+def counting_range(arena: AstArena, node: int):
+    return arena.kind(node) == NodeKind.RANGE and arena.child_count(node) <= 2
+
+
+# the name tokens and the values of a declaration, every one of several names takes one value
+def declared_values(arena: AstArena, node: int):
+    names, values = declaration_parts(arena, node)
+    if len(names) > 1 and len(values) != len(names):
+        message = f"Expected {len(names)} values for {len(names)} names but got {len(values)}"
+        raise CompileError(message, arena.line_no(node))
+    return names, values
+
+
+# compiles the syntax tree of a script, built with Parser(tokens, build_ast=True), to bytecode;
+# every name is loaded from and stored to the slot the scope pass (scopes.py) resolved it to
+class Compiler:
+    def __init__(self, arena: AstArena, module: str = "", count_instructions: bool = False):
+        self.arena = arena
+        self.tokens = arena.tokens
+        self.module = module
+        self.scopes = resolve_scopes(arena, module)
+        self.global_names = self.scopes.globals.names
+        # (module name, line) of every import statement, the modules are compiled on their own
+        self.imports = []
+        self.code = None
+        # the nesting of the function being compiled, 0 at the top level
+        self._depth = 0
+        # charge every code and every loop iteration to the instruction budget of the run, see CHARGE
+        self.count_instructions = count_instructions
+        # {(type, value): index} of the constants of the code being compiled
+        self._constant_indexes = {}
+        self._line = 0
+
+    def compile(self):
+        self.code = Code("<program>", self.module, self.global_names)
+        self._line = 1
+        charge = self.charge()
+        try:
+            for statement in self.arena.children(self.arena.root):
+                self.statement(statement)
+        except ValueError as error:
+            raise CompileError(str(error), self._line) from None
+        self.emit(Opcode.HALT)
+        if charge is not None:
+            self.patch(charge)
+        return Program(self.code, self.global_names, self.imports, self.scopes.warnings)
+
+    # ---- Emitting ----
+
+    def emit(self, opcode: Opcode, arg: int = 0):
+        self.code.ops.append(opcode)
+        self.code.args.append(arg)
+        self.code.lines.append(self._line)
+        return len(self.code.ops) - 1
+
+    # the CHARGE at the start of the code being compiled, patched with its length once it is compiled;
+    # None without count_instructions
+    def charge(self):
+        return self.emit(Opcode.CHARGE) if self.count_instructions else None
+
+    # the jump back to the start of a loop, with count_instructions every iteration is charged the
+    # instructions of the loop first, at the line of the loop
+    def loop_back(self, start: int, line_no: int):
+        self._line = line_no
+        if self.count_instructions:
+            self.emit(Opcode.CHARGE, len(self.code.ops) + 2 - start)
+        self.emit(Opcode.JUMP, start)
+
+    # points the jump at index to the next instruction
+    def patch(self, index: int):
+        self.code.args[index] = len(self.code.ops)
+
+    def constant(self, value):
+        # 1, 1.0 and true are equal but different constants, the operands of LOAD_OUTER, STORE_OUTER and
+        # LOAD_IMPORTED are equal when their names and numbers are, the others are only equal to themselves
+        by_value = type(value) in LITERAL_TYPES or type(value) is tuple
+        key = (type(value), value) if by_value else (type(value), id(value))
+        if key not in self._constant_indexes:
+            self._constant_indexes[key] = len(self.code.constants)
+            self.code.constants.append(value)
+        return self._constant_indexes[key]
+
+    # loads the variable of an identifier token
+    def load(self, token: int):
+        depth, slot = self.scopes.resolve(token)
+        if depth and depth != self._depth:
+            self.emit(Opcode.LOAD_OUTER, self.constant((depth, slot, self.tokens.fields_at(token)[1])))
+        else:
+            self.emit(Opcode.LOAD_LOCAL if depth else Opcode.LOAD_GLOBAL, slot)
+
+    def store(self, token: int):
+        depth, slot = self.scopes.resolve(token)
+        if depth and depth != self._depth:
+            self.emit(Opcode.STORE_OUTER, self.constant((depth, slot, self.tokens.fields_at(token)[1])))
+        else:
+            self.emit(Opcode.STORE_LOCAL if depth else Opcode.STORE_GLOBAL, slot)
+
+    def token_kind(self, token: int):
+        return self.tokens.kind_at(token)
+
+    # ---- Expression ----
+
+    # compiles the expression with an explicit stack, as deep as the parser can nest it
+    def expression(self, root: int):
+        arena = self.arena
+        # the jumps of 'and' and 'or' waiting for their right operand to be compiled
+        jumps = {}
+        pending = [(root, COMPILE_CHILDREN)]
+        while pending:
+            node, step = pending.pop()
+            kind = arena.kind(node)
+            if kind in LITERAL_KINDS:
+                token = arena.token(node)
+                value = literal_value(self.token_kind(token), arena.lexeme(node))
+                self.emit(Opcode.LOAD_CONST, self.constant(value))
+            elif kind == NodeKind.NAME:
+                self.load(arena.token(node))
+            elif step == SHORT_CIRCUIT_JUMP:
+                jumps[node] = self.emit(SHORT_CIRCUIT_OPCODES[self.token_kind(arena.token(node))])
+            elif kind == NodeKind.UNARY and arena.kind(arena.child(node, 0)) in NUMBER_KINDS:
+                # a signed number is one constant
+                child = arena.child(node, 0)
+                value = literal_value(self.token_kind(arena.token(child)), arena.lexeme(child))
+                negative = self.token_kind(arena.token(node)) == TokenKind.MINUS
+                self.emit(Opcode.LOAD_CONST, self.constant(-value if negative else value))
+            elif step == EMIT:
+                if node in jumps:
+                    self.patch(jumps.pop(node))
+                else:
+                    self.emit_operation(node, kind)
+            else:
+                pending.append((node, EMIT))
+                children = arena.children(node)
+                if kind == NodeKind.BINARY and self.token_kind(arena.token(node)) in SHORT_CIRCUIT_OPCODES:
+                    pending += [(children[1], COMPILE_CHILDREN), (node, SHORT_CIRCUIT_JUMP)]
+                    pending.append((children[0], COMPILE_CHILDREN))
+                else:
+                    pending.extend((child, COMPILE_CHILDREN) for child in reversed(children))
+
+    # the instruction of an expression node after its children
+    def emit_operation(self, node: int, kind: NodeKind):
+        arena = self.arena
+        if kind == NodeKind.BINARY:
+            self.emit(BINARY_OPCODES[self.token_kind(arena.token(node))])
+        elif kind == NodeKind.NOT:
+            self.emit(Opcode.NOT)
+        elif kind == NodeKind.UNARY:
+            self.emit(UNARY_OPCODES[self.token_kind(arena.token(node))])
+        elif kind == NodeKind.ARRAY:
+            self.emit(Opcode.BUILD_ARRAY, arena.child_count(node))
+        elif kind == NodeKind.RANGE:
+            self.emit(Opcode.LOAD_CONST, self.constant(range_step(arena, node)))
+            # the last child is the end
+            self.emit(Opcode.BUILD_RANGE, arena.child_count(node) - 1)
+        else:
+            raise Exception(f"Cannot compile {kind.name} as an expression")
+
+    # compiles the condition and a jump taken when it is false, returns the jump to patch
+    def condition(self, node: int):
+        arena = self.arena
+        if arena.kind(node) == NodeKind.BINARY:
+            opcode = BINARY_OPCODES.get(self.token_kind(arena.token(node)))
+            if opcode in COMPARISON_JUMPS:
+                left, right = arena.children(node)
+                self.expression(left)
+                self.expression(right)
+                return self.emit(COMPARISON_JUMPS[opcode])
+        self.expression(node)
+        return self.emit(Opcode.JUMP_IF_FALSE)
+
+    # ---- Statement ----
+
+    def statement(self, node: int):
+        self._line = self.arena.line_no(node)
+        getattr(self, STATEMENTS[self.arena.kind(node)])(node)
+
+    def block(self, node: int):
+        for statement in self.arena.children(node):
+            self.statement(statement)
+
+    # several names take a value each, all the values are computed before the first is stored
+    def declaration_statement(self, node: int):
+        names, values = declared_values(self.arena, node)
+        for value in values:
+            self.value(value)
+        if len(names) > 1:
+            for name in reversed(names):
+                self.store(name)
+            return
+        if len(values) > 1:
+            self.emit(Opcode.BUILD_ARRAY, len(values))
+        self.store(names[0])
+
+    # an expression or an input() call
+    def value(self, node: int):
+        if self.arena.kind(node) == NodeKind.INPUT:
+            prompt = self.arena.children(node)
+            if prompt:
+                self.expression(prompt[0])
+            self.emit(Opcode.INPUT, len(prompt))
+        else:
+            self.expression(node)
+
+    def assign_statement(self, node: int):
+        self.load(self.arena.token(node))
+        self.expression(self.arena.child(node, 0))
+        self.emit(ASSIGN_OPCODES[self.token_kind(self.arena.data(node))])
+        self.store(self.arena.token(node))
+
+    def output_statement(self, node: int):
+        values = self.arena.children(node)
+        for value in values:
+            self.expression(value)
+        separator = self.arena.data(node)
+        if separator == NO_TOKEN:
+            self.emit(Opcode.PRINT, len(values))
+        else:
+            self.emit(Opcode.LOAD_CONST, self.constant(literal_value(TokenKind.STRING, self.arena.lexeme(node, True))))
+            self.emit(Opcode.PRINT_SEPARATOR, len(values))
+
+    def call_statement(self, node: int):
+        arguments = self.arena.children(node)
+        self.load(self.arena.token(node))
+        for argument in arguments:
+            self.expression(argument)
+        self.emit(Opcode.CALL, len(arguments))
+
+    def if_statement(self, node: int):
+        arena = self.arena
+        children = arena.children(node)
+        # (condition, block) of the if and every elif, then the block of the else if any
+        branches = [(children[0], children[1])]
+        otherwise = None
+        for branch in children[2:]:
+            if arena.kind(branch) == NodeKind.ELIF:
+                branches.append(tuple(arena.children(branch)))
+            else:
+                otherwise = arena.child(branch, 0)
+
+        exits = []
+        for index, (condition, block) in enumerate(branches):
+            self._line = arena.line_no(condition)
+            jump = self.condition(condition)
+            self.block(block)
+            if index < len(branches) - 1 or otherwise is not None:
+                exits.append(self.emit(Opcode.JUMP))
+            self.patch(jump)
+        if otherwise is not None:
+            self.block(otherwise)
+        for jump in exits:
+            self.patch(jump)
+
+    def which_statement(self, node: int):
+        arena = self.arena
+        arms = []
+        lines = []
+        for arm in arena.children(node):
+            if arena.kind(arm) == NodeKind.DEFAULT:
+                break
+            operator = arena.data(arm)
+            opcode = Opcode.EQUAL if operator == NO_TOKEN else BINARY_OPCODES[self.token_kind(operator)]
+            arms.append((opcode, literal_value(self.token_kind(arena.token(arm)), arena.lexeme(arm))))
+            lines.append(arena.line_no(arm))
+        if len(arms) >= MIN_TABLE_ARMS and JumpTable.supports(arms):
+            self.which_table(node, JumpTable(arms, lines))
+            return
+
+        exits = []
+        for arm, (opcode, label), line_no in zip(arena.children(node), arms, lines):
+            self._line = line_no
+            self.load(arena.token(node))
+            self.emit(Opcode.LOAD_CONST, self.constant(label))
+            jump = self.emit(COMPARISON_JUMPS[opcode])
+            self.block(arena.child(arm, 0))
+            exits.append(self.emit(Opcode.JUMP))
+            self.patch(jump)
+        if len(arms) < arena.child_count(node):
+            self._line = arena.line_no(arena.children(node)[-1])
+            self.block(arena.child(arena.children(node)[-1], 0))
+        for jump in exits:
+            self.patch(jump)
+
+    # one jump to the block of the arm the value matches, see JumpTable
+    def which_table(self, node: int, table: JumpTable):
+        arena = self.arena
+        self._line = table.lines[0]
+        self.load(arena.token(node))
+        self.emit(Opcode.WHICH_TABLE, self.constant(table))
+        exits = []
+        for index, arm in enumerate(arena.children(node)):
+            table.targets[index] = len(self.code.ops)
+            self._line = arena.line_no(arm)
+            self.block(arena.child(arm, 0))
+            if index < len(table.arms):
+                exits.append(self.emit(Opcode.JUMP))
+        # without a default a value no arm matches goes to the end of the 'which'
+        if len(table.arms) == arena.child_count(node):
+            table.targets[-1] = len(self.code.ops)
+        for jump in exits:
+            self.patch(jump)
+
+    def while_statement(self, node: int):
+        condition, block = self.arena.children(node)
+        line_no = self._line
+        start = len(self.code.ops)
+        jump = self.condition(condition)
+        self.block(block)
+        self.loop_back(start, line_no)
+        self.patch(jump)
+
+    def for_statement(self, node: int):
+        arena = self.arena
+        iterable, block = arena.children(node)
+        pair = arena.data(node) != NO_TOKEN
+        line_no = self._line
+        if not pair and counting_range(arena, iterable):
+            # for i in [a to b]: a counting loop, the array is never built
+            for child in arena.children(iterable):
+                self.expression(child)
+            self.emit(Opcode.LOAD_CONST, self.constant(range_step(arena, iterable)))
+            self.emit(Opcode.GET_RANGE_ITER, arena.child_count(iterable) - 1)
+        else:
+            self.expression(iterable)
+            self.emit(Opcode.GET_PAIR_ITER if pair else Opcode.GET_ITER)
+        start = len(self.code.ops)
+        jump = self.emit(Opcode.FOR_ITER_PAIR if pair else Opcode.FOR_ITER)
+        # the index is on top, it goes to the first name
+        self.store(arena.token(node))
+        if pair:
+            self.store(arena.data(node))
+        self.block(block)
+        self.loop_back(start, line_no)
+        self.patch(jump)
+
+    def function_statement(self, node: int):
+        arena = self.arena
+        children = arena.children(node)
+        parameters, body = children[:-1], children[-1]
+        name = arena.lexeme(node)
+        code = Code(name, self.module, self.global_names)
+        # the defaults are evaluated once, when the function is defined
+        for parameter in parameters:
+            default = arena.children(parameter)
+            if default:
+                self.expression(default[0])
+            else:
+                self.emit(Opcode.LOAD_CONST, self.constant(UNDEFINED))
+            parameter_name = arena.lexeme(parameter)
+            if parameter_name in code.parameter_names:
+                raise CompileError(f"Duplicate parameter '{parameter_name}' in '{name}'", self._line)
+            code.parameter_names.append(parameter_name)
+
+        # the layout of the locals from the scope pass, the parameters first
+        code.local_names = self.scopes.functions[node].names
+
+        enclosing = self.code, self._constant_indexes, self._line
+        self.code = code
+        self._constant_indexes = {}
+        self._depth += 1
+        charge = self.charge()
+        self.block(body)
+        self.emit(Opcode.RETURN)
+        if charge is not None:
+            self.patch(charge)
+        self._depth -= 1
+        self.code, self._constant_indexes, self._line = enclosing
+
+        self.emit(Opcode.MAKE_FUNCTION, self.constant(code))
+        self.store(arena.token(node))
+
+    # 'import m' runs the module and copies the names it defines, 'from m import a, b' only a and b
+    def import_statement(self, node: int):
+        arena = self.arena
+        module = arena.lexeme(node)
+        if self._depth:
+            raise CompileError(f"Module '{module}' must be imported outside of functions", self._line)
+        self.imports.append((module, self._line))
+        self.emit(Opcode.IMPORT, self.constant(module))
+        names = arena.children(node)
+        if not names:
+            self.emit(Opcode.IMPORT_ALL, self.constant(module))
+        for name in names:
+            self.emit(Opcode.LOAD_IMPORTED, self.constant((module, arena.lexeme(name))))
+            self.store(arena.token(name))
+
+
+# the method compiling each statement node
+STATEMENTS = {
+    NodeKind.DECLARATION: "declaration_statement",
+    NodeKind.ASSIGN: "assign_statement",
+    NodeKind.PRINT: "output_statement",
+    NodeKind.CALL: "call_statement",
+    NodeKind.IF: "if_statement",
+    NodeKind.WHICH: "which_statement",
+    NodeKind.WHILE: "while_statement",
+    NodeKind.FOR: "for_statement",
+    NodeKind.FUNCTION: "function_statement",
+    NodeKind.IMPORT: "import_statement",
+}
+
+
+def compile_program(arena: AstArena, module: str = "", count_instructions: bool = False):
+    return Compiler(arena, module, count_instructions).compile()
@@ -0,0 +1,205 @@
+import constants
+from lexer import Lexer
+from line_table import LineTable
+from syntax import ParseError, Parser
+from token_buffer import TokenBuffer
+from token_kinds import TokenKind
+from token_stream import TokenStream
+
+
+class LineLexer(Lexer):
+    # lines are fed one at a time by lex_line instead of being read from a file
+    def load(self, filepath: str):
+        self._run = []
+
+    # returns the tokens of one line without their line number, and the indentation after it
+    def lex_line(self, line: str, line_number: int, indentation: int):
+        self._line_number = line_number
+        self._current_indentation = indentation
+        self._lexeme = ""
+        self._current_state = 0
+        self._run = []
+
+        self.get_line_tokens(line)
+        self.emit(TokenKind.NEWLINE, "", self._cursor + 1, self._current_indentation)
+        return tuple(self._run), self._current_indentation
+
+    def emit(self, kind: TokenKind, lexeme: str, column_no=0, indent_level=0, has_line=True):
+        self._run.append((kind, lexeme, column_no, indent_level, has_line))
+
+
+# length of the common prefix (or suffix) of two lists, found by comparing slices
+def common_length(first: list, second: list, from_end: bool):
+    low, high = 0, min(len(first), len(second))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if from_end:
+            same = first[len(first) - middle :] == second[len(second) - middle :]
+        else:
+            same = first[:middle] == second[:middle]
+        if same:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+class IncrementalResult:
+    def __init__(
+        self,
+        tokens: TokenBuffer,
+        error: Exception | None,
+        statement_starts: list[int],
+        line_offsets: list[int],
+        line_indents: list[int],
+    ):
+        self.tokens = tokens
+        # the lexer or parser error, None if the document is valid
+        self.error = error
+        # token index of every top-level statement that was reached by the parser
+        self.statement_starts = statement_starts
+        # token index and indentation at the start of every lexed line, plus the values after the last line
+        self.line_offsets = line_offsets
+        self.line_indents = line_indents
+
+    def get_tokens(self):
+        return TokenStream(self.tokens)
+
+
+class IncrementalDocument:
+    def __init__(self, text: str):
+        self._raw_lines = text.split("\n")
+        self._lexer = LineLexer("")
+        # token runs keyed by (line, indentation before the line)
+        self._line_cache: dict[tuple[str, int], tuple[tuple, int]] = {}
+        self._code_lines: list[str] = []
+        self.result: IncrementalResult | None = None
+        self.update()
+
+    def get_text(self):
+        return "\n".join(self._raw_lines)
+
+    # replaces lines start_line to end_line (1-based, inclusive) with text,
+    # an end_line of start_line - 1 inserts the text before start_line
+    def edit(self, start_line: int, end_line: int, text: str):
+        if not 1 <= start_line <= end_line + 1 <= len(self._raw_lines) + 1:
+            raise Exception(f"Invalid line range: {start_line}-{end_line}")
+        self._raw_lines[start_line - 1 : end_line] = text.split("\n")
+        return self.update()
+
+    def update(self):
+        previous_lines = self._code_lines
+        # comments can join lines, so the whole text goes through the (regex only) preprocessing
+        code = self._lexer.preprocess_input(self.get_text())
+        self._code_lines = code.split("\n")
+
+        first_changed = common_length(previous_lines, self._code_lines, False)
+        common_suffix = common_length(previous_lines[first_changed:], self._code_lines[first_changed:], True)
+
+        tokens, error, line_offsets, line_indents = self.relex(code, first_changed, common_suffix, len(previous_lines))
+        if error is None:
+            error, statement_starts = self.reparse(tokens, line_offsets[first_changed])
+        else:
+            statement_starts = []
+
+        self.result = IncrementalResult(tokens, error, statement_starts, line_offsets, line_indents)
+        return self.result
+
+    # lexes the changed lines, the tokens of unchanged lines before and after them are copied
+    def relex(self, code: str, first_changed: int, common_suffix: int, previous_line_count: int):
+        previous = self.result
+        # every edit adds its new lexemes to the shared id table, once most of them are no longer
+        # used the whole document is lexed again into a new table (the line cache keeps this cheap)
+        if previous is not None and previous.tokens.lexeme_count() > 2 * len(previous.tokens) + 1024:
+            previous = None
+        lines = self._code_lines
+        tokens = TokenBuffer(LineTable(code), previous.tokens if previous else None)
+        line_offsets = []
+        line_indents = []
+        indentation = 0
+        start_line = 0
+
+        if previous is not None:
+            start_line = min(first_changed, len(previous.line_offsets) - 1)
+            tokens.extend_from(previous.tokens, 0, previous.line_offsets[start_line])
+            line_offsets = previous.line_offsets[:start_line]
+            line_indents = previous.line_indents[:start_line]
+            indentation = previous.line_indents[start_line]
+
+        # the unchanged lines at the end can only be copied if the previous text was fully lexed
+        suffix_start = len(lines) - common_suffix
+        old_suffix_start = previous_line_count - common_suffix
+        if previous is None or len(previous.line_offsets) != previous_line_count + 1:
+            suffix_start = -1
+
+        for index in range(start_line, len(lines)):
+            # the lines left are unchanged and start with the same indentation as before
+            if index == suffix_start and indentation == previous.line_indents[old_suffix_start]:
+                self.copy_suffix(tokens, line_offsets, line_indents, old_suffix_start, len(lines) - previous_line_count)
+                indentation = previous.line_indents[-1]
+                break
+
+            line_offsets.append(len(tokens))
+            line_indents.append(indentation)
+            line = lines[index]
+            if not line.strip():  # skip empty lines
+                continue
+
+            key = (line, indentation)
+            cached = self._line_cache.get(key)
+            if cached is None:
+                try:
+                    cached = self._lexer.lex_line(line, index + 1, indentation)
+                except Exception as error:
+                    return tokens, error, line_offsets, line_indents
+                self._line_cache[key] = cached
+
+            run, indentation = cached
+            for kind, lexeme, column_no, indent_level, has_line in run:
+                tokens.append(kind, lexeme, index + 1, column_no, indent_level, has_line)
+
+        line_offsets.append(len(tokens))
+        line_indents.append(indentation)
+        while indentation > 0:
+            tokens.append(TokenKind.DEDENT, "", len(lines))
+            indentation -= constants.INDENT_SIZE
+        tokens.append(TokenKind.EOF, "", len(lines))
+        tokens.freeze()
+
+        # the cache only has to cover recent edits
+        if len(self._line_cache) > 2 * len(lines) + 1024:
+            self._line_cache.clear()
+        return tokens, None, line_offsets, line_indents
+
+    # copies the tokens of the previous lines old_start to the end, shifted by line_delta lines
+    def copy_suffix(
+        self, tokens: TokenBuffer, line_offsets: list[int], line_indents: list[int], old_start: int, line_delta: int
+    ):
+        previous = self.result
+        old_offsets = previous.line_offsets
+        shift = len(tokens) - old_offsets[old_start]
+
+        tokens.extend_from(previous.tokens, old_offsets[old_start], old_offsets[-1], line_delta)
+        line_offsets.extend(offset + shift for offset in old_offsets[old_start:-1])
+        line_indents.extend(previous.line_indents[old_start:-1])
+
+    # parses again from the last top-level statement that starts before the first changed token
+    def reparse(self, tokens: TokenBuffer, first_changed: int):
+        statement_starts = []
+        if self.result is not None:
+            for start in self.result.statement_starts:
+                if start >= first_changed:
+                    break
+                statement_starts.append(start)
+
+        stream = TokenStream(tokens)
+        if statement_starts:
+            stream.reset(statement_starts.pop())
+
+        parser = Parser(stream, recover=False)
+        try:
+            parser.run_statements(TokenKind.EOF, statement_starts)
+            parser.consume(TokenKind.EOF)
+        except ParseError as error:
+            return error, statement_starts
+        return None, statement_starts
@@ -1,41 +1,60 @@
-import copy
 import os
 import re
 
-from prettytable import PrettyTable
-
 import constants
-from token_ import Token
+import scanner_table
+import table_writer
+from line_table import LineTable
+from token_buffer import TokenBuffer
+from token_kinds import TokenKind
 from token_stream import TokenStream
 
 
+class LexerError(Exception):
+    def __init__(self, message: str, line_no: int, column_no: int):
+        super().__init__(message)
+        self.message = message
+        self.line_no = line_no
+        self.column_no = column_no
+
+
 class Lexer:
-    def __init__(self, filepath: str):
+    # code can be given when the file was already read, it is then not opened again
+    def __init__(self, filepath: str, code: str | None = None):
         self._filename = os.path.basename(filepath).split(".")[0]
         self._cursor = 0
         self._lexeme = ""
-        self._tokens = TokenStream()
         self._current_state = 0
         self._current_indentation = 0
+        if code is None:
+            self.load(filepath)
+        else:
+            self.load_code(code)
 
+    # reads the whole file into the line table and prepares the token buffer
+    def load(self, filepath: str):
         with open(filepath, "r") as file:
-            self._code_lines = self.preprocess_input(file.read())
+            self.load_code(file.read())
+
+    def load_code(self, code: str):
+        self._lines = LineTable(self.preprocess_input(code))
+        self._tokens = TokenBuffer(self._lines)
 
     def start_parse(self):
-        for line_number, line in enumerate(self._code_lines):
-            self._line_number = line_number + 1
+        for line_number in range(1, len(self._lines) + 1):
+            self._line_number = line_number
+            line = self._lines.line(line_number)
 
             if line.strip():  # skip empty lines
                 self.get_line_tokens(line)
-                self._tokens.add(
-                    Token("NEWLINE", "", self._line_number, line, self._cursor + 1, self._current_indentation)
-                )
+                self.emit(TokenKind.NEWLINE, "", self._cursor + 1, self._current_indentation)
 
         while self._current_indentation > 0:
-            self._tokens.add(Token("DEDENT", "", self._line_number))
+            self.emit(TokenKind.DEDENT, "", has_line=False)
             self._current_indentation -= constants.INDENT_SIZE
 
-        self._tokens.add(Token("EOF", "", self._line_number))
+        self.emit(TokenKind.EOF, "", has_line=False)
+        self._tokens.freeze()
 
     # Input preprocessing
     def preprocess_input(self, code: str):
@@ -43,8 +62,7 @@ class Lexer:
         code = re.sub(r"//.*", "", code)
         # removing multiline comments
         code = re.sub(r"/\*.*?\*/", "", code, flags=re.DOTALL)
-        # splitting code into multiple lines
-        return code.split("\n")
+        return code
 
     def get_line_tokens(self, line: str):
         self._cursor = 0
@@ -53,12 +71,12 @@ class Lexer:
         indentation = self.analyze_indentation(line)
         if indentation > self._current_indentation:
             while indentation > self._current_indentation:
-                self._tokens.add(Token("INDENT", "", self._line_number, line, self._cursor))
+                self.emit(TokenKind.INDENT, "", self._cursor)
                 self._current_indentation += constants.INDENT_SIZE
         elif indentation < self._current_indentation:
             # Generate DEDENT tokens for each level decreased
             while indentation < self._current_indentation:
-                self._tokens.add(Token("DEDENT", "", self._line_number, line, self._cursor))
+                self.emit(TokenKind.DEDENT, "", self._cursor)
                 self._current_indentation -= constants.INDENT_SIZE
 
         self.generate_tokens(line)
@@ -76,143 +94,79 @@ class Lexer:
 
         # check if indentation is a multiple of specified indent size
         if indentation % constants.INDENT_SIZE != 0:
-            raise IndentationError(f"Invalid indentation at line {self._line_number}")
+            raise LexerError(f"Invalid indentation at line {self._line_number}", self._line_number, self._cursor + 1)
 
         return indentation
 
     # Generate tokens for the current line
     def generate_tokens(self, line: str):
-        while self._cursor < len(line):
-            current_char = line[self._cursor]
-            # initial state
-            if self._current_state == 0:
-                # skip whitespaces
-                if current_char in constants.SPACES:
-                    self._cursor += 1
-                    continue
-
-                self.update_lexeme(current_char)
-                if current_char in constants.DELIMITERS:
-                    self.add_token(line)
-                elif current_char in constants.ALPHABET:
-                    self._current_state = 1
-                elif current_char in constants.DIGITS:
-                    self._current_state = 3
-                elif current_char in constants.OPERATORS:
-                    self._current_state = 5
-                elif current_char == "!":
-                    self._current_state = 7
-                elif current_char == '"':
-                    self._current_state = 8
-                else:
-                    raise Exception(f"Invalid lexeme: {self._lexeme}")
-            # identifier, keyword, and boolean literals
-            elif self._current_state == 1:
-                if current_char in constants.ALPHABET + constants.DIGITS:
-                    self.update_lexeme(current_char)
-                elif current_char == "_":
-                    self._current_state = 2
-                else:
-                    self.add_token(line)
-            # identifier with underscore
-            elif self._current_state == 2:
-                if current_char == "_":
-                    self.update_lexeme(current_char)
-                elif current_char in constants.ALPHABET + constants.DIGITS:
-                    self._current_state = 1
-                else:
-                    raise Exception(f"Invalid lexeme: {self._lexeme + current_char}")
-            # number
-            elif self._current_state == 3:
-                if current_char in constants.ALPHABET:
-                    raise Exception(f"Invalid lexeme: {self._lexeme + current_char}")
-
-                if current_char in constants.DIGITS:
-                    self.update_lexeme(current_char)
-                elif current_char == ".":
-                    self._current_state = 4
-                    self.update_lexeme(current_char)
-                else:
-                    self.add_token(line)
-            # float number
-            elif self._current_state == 4:
-                if current_char in constants.DIGITS:
-                    self._current_state = 3
-                else:
-                    raise Exception(f"Invalid lexeme: {self._lexeme + current_char}")
-            # single operators (+ - * / % > < =)
-            elif self._current_state in [5, 7]:
-                if current_char == "=":
-                    self._current_state = 6
-                    self.update_lexeme(current_char)
-                else:
-                    # invalid double operators (-+, ++, =+, --) and not equal (!=)
-                    if current_char in constants.OPERATORS or self._current_state == 7:
-                        raise Exception(f"Invalid lexeme: {self._lexeme + current_char}")
-                    self.add_token(line)
-            # double operators (+= -= *= /= >= <= ==)
-            elif self._current_state == 6:
-                if current_char == "=":
-                    raise Exception(f"Invalid lexeme: {self._lexeme + current_char}")
-                else:
-                    self.add_token(line)
-            # string
-            elif self._current_state == 8:
-                self.update_lexeme(current_char)
-                if current_char == '"':  # closing quote
-                    self.add_token(line)
+        char_classes = scanner_table.CHAR_CLASSES
+        transitions = scanner_table.TRANSITIONS
+        cursor = self._cursor
+        state = self._current_state
+        # the lexeme is always line[start:cursor]
+        start = cursor
+
+        while cursor < len(line):
+            current_char = line[cursor]
+            action, next_state = transitions[state][char_classes.get(current_char, scanner_table.OTHER)]
+
+            if action == scanner_table.CONSUME:
+                cursor += 1
+                state = next_state
+            elif action == scanner_table.EMIT or action == scanner_table.CONSUME_EMIT:
+                if action == scanner_table.CONSUME_EMIT:
+                    cursor += 1
+                self._lexeme, self._cursor, self._current_state = line[start:cursor], cursor, state
+                self.add_token(line)
+                state = 0
+                start = cursor
+            elif action == scanner_table.SKIP:
+                cursor += 1
+                start = cursor
+            elif action == scanner_table.MOVE:
+                state = next_state
+            else:
+                raise LexerError(f"Invalid lexeme: {line[start:cursor] + current_char}", self._line_number, cursor + 1)
+
+        self._lexeme, self._cursor, self._current_state = line[start:cursor], cursor, state
 
         # checks if string is closed
         if self._current_state == 8:
-            raise Exception(f"String was not closed: {self._lexeme}")
+            raise LexerError(f"String was not closed: {self._lexeme}", self._line_number, start + 1)
 
         self.add_token(line)
 
-    def update_lexeme(self, current_char):
-        self._cursor += 1
-        self._lexeme += current_char
-
     def add_token(self, line):
         if self._lexeme == "":
             return
 
         classified = self.classify_token()
-        self._tokens.add(
-            Token(classified[0], classified[1], self._line_number, line, self._cursor, self._current_indentation)
-        )
+        self.emit(classified[0], classified[1], self._cursor, self._current_indentation)
         self._lexeme = ""
         self._current_state = 0
 
-    def classify_token(self):
-        token_name = "IDENTIFIER"
-        if self._lexeme in constants.KEYWORDS:
-            token_name = "KEYWORD"
-        elif self._lexeme in constants.BOOLEAN_LITERAL:
-            token_name = "BOOLEAN_LITERAL"
-        elif self._lexeme in constants.LOGICAL_OPERATORS:
-            token_name = constants.LOGICAL_OPERATORS[self._lexeme]
-        elif self._lexeme in constants.OPERATORS:
-            token_name = constants.OPERATORS[self._lexeme]
-        elif self._lexeme in constants.DELIMITERS:
-            token_name = constants.DELIMITERS[self._lexeme]
-        elif self._lexeme in constants.BUILT_IN_FUNCTIONS:
-            token_name = "BUILT_IN_FUNCTION"
-        elif self._current_state == 3:
-            token_name = "FLOAT" if "." in self._lexeme else "NUMBER"
-        elif self._current_state == 8:
-            token_name = "STRING"
-        return (token_name, self._lexeme)
-
-    def output_table(self):
-        # print tokens to console
-        tokens_table = PrettyTable(["TOKEN", "LEXEME", "COLUM_NO"])
-        for token in self._tokens.get_tokens():
-            tokens_table.add_row([token.name, token.lexeme, token.column_no])
-
-        # write tokens to file
-        output_path = os.path.join("rookie-tables", f"{self._filename}.rtable")
-        with open(output_path, "w") as file:
-            file.write(tokens_table.get_string())
+    # appends a token for the current line to the token buffer
+    def emit(self, kind: TokenKind, lexeme: str, column_no=0, indent_level=0, has_line=True):
+        self._tokens.append(kind, lexeme, self._line_number, column_no, indent_level, has_line)
 
+    def classify_token(self):
+        kind = scanner_table.TOKEN_KINDS.get(self._lexeme)
+        if kind is None:
+            if self._current_state == 3:
+                kind = TokenKind.FLOAT if "." in self._lexeme else TokenKind.NUMBER
+            elif self._current_state == 8:
+                kind = TokenKind.STRING
+            else:
+                kind = TokenKind.IDENTIFIER
+        return (kind, self._lexeme)
+
+    # writes the tokens to rookie-tables/<name> with the extension of the format, unless a path is given
+    def output_table(self, table_format: str = "table", output_path: str | None = None):
+        if output_path is None:
+            output_path = table_writer.default_output_path(self._filename, table_format)
+        table_writer.write_table(self._tokens, output_path, table_format)
+
+    # returns a read-only view of the tokens, each call gets its own cursor
     def get_tokens(self):
-        return copy.deepcopy(self._tokens)
+        return TokenStream(self._tokens)
@@ -0,0 +1,29 @@
+from array import array
+from itertools import accumulate, chain, count
+from operator import add
+
+
+class LineTable:
+    def __init__(self, code: str):
+        # the source is stored once, lines are sliced out of it on demand
+        self._code = code
+
+        # each line starts after the lengths of the previous lines and their newlines
+        line_lengths = map(len, code.split("\n")[:-1])
+        self._offsets = array("I", chain([0], map(add, accumulate(line_lengths), count(1))))
+
+    def get_code(self):
+        return self._code
+
+    def __len__(self):
+        return len(self._offsets)
+
+    # returns the line with the given 1-based line number, without the newline
+    def line(self, line_no: int):
+        start = self._offsets[line_no - 1]
+        end = self._offsets[line_no] - 1 if line_no < len(self._offsets) else len(self._code)
+        return self._code[start:end]
+
+    # returns the line the way it is shown in error messages
+    def line_code(self, line_no: int):
+        return "  " + self.line(line_no).strip()
@@ -0,0 +1,338 @@
+import argparse
+import hashlib
+import os
+import re
+import sys
+import tempfile
+
+import constants
+from token_kinds import TokenKind
+
+GRAMMAR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "new_grammar.ebnf")
+TABLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ll1_tables.py")
+START_SYMBOL = "rook_pl"
+# nonterminals are numbered from here, below are the token kinds
+NONTERMINAL_BASE = 64
+# rules of the grammar that the lexer turns into a single token
+TOKEN_RULES = {
+    "identifier": [TokenKind.IDENTIFIER],
+    "number": [TokenKind.NUMBER, TokenKind.FLOAT],
+    "int": [TokenKind.NUMBER],
+    "string": [TokenKind.STRING],
+    "bool_literals": [TokenKind.BOOLEAN_LITERAL],
+}
+EBNF_TOKEN = re.compile(r"'[^']*'|\"[^\"]*\"|::=|[A-Za-z_][A-Za-z0-9_]*|[|()?*+]|\S")
+
+
+# the token kind of a quoted terminal of the grammar
+def literal_kind(text: str):
+    if text in constants.KEYWORDS or text in constants.BUILT_IN_FUNCTIONS:
+        return TokenKind[text.upper()]
+    if text in constants.BOOLEAN_LITERAL:
+        return TokenKind.BOOLEAN_LITERAL
+    for names in [constants.LOGICAL_OPERATORS, constants.OPERATORS, constants.DELIMITERS]:
+        if text in names:
+            return TokenKind[names[text]]
+    raise Exception(f"Terminal '{text}' is not a token")
+
+
+# reads the rules of an EBNF file as {name: list of EBNF tokens}, in the order they are written
+def read_rules(path: str):
+    rules = {}
+    name = None
+    with open(path, "r") as file:
+        for line in file:
+            if not line.strip() or line.startswith("@"):
+                continue
+            if "::=" in line:
+                name, body = line.split("::=", 1)
+                name = name.strip()
+                rules[name] = []
+                line = body
+            if name is None:
+                raise Exception(f"Expected a rule in {path}: {line.strip()}")
+            rules[name].extend(EBNF_TOKEN.findall(line))
+    return rules
+
+
+# turns EBNF rules into BNF productions, repetitions, options and groups get rules of their own
+class GrammarBuilder:
+    def __init__(self, rules: dict):
+        self.rules = rules
+        # nonterminal: list of alternatives, each a list of symbols
+        self.productions = {}
+        # a symbol is a TokenKind or a nonterminal name
+        self._tokens = []
+        self._cursor = 0
+        self._rule = ""
+        self._helper_count = 0
+
+    def build(self, start: str):
+        pending = [start]
+        while pending:
+            name = pending.pop()
+            if name in self.productions:
+                continue
+            if name not in self.rules:
+                raise Exception(f"Rule '{name}' is not defined")
+            self._tokens, self._cursor, self._rule, self._helper_count = self.rules[name], 0, name, 0
+            self.productions[name] = []
+            self.productions[name] = self.alternatives()
+            if self._cursor < len(self._tokens):
+                raise Exception(f"Unexpected '{self._tokens[self._cursor]}' in rule '{name}'")
+            pending.extend(
+                symbol
+                for alternatives in list(self.productions.values())
+                for alternative in alternatives
+                for symbol in alternative
+                if isinstance(symbol, str) and symbol not in self.productions
+            )
+        return self.productions
+
+    def peek(self):
+        return self._tokens[self._cursor] if self._cursor < len(self._tokens) else None
+
+    def helper(self, alternatives: list):
+        self._helper_count += 1
+        name = f"{self._rule}_{self._helper_count}"
+        self.productions[name] = alternatives
+        return name
+
+    def alternatives(self):
+        alternatives = [self.sequence()]
+        while self.peek() == "|":
+            self._cursor += 1
+            alternatives.append(self.sequence())
+        return alternatives
+
+    def sequence(self):
+        symbols = []
+        while self.peek() not in [None, "|", ")"]:
+            symbols.extend(self.item())
+        return symbols
+
+    # the symbols of one item with its ?, * or + suffix
+    def item(self):
+        token = self.peek()
+        self._cursor += 1
+        if token == "(":
+            alternatives = self.alternatives()
+            if self.peek() != ")":
+                raise Exception(f"Expected ')' in rule '{self._rule}'")
+            self._cursor += 1
+            symbols = alternatives[0] if len(alternatives) == 1 else [self.helper(alternatives)]
+        elif token[0] in "'\"":
+            symbols = [literal_kind(token[1:-1])]
+        elif token in TOKEN_RULES:
+            kinds = TOKEN_RULES[token]
+            symbols = [kinds[0]] if len(kinds) == 1 else [self.helper([[kind] for kind in kinds])]
+        elif token in TokenKind.__members__:
+            symbols = [TokenKind[token]]
+        elif re.fullmatch(r"[A-Za-z_]\w*", token):
+            symbols = [token]
+        else:
+            raise Exception(f"Unexpected '{token}' in rule '{self._rule}'")
+
+        suffix = self.peek()
+        if suffix == "?":
+            self._cursor += 1
+            return [self.helper([symbols, []])]
+        if suffix in ["*", "+"]:
+            self._cursor += 1
+            repeat = self.helper([])
+            self.productions[repeat] = [symbols + [repeat], []]
+            return symbols + [repeat] if suffix == "+" else [repeat]
+        return symbols
+
+
+class LL1Grammar:
+    def __init__(self, productions: dict, start: str):
+        self.productions = productions
+        self.start = start
+        self.nullable = set()
+        self.first = {name: set() for name in productions}
+        self.follow = {name: set() for name in productions}
+        # (nonterminal, token kind, alternative kept, alternative dropped)
+        self.conflicts = []
+        self.compute_first()
+        self.compute_follow()
+        self.table = self.build_table()
+
+    # FIRST set of a sequence of symbols, and whether the whole sequence can be empty
+    def first_of(self, symbols: list):
+        first = set()
+        for symbol in symbols:
+            if isinstance(symbol, TokenKind):
+                first.add(symbol)
+                return first, False
+            first |= self.first[symbol]
+            if symbol not in self.nullable:
+                return first, False
+        return first, True
+
+    def compute_first(self):
+        changed = True
+        while changed:
+            changed = False
+            for name, alternatives in self.productions.items():
+                for alternative in alternatives:
+                    first, nullable = self.first_of(alternative)
+                    if not first <= self.first[name]:
+                        self.first[name] |= first
+                        changed = True
+                    if nullable and name not in self.nullable:
+                        self.nullable.add(name)
+                        changed = True
+
+    def compute_follow(self):
+        self.follow[self.start].add(TokenKind.EOF)
+        changed = True
+        while changed:
+            changed = False
+            for name, alternatives in self.productions.items():
+                for alternative in alternatives:
+                    for index, symbol in enumerate(alternative):
+                        if isinstance(symbol, TokenKind):
+                            continue
+                        follow, nullable = self.first_of(alternative[index + 1 :])
+                        if nullable:
+                            follow |= self.follow[name]
+                        if not follow <= self.follow[symbol]:
+                            self.follow[symbol] |= follow
+                            changed = True
+
+    # {nonterminal: {token kind: alternative index}}, a conflict keeps the alternative written first
+    def build_table(self):
+        table = {}
+        for name, alternatives in self.productions.items():
+            row = table[name] = {}
+            for index, alternative in enumerate(alternatives):
+                predict, nullable = self.first_of(alternative)
+                if nullable:
+                    predict |= self.follow[name]
+                for kind in sorted(predict):
+                    if kind in row:
+                        self.conflicts.append((name, kind, row[kind], index))
+                    else:
+                        row[kind] = index
+        return table
+
+    # what is left on the stack after expanding name with the lookahead kind until the kind is matched,
+    # bottom first, and whether the kind was matched; an empty expansion without a match means
+    # name derived nothing and the symbols below it decide
+    def expansion(self, name: str, kind: TokenKind):
+        stack = [name]
+        while stack:
+            symbol = stack.pop()
+            if isinstance(symbol, TokenKind):
+                return stack, True
+            stack.extend(reversed(self.productions[symbol][self.table[symbol][kind]]))
+        return stack, False
+
+    def conflict_report(self):
+        lines = []
+        for name, kind, kept, dropped in self.conflicts:
+            lines.append(
+                f"{name}: {kind.name} predicts alternatives {kept} and {dropped}, "
+                f"kept {self.format_alternative(name, kept)}"
+            )
+        return lines
+
+    def format_alternative(self, name: str, index: int):
+        return (
+            " ".join(
+                symbol.name if isinstance(symbol, TokenKind) else symbol for symbol in self.productions[name][index]
+            )
+            or "ε"
+        )
+
+
+# hash of the grammar and of this generator, stored in the generated module to tell when it is stale
+def grammar_hash(path: str = GRAMMAR_PATH):
+    digest = hashlib.sha256()
+    for source in [path, os.path.abspath(__file__)]:
+        with open(source, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def render_module(grammar: LL1Grammar, digest: str):
+    names = list(grammar.productions)
+    numbers = {name: NONTERMINAL_BASE + index for index, name in enumerate(names)}
+
+    def number(symbol):
+        return int(symbol) if isinstance(symbol, TokenKind) else numbers[symbol]
+
+    # a table entry expands the nonterminal as far as the lookahead token decides, so most tokens take one
+    # step, equal expansions are stored once
+    expansions = {}
+    table = []
+    for name in names:
+        row = {}
+        for kind in grammar.table[name]:
+            symbols, matched = grammar.expansion(name, kind)
+            row[int(kind)] = expansions.setdefault(
+                (tuple(number(symbol) for symbol in symbols), matched), len(expansions)
+            )
+        table.append(row)
+
+    lines = [
+        "# Generated by ll1_generator.py from new_grammar.ebnf, do not edit.",
+        "# fmt: off",
+        f'GRAMMAR_HASH = "{digest}"',
+        f"NONTERMINAL_BASE = {NONTERMINAL_BASE}",
+        f"START = {numbers[grammar.start]}",
+        "NONTERMINAL_NAMES = (",
+        *(f'    "{name}",' for name in names),
+        ")",
+        "# (symbols pushed on the stack, whether the lookahead token is consumed)",
+        "EXPANSIONS = (",
+        *(f"    {expansion!r}," for expansion in expansions),
+        ")",
+        "# {token kind: expansion} for every nonterminal",
+        "TABLE = (",
+        *(f"    {row!r},  # {name}" for name, row in zip(names, table)),
+        ")",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def generate(grammar_path: str = GRAMMAR_PATH):
+    productions = GrammarBuilder(read_rules(grammar_path)).build(START_SYMBOL)
+    return LL1Grammar(productions, START_SYMBOL)
+
+
+# writes the generated module, readers see either the previous module or the new one
+def write_module(grammar_path: str = GRAMMAR_PATH, output_path: str = TABLES_PATH):
+    grammar = generate(grammar_path)
+    source = render_module(grammar, grammar_hash(grammar_path))
+    descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_path)), suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "w") as file:
+            file.write(source)
+        os.replace(temporary_path, output_path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+    return grammar
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Generates the LL(1) parse table of new_grammar.ebnf.")
+    arg_parser.add_argument("--grammar", default=GRAMMAR_PATH, help="path to the EBNF grammar")
+    arg_parser.add_argument("--output", default=TABLES_PATH, help="path of the generated module")
+    arg_parser.add_argument("--sets", action="store_true", help="also print the FIRST and FOLLOW sets")
+    args = arg_parser.parse_args()
+
+    grammar = write_module(args.grammar, args.output)
+    if args.sets:
+        for name in grammar.productions:
+            first = " ".join(sorted(kind.name for kind in grammar.first[name]))
+            follow = " ".join(sorted(kind.name for kind in grammar.follow[name]))
+            print(f"{name}{' (nullable)' if name in grammar.nullable else ''}\n  FIRST: {first}\n  FOLLOW: {follow}")
+
+    conflicts = grammar.conflict_report()
+    for conflict in conflicts:
+        print(conflict)
+    print(f"{len(grammar.productions)} nonterminals, {len(conflicts)} conflicts, written to {args.output}")
+    sys.exit(1 if conflicts else 0)
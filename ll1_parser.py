@@ -0,0 +1,98 @@
+import constants
+import ll1_generator
+import ll1_tables
+from syntax import ParseError
+from token_kinds import TokenKind
+from token_stream import TokenStream
+
+# how the token kinds that are not a fixed lexeme are named in error messages
+KIND_DESCRIPTIONS = {
+    TokenKind.NEWLINE: "newline",
+    TokenKind.INDENT: "indentation",
+    TokenKind.DEDENT: "dedent",
+    TokenKind.EOF: "end of file",
+    TokenKind.IDENTIFIER: "identifier",
+    TokenKind.NUMBER: "integer",
+    TokenKind.FLOAT: "float",
+    TokenKind.STRING: "string",
+    TokenKind.BOOLEAN_LITERAL: "boolean",
+}
+
+
+def build_kind_descriptions():
+    descriptions = dict(KIND_DESCRIPTIONS)
+    for lexeme in constants.KEYWORDS + constants.BUILT_IN_FUNCTIONS:
+        descriptions[TokenKind[lexeme.upper()]] = f"'{lexeme}'"
+    for names in [constants.LOGICAL_OPERATORS, constants.OPERATORS, constants.DELIMITERS]:
+        for lexeme, name in names.items():
+            descriptions[TokenKind[name]] = f"'{lexeme}'"
+    return descriptions
+
+
+class StaleTablesError(Exception):
+    pass
+
+
+# the generated tables; they are only written by ll1_generator.py, ahead of time, a module that no
+# longer matches new_grammar.ebnf or the generator is an error when an LL1Parser is created
+def load_tables():
+    try:
+        digest = ll1_generator.grammar_hash()
+    except FileNotFoundError:
+        # only the generated module is shipped
+        return ll1_tables
+    if ll1_tables.GRAMMAR_HASH != digest:
+        raise StaleTablesError(
+            "ll1_tables.py was generated from another version of new_grammar.ebnf or ll1_generator.py, "
+            "run 'python ll1_generator.py' to generate it again"
+        )
+    return ll1_tables
+
+
+DESCRIPTIONS = build_kind_descriptions()
+
+
+# parses with the LL(1) table generated from new_grammar.ebnf, in one loop over an explicit stack,
+# stops at the first syntax error
+class LL1Parser:
+    # loaded by the first parser, so importing the module works with stale tables
+    tables = None
+
+    def __init__(self, tokens: TokenStream):
+        if LL1Parser.tables is None:
+            LL1Parser.tables = load_tables()
+        self.tokens = tokens
+
+    # returns the syntax error of the script in a list, empty if there is none
+    def parse(self):
+        try:
+            self.run()
+        except ParseError as error:
+            return [error]
+        return []
+
+    def run(self):
+        tokens = self.tokens
+        tables = self.tables
+        expansions, table, nonterminal_base = tables.EXPANSIONS, tables.TABLE, tables.NONTERMINAL_BASE
+        stack = [TokenKind.EOF, tables.START]
+        kind = None if tokens.is_empty() else tokens.peek_kind()
+        while stack:
+            symbol = stack.pop()
+            if symbol >= nonterminal_base:
+                expansion = table[symbol - nonterminal_base].get(kind)
+                if expansion is None:
+                    self.print_error(table[symbol - nonterminal_base])
+                symbols, matched = expansions[expansion]
+                stack.extend(symbols)
+                if not matched:
+                    continue
+            elif symbol != kind:
+                self.print_error([symbol])
+            tokens.skip()
+            kind = None if tokens.is_empty() else tokens.peek_kind()
+
+    def print_error(self, expected):
+        names = sorted(DESCRIPTIONS[TokenKind(kind)] for kind in expected)
+        message = names[0] if len(names) == 1 else ", ".join(names[:-1]) + " or " + names[-1]
+        raise ParseError(f"Expected {message}", self.tokens.peek())
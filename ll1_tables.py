@@ -0,0 +1,285 @@
+# Generated by ll1_generator.py from new_grammar.ebnf, do not edit.
+# fmt: off
+GRAMMAR_HASH = "6ee77f9221ee0d9eb3a34403b3d229b76090b454e88c85f36d09ffbcf5a53616"
+NONTERMINAL_BASE = 64
+START = 64
+NONTERMINAL_NAMES = (
+    "rook_pl",
+    "rook_pl_1",
+    "statement",
+    "compound_stmt",
+    "func_state",
+    "func_state_1",
+    "params",
+    "params_1",
+    "param",
+    "param_1",
+    "expression",
+    "expression_1",
+    "and_test",
+    "and_test_1",
+    "not_test",
+    "not_test_1",
+    "comparison",
+    "comparison_1",
+    "comparison_2",
+    "expr",
+    "expr_1",
+    "expr_2",
+    "factor",
+    "factor_1",
+    "factor_2",
+    "term",
+    "term_1",
+    "term_2",
+    "value",
+    "value_1",
+    "array",
+    "array_1",
+    "array_value",
+    "array_value_1",
+    "array_value_2",
+    "expr_list",
+    "expr_list_1",
+    "rel_op",
+    "block",
+    "block_1",
+    "iter_state",
+    "for_loop",
+    "for_loop_1",
+    "for_loop_2",
+    "while_loop",
+    "cond_state",
+    "cond_state_1",
+    "cond_state_2",
+    "else_st",
+    "elif_st",
+    "which_st",
+    "ins_block",
+    "ins_block_1",
+    "ins_block_2",
+    "default_part",
+    "ins_part",
+    "ins_part_1",
+    "ins_part_2",
+    "ins_part_3",
+    "if_st",
+    "simple_stmt",
+    "simple_stmt_1",
+    "import_state",
+    "import_state_1",
+    "out_state",
+    "out_state_1",
+    "out_args",
+    "out_args_1",
+    "out_arg",
+    "iden_state",
+    "iden_state_1",
+    "call_state",
+    "call_state_1",
+    "args",
+    "args_1",
+    "ass_state",
+    "ass_op",
+    "dec_state",
+    "dec_state_1",
+    "dec_state_2",
+    "in_state",
+    "in_state_1",
+)
+# (symbols pushed on the stack, whether the lookahead token is consumed)
+EXPANSIONS = (
+    ((65, 0, 134), True),
+    ((65, 0, 53, 129, 52), True),
+    ((65, 102, 51, 107, 15, 106, 4), True),
+    ((65, 102, 51, 74), True),
+    ((65, 102, 51, 53, 69, 52, 4), True),
+    ((65, 111, 110, 102, 51, 74), True),
+    ((65, 0, 4), True),
+    ((65, 0, 127, 4, 22, 4), True),
+    ((65, 115, 51, 4), True),
+    ((), False),
+    ((0, 134), True),
+    ((0, 53, 129, 52), True),
+    ((0, 4), True),
+    ((0, 127, 4, 22, 4), True),
+    ((102, 51, 107, 15, 106, 4), True),
+    ((102, 51, 74), True),
+    ((102, 51, 53, 69, 52, 4), True),
+    ((111, 110, 102, 51, 74), True),
+    ((115, 51, 4), True),
+    ((71, 73), True),
+    ((71, 72), True),
+    ((73,), True),
+    ((74,), True),
+    ((75, 77, 82, 85, 88), True),
+    ((75, 77, 80), True),
+    ((75, 77, 82, 85, 88, 92), True),
+    ((75, 77, 82, 85, 88, 53, 74), True),
+    ((75, 77, 82, 85, 88, 55, 95), True),
+    ((75, 76), True),
+    ((77, 82, 85, 88), True),
+    ((77, 80), True),
+    ((77, 82, 85, 88, 92), True),
+    ((77, 82, 85, 88, 53, 74), True),
+    ((77, 82, 85, 88, 55, 95), True),
+    ((77, 78), True),
+    ((82, 85, 88), True),
+    ((80,), True),
+    ((82, 85, 88, 92), True),
+    ((82, 85, 88, 53, 74), True),
+    ((82, 85, 88, 55, 95), True),
+    ((), True),
+    ((15,), True),
+    ((82, 83), True),
+    ((82, 83, 15), True),
+    ((85, 88), True),
+    ((85, 88, 92), True),
+    ((85, 88, 53, 74), True),
+    ((85, 88, 55, 95), True),
+    ((85, 86), True),
+    ((88,), True),
+    ((88, 92), True),
+    ((88, 53, 74), True),
+    ((88, 55, 95), True),
+    ((88, 89), True),
+    ((92,), True),
+    ((53, 74), True),
+    ((55, 95), True),
+    ((98, 100, 75, 77, 82, 85, 88), True),
+    ((98, 100, 75, 77, 80), True),
+    ((98, 100, 75, 77, 82, 85, 88, 92), True),
+    ((98, 100, 75, 77, 82, 85, 88, 53, 74), True),
+    ((98, 100, 75, 77, 82, 85, 88, 55, 95), True),
+    ((5, 51), True),
+    ((97, 5), True),
+    ((100, 75, 77, 82, 85, 88), True),
+    ((100, 75, 77, 80), True),
+    ((100, 75, 77, 82, 85, 88, 92), True),
+    ((100, 75, 77, 82, 85, 88, 53, 74), True),
+    ((100, 75, 77, 82, 85, 88, 55, 95), True),
+    ((100, 74), True),
+    ((2, 103, 66, 1), True),
+    ((103, 0, 134), True),
+    ((103, 0, 53, 129, 52), True),
+    ((103, 102, 51, 107, 15, 106, 4), True),
+    ((103, 102, 51, 74), True),
+    ((103, 102, 51, 53, 69, 52, 4), True),
+    ((103, 111, 110, 102, 51, 74), True),
+    ((103, 0, 4), True),
+    ((103, 0, 127, 4, 22, 4), True),
+    ((103, 115, 51, 4), True),
+    ((4,), True),
+    ((110, 102, 51, 74), True),
+    ((102, 51), True),
+    ((2, 117, 116, 119, 1), True),
+    ((116, 102, 51, 122, 120), True),
+    ((102, 51, 122, 120), True),
+    ((134,), True),
+    ((53, 129, 52), True),
+    ((127, 4, 22, 4), True),
+    ((127, 4), True),
+    ((131, 75, 77, 82, 85, 88), True),
+    ((7, 40), True),
+    ((131, 75, 77, 80), True),
+    ((131, 75, 77, 82, 85, 88, 92), True),
+    ((131, 75, 77, 82, 85, 88, 53, 74), True),
+    ((131, 75, 77, 82, 85, 88, 55, 95), True),
+    ((130,), True),
+    ((143,), True),
+    ((143, 40, 142, 4), True),
+    ((53, 136), True),
+    ((138, 75, 77, 82, 85, 88), True),
+    ((138, 75, 77, 80), True),
+    ((138, 75, 77, 82, 85, 88, 92), True),
+    ((138, 75, 77, 82, 85, 88, 53, 74), True),
+    ((138, 75, 77, 82, 85, 88, 55, 95), True),
+    ((138, 74), True),
+    ((142, 4), True),
+    ((53, 145, 52), True),
+)
+# {token kind: expansion} for every nonterminal
+TABLE = (
+    {4: 0, 9: 1, 11: 2, 12: 3, 16: 4, 18: 5, 22: 6, 23: 7, 26: 8},  # rook_pl
+    {4: 0, 9: 1, 11: 2, 12: 3, 16: 4, 18: 5, 22: 6, 23: 7, 26: 8, 3: 9},  # rook_pl_1
+    {4: 10, 9: 11, 22: 12, 23: 13, 11: 14, 12: 15, 16: 16, 18: 17, 26: 18},  # statement
+    {18: 17, 26: 18, 11: 14, 12: 15, 16: 16},  # compound_stmt
+    {16: 16},  # func_state
+    {4: 19, 53: 9},  # func_state_1
+    {4: 19},  # params
+    {50: 20, 53: 9},  # params_1
+    {4: 21},  # param
+    {40: 22, 50: 9, 53: 9},  # param_1
+    {4: 23, 5: 23, 6: 23, 7: 23, 8: 23, 32: 24, 33: 25, 34: 25, 52: 26, 54: 27},  # expression
+    {31: 28, 0: 9, 24: 9, 50: 9, 51: 9, 53: 9, 55: 9},  # expression_1
+    {4: 29, 5: 29, 6: 29, 7: 29, 8: 29, 32: 30, 33: 31, 34: 31, 52: 32, 54: 33},  # and_test
+    {30: 34, 0: 9, 24: 9, 31: 9, 50: 9, 51: 9, 53: 9, 55: 9},  # and_test_1
+    {4: 35, 5: 35, 6: 35, 7: 35, 8: 35, 32: 36, 33: 37, 34: 37, 52: 38, 54: 39},  # not_test
+    {32: 40, 4: 9, 5: 9, 6: 9, 7: 9, 8: 9, 33: 9, 34: 9, 52: 9, 54: 9},  # not_test_1
+    {4: 35, 5: 35, 6: 35, 7: 35, 8: 35, 33: 37, 34: 37, 52: 38, 54: 39},  # comparison
+    {38: 40, 39: 40, 41: 40, 42: 40, 43: 40, 44: 40, 32: 41, 15: 40},  # comparison_1
+    {15: 42, 32: 43, 38: 42, 39: 42, 41: 42, 42: 42, 43: 42, 44: 42, 0: 9, 24: 9, 30: 9, 31: 9, 50: 9, 51: 9, 53: 9, 55: 9},  # comparison_2
+    {4: 44, 5: 44, 6: 44, 7: 44, 8: 44, 33: 45, 34: 45, 52: 46, 54: 47},  # expr
+    {33: 40, 34: 40},  # expr_1
+    {33: 48, 34: 48, 0: 9, 15: 9, 24: 9, 30: 9, 31: 9, 32: 9, 38: 9, 39: 9, 41: 9, 42: 9, 43: 9, 44: 9, 50: 9, 51: 9, 53: 9, 55: 9},  # expr_2
+    {4: 49, 5: 49, 6: 49, 7: 49, 8: 49, 33: 50, 34: 50, 52: 51, 54: 52},  # factor
+    {35: 40, 36: 40, 37: 40},  # factor_1
+    {35: 53, 36: 53, 37: 53, 0: 9, 15: 9, 24: 9, 30: 9, 31: 9, 32: 9, 33: 9, 34: 9, 38: 9, 39: 9, 41: 9, 42: 9, 43: 9, 44: 9, 50: 9, 51: 9, 53: 9, 55: 9},  # factor_2
+    {4: 40, 5: 40, 6: 40, 7: 40, 8: 40, 33: 54, 34: 54, 52: 55, 54: 56},  # term
+    {33: 40, 34: 40},  # term_1
+    {33: 40, 34: 40, 4: 9, 5: 9, 6: 9, 7: 9, 8: 9, 52: 9, 54: 9},  # term_2
+    {4: 40, 5: 40, 6: 40, 7: 40, 8: 40, 54: 56, 52: 55},  # value
+    {5: 40, 6: 40},  # value_1
+    {54: 56},  # array
+    {4: 57, 5: 57, 6: 57, 7: 57, 8: 57, 32: 58, 33: 59, 34: 59, 52: 60, 54: 61, 55: 9},  # array_1
+    {4: 57, 5: 57, 6: 57, 7: 57, 8: 57, 32: 58, 33: 59, 34: 59, 52: 60, 54: 61},  # array_value
+    {25: 62, 55: 9},  # array_value_1
+    {24: 63, 55: 9},  # array_value_2
+    {4: 64, 5: 64, 6: 64, 7: 64, 8: 64, 32: 65, 33: 66, 34: 66, 52: 67, 54: 68},  # expr_list
+    {50: 69, 0: 9, 24: 9, 55: 9},  # expr_list_1
+    {39: 40, 38: 40, 43: 40, 44: 40, 41: 40, 42: 40},  # rel_op
+    {0: 70},  # block
+    {4: 71, 9: 72, 11: 73, 12: 74, 16: 75, 18: 76, 22: 77, 23: 78, 26: 79, 2: 9},  # block_1
+    {12: 15, 11: 14},  # iter_state
+    {11: 14},  # for_loop
+    {50: 80, 15: 9},  # for_loop_1
+    {4: 40, 54: 56},  # for_loop_2
+    {12: 15},  # while_loop
+    {18: 17, 26: 18},  # cond_state
+    {19: 81, 2: 9, 3: 9, 4: 9, 9: 9, 11: 9, 12: 9, 16: 9, 18: 9, 20: 9, 22: 9, 23: 9, 26: 9},  # cond_state_1
+    {20: 82, 2: 9, 3: 9, 4: 9, 9: 9, 11: 9, 12: 9, 16: 9, 18: 9, 22: 9, 23: 9, 26: 9},  # cond_state_2
+    {20: 82},  # else_st
+    {19: 15},  # elif_st
+    {26: 18},  # which_st
+    {0: 83},  # ins_block
+    {27: 84, 2: 9, 28: 9},  # ins_block_1
+    {28: 82, 2: 9},  # ins_block_2
+    {28: 82},  # default_part
+    {27: 85},  # ins_part
+    {38: 40, 39: 40, 41: 40, 42: 40, 43: 40, 44: 40, 5: 9, 6: 9, 7: 9},  # ins_part_1
+    {5: 40, 6: 40},  # ins_part_2
+    {5: 40, 6: 40, 7: 40},  # ins_part_3
+    {18: 15},  # if_st
+    {4: 10, 9: 11, 22: 12, 23: 13},  # simple_stmt
+    {4: 86, 9: 87, 22: 80, 23: 88},  # simple_stmt_1
+    {22: 80, 23: 88},  # import_state
+    {50: 89, 0: 9},  # import_state_1
+    {9: 87},  # out_state
+    {4: 90, 5: 90, 6: 90, 7: 90, 8: 90, 29: 91, 32: 92, 33: 93, 34: 93, 52: 94, 54: 95, 53: 9},  # out_state_1
+    {29: 91, 4: 90, 5: 90, 6: 90, 7: 90, 8: 90, 32: 92, 33: 93, 34: 93, 52: 94, 54: 95},  # out_args
+    {50: 96, 53: 9},  # out_args_1
+    {29: 91},  # out_arg
+    {4: 86},  # iden_state
+    {40: 97, 50: 98, 45: 22, 46: 22, 47: 22, 48: 22, 52: 99},  # iden_state_1
+    {52: 99},  # call_state
+    {4: 100, 5: 100, 6: 100, 7: 100, 8: 100, 32: 101, 33: 102, 34: 102, 52: 103, 54: 104, 53: 9},  # call_state_1
+    {4: 100, 5: 100, 6: 100, 7: 100, 8: 100, 32: 101, 33: 102, 34: 102, 52: 103, 54: 104},  # args
+    {50: 105, 53: 9},  # args_1
+    {45: 22, 46: 22, 47: 22, 48: 22},  # ass_state
+    {45: 40, 46: 40, 47: 40, 48: 40},  # ass_op
+    {40: 97, 50: 98},  # dec_state
+    {50: 106, 40: 9},  # dec_state_1
+    {10: 107, 4: 64, 5: 64, 6: 64, 7: 64, 8: 64, 32: 65, 33: 66, 34: 66, 52: 67, 54: 68},  # dec_state_2
+    {10: 107},  # in_state
+    {7: 40, 53: 9},  # in_state_1
+)
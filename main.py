@@ -1,23 +1,344 @@
+import argparse
+import io
 import os
 import sys
 
+import profiler
+import table_writer
+from artifact_cache import DEFAULT_DIRECTORY, DEFAULT_MAX_BYTES, Artifact, ArtifactCache
+from bytecode import Program
+from compiler import CompileError, compile_program
 from lexer import Lexer
-from syntax import Parser
+from modules import ModuleCache, ModuleError, ModuleLoader
+from ll1_parser import LL1Parser
+from profiler import Profiler, phase
+from python_backend import CodeCache, PythonModule, UnsupportedByPython, compile_python, run_python
+from regex_lexer import RegexLexer, RegexStreamingLexer
+from runtime_io import DEFAULT_BUFFER_BYTES, FLUSH_POLICIES, InputBuffer, OutputBuffer
+from stream_lexer import StreamingLexer
+from syntax import DEFAULT_MAX_ERRORS, Parser
+from token_stream import LazyTokenStream, TokenStream
+from vm import RookieRuntimeError, run_program
+
+# eager and streaming lexer for each lexing engine
+ENGINES = {
+    "table": (Lexer, StreamingLexer),
+    "regex": (RegexLexer, RegexStreamingLexer),
+}
+PARSERS = ["recursive", "ll1"]
+BACKENDS = ["vm", "python"]
+
+
+# the hand-written parser, or the one generated from new_grammar.ebnf which stops at the first error
+def create_parser(name: str, tokens, max_errors: int = DEFAULT_MAX_ERRORS, build_ast: bool = False):
+    if name == "ll1":
+        return LL1Parser(tokens)
+    return Parser(tokens, max_errors=max_errors, build_ast=build_ast)
+
+
+# lexes and parses the file, reusing the cached tokens and parse result when the source is unchanged
+def load_artifact(
+    filepath: str,
+    lexer_class,
+    cache: ArtifactCache,
+    max_errors: int = DEFAULT_MAX_ERRORS,
+    profile: Profiler | None = None,
+    parser_name: str = "recursive",
+):
+    with phase(profile, "cache_load"):
+        with open(filepath, "rb") as file:
+            source = file.read()
+        artifact = cache.load(source)
+    if artifact is not None:
+        return artifact
+
+    # the lexer gets the same text that was hashed, decoded like open() would
+    with phase(profile, "load"):
+        lexer = lexer_class(filepath, io.TextIOWrapper(io.BytesIO(source)).read())
+    if profile is not None:
+        profile.instrument_lexer(lexer)
+    with phase(profile, "lex"):
+        lexer.start_parse()
+
+    parser = create_parser(parser_name, lexer.get_tokens(), max_errors)
+    if profile is not None:
+        profile.instrument_parser(parser)
+    with phase(profile, "parse"):
+        diagnostics = parser.parse()
+    parse_error = "\n".join(str(error) for error in diagnostics) if diagnostics else None
+
+    artifact = Artifact(lexer.get_tokens().get_tokens(), parse_error)
+    with phase(profile, "cache_store"):
+        cache.store(source, artifact.tokens, artifact.parse_error)
+    return artifact
+
+
+# bytecode for the virtual machine, or a Python module; scripts nested deeper than Python allows and
+# scripts with imports fall back to the virtual machine
+def compile_script(arena, backend: str = "vm"):
+    if backend == "python":
+        try:
+            return compile_python(arena)
+        except UnsupportedByPython:
+            pass
+    return compile_program(arena)
+
+
+# runs a compiled script with the modules it imports, returns the exit code; the output goes through
+# the buffer, which is written out when the script ends
+def execute(compiled, profile: Profiler | None = None, modules: dict | None = None, output: OutputBuffer | None = None):
+    # the warnings of the scope pass go to stderr, so the output of the script stays as it is
+    warnings = compiled.warnings
+    for module in (modules or {}).values():
+        warnings = warnings + module.warnings
+    for warning in warnings:
+        print(warning, file=sys.stderr)
+    output = output if output is not None else OutputBuffer(sys.stdout)
+    input_buffer = InputBuffer(sys.stdin)
+    try:
+        with phase(profile, "run"):
+            if isinstance(compiled, PythonModule):
+                run_python(compiled, output, input_buffer)
+            else:
+                run_program(compiled, output, input_buffer, modules)
+    except RookieRuntimeError as error:
+        output.close()
+        print(error)
+        return 1
+    finally:
+        output.close()
+    return 0
+
+
+# compiles the syntax tree of the script at filepath with the backend and the modules it imports with
+# the loader, and runs it; returns the exit code. The Python module is stored in the code cache when
+# one is given
+def run_script(
+    arena,
+    profile: Profiler | None = None,
+    backend: str = "vm",
+    loader: ModuleLoader | None = None,
+    filepath: str = "",
+    code_cache: CodeCache | None = None,
+    source=b"",
+    output: OutputBuffer | None = None,
+):
+    modules = None
+    try:
+        with phase(profile, "compile"):
+            compiled = compile_script(arena, backend)
+        if loader is not None and isinstance(compiled, Program) and compiled.imports:
+            with phase(profile, "modules"):
+                modules = loader.load(filepath, compiled)
+    except (CompileError, ModuleError) as error:
+        print(error)
+        return 1
+    if code_cache is not None and isinstance(compiled, PythonModule):
+        with phase(profile, "code_cache_store"):
+            code_cache.store(source, compiled)
+    return execute(compiled, profile, modules, output)
+
+
+# prints every syntax error and exits with 1, or reports success
+def report_diagnostics(diagnostics: list):
+    if diagnostics:
+        for error in diagnostics:
+            print(error)
+        sys.exit(1)
+    print("Parsing successful")
+
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
+    arg_parser = argparse.ArgumentParser(description="Lexes and parses a Rookie script.")
+    arg_parser.add_argument("filepath", nargs="?", help="path to a .rook file")
+    arg_parser.add_argument(
+        "--check",
+        action="store_true",
+        help="only check the syntax, streaming the file without building the token table",
+    )
+    arg_parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="table",
+        help="lexing engine, 'regex' tokenizes each line with one regex and falls back to 'table' on errors",
+    )
+    arg_parser.add_argument(
+        "--parser",
+        choices=PARSERS,
+        default="recursive",
+        help="'ll1' parses with the table generated from new_grammar.ebnf and reports only the first error",
+    )
+    arg_parser.add_argument(
+        "--run",
+        action="store_true",
+        help="run the script after parsing it, with the bytecode compiler and virtual machine",
+    )
+    arg_parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="vm",
+        help="how --run executes the script, 'python' transpiles it to Python code and caches the compiled "
+        "code with --cache-dir",
+    )
+    arg_parser.add_argument(
+        "--flush",
+        choices=FLUSH_POLICIES,
+        help="when --run writes buffered output: after every line, also before input(), only when the buffer is "
+        "full, or only at exit (default: 'line' on a terminal, 'input' otherwise)",
+    )
+    arg_parser.add_argument(
+        "--buffer-size",
+        type=int,
+        default=DEFAULT_BUFFER_BYTES // 1024,
+        metavar="KB",
+        help="size of the output buffer of --run",
+    )
+    arg_parser.add_argument(
+        "--module-path",
+        action="append",
+        default=[],
+        metavar="DIR",
+        help="also look for imported modules in DIR, after the directory of the script; can be given more than once",
+    )
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        metavar="N",
+        help="processes compiling imported modules in parallel (default: all cores)",
+    )
+    arg_parser.add_argument(
+        "--cache-dir",
+        metavar="DIR",
+        help=f"reuse tokens and parse results of unchanged files from a cache directory, e.g. {DEFAULT_DIRECTORY}",
+    )
+    arg_parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        metavar="MB",
+        help="size limit of the cache directory, least recently used entries are removed first",
+    )
+    arg_parser.add_argument(
+        "--table-format",
+        choices=table_writer.FORMATS,
+        default="table",
+        help="format of the token table, 'table' is the .rtable text layout",
+    )
+    arg_parser.add_argument(
+        "--table-output",
+        metavar="PATH",
+        help="where to write the token table (default: rookie-tables/<name> with the format's extension)",
+    )
+    arg_parser.add_argument("--no-table", action="store_true", help="do not write the token table")
+    arg_parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help=f"write phase timings and lexer/parser counters as JSON to PATH and collapsed stacks to a .folded file "
+        f"next to it, also turned on by the {profiler.ENVIRONMENT_VARIABLE} environment variable",
+    )
+    arg_parser.add_argument(
+        "--max-errors",
+        type=int,
+        default=DEFAULT_MAX_ERRORS,
+        metavar="N",
+        help="stop parsing after N syntax errors",
+    )
+    args = arg_parser.parse_args()
+    if args.run and (args.check or args.parser != "recursive"):
+        arg_parser.error("--run needs the syntax tree of the hand-written parser, without --check")
+
+    filepath = args.filepath
+    if filepath is None:
         raise Exception("No file specified")
 
-    filepath = sys.argv[1]
     if not os.path.isfile(filepath):
         raise FileNotFoundError("File not found")
 
     if not filepath.endswith(".rook"):
         raise TypeError("File extension must end with .rook")
 
-    lexer = Lexer(filepath)
-    lexer.start_parse()
-    lexer.output_table()
+    profile_path = args.profile or os.environ.get(profiler.ENVIRONMENT_VARIABLE)
+    profile = Profiler() if profile_path else None
+
+    eager_lexer, streaming_lexer = ENGINES[args.engine]
+    loader = output = None
+    if args.run:
+        output = OutputBuffer(sys.stdout, args.flush, args.buffer_size * 1024)
+        loader = ModuleLoader(
+            [os.path.dirname(os.path.abspath(filepath)), *args.module_path],
+            ModuleCache(args.cache_dir, args.cache_size * 1024 * 1024) if args.cache_dir else None,
+            args.workers,
+        )
+    if args.check:
+        lexer = streaming_lexer(filepath)
+        if profile is not None:
+            profile.instrument_lexer(lexer)
+        # lexing and parsing are interleaved, so they are timed as one phase
+        with phase(profile, "check"):
+            parser = create_parser(args.parser, LazyTokenStream(lexer.tokens()), args.max_errors)
+            if profile is not None:
+                profile.instrument_parser(parser)
+            diagnostics = parser.parse()
+    elif args.cache_dir:
+        cache = ArtifactCache(args.cache_dir, args.cache_size * 1024 * 1024, args.parser, args.max_errors)
+        artifact = load_artifact(filepath, eager_lexer, cache, args.max_errors, profile, args.parser)
+        if not args.no_table:
+            output_path = args.table_output or table_writer.default_output_path(
+                os.path.basename(filepath).split(".")[0], args.table_format
+            )
+            with phase(profile, "output_table"):
+                table_writer.write_table(artifact.tokens, output_path, args.table_format)
+
+        exit_code = 0
+        if artifact.parse_error is None and args.run:
+            code_cache = module = None
+            source = b""
+            if args.backend == "python":
+                code_cache = CodeCache(args.cache_dir, args.cache_size * 1024 * 1024)
+                with phase(profile, "code_cache_load"):
+                    with open(filepath, "rb") as file:
+                        source = file.read()
+                    module = code_cache.load(source)
+            if module is not None:
+                exit_code = execute(module, profile, output=output)
+            else:
+                # the cache keeps the tokens, the syntax tree is built again from them
+                with phase(profile, "parse"):
+                    parser = Parser(TokenStream(artifact.tokens), build_ast=True)
+                    parser.parse()
+                exit_code = run_script(parser.ast, profile, args.backend, loader, filepath, code_cache, source, output)
+
+        if profile is not None:
+            profile.write(profile_path)
+        if artifact.parse_error is not None:
+            print(artifact.parse_error)
+            sys.exit(1)
+        if not args.run:
+            print("Parsing successful")
+        sys.exit(exit_code)
+    else:
+        with phase(profile, "load"):
+            lexer = eager_lexer(filepath)
+        if profile is not None:
+            profile.instrument_lexer(lexer)
+        with phase(profile, "lex"):
+            lexer.start_parse()
+        if not args.no_table:
+            with phase(profile, "output_table"):
+                lexer.output_table(args.table_format, args.table_output)
+
+        parser = create_parser(args.parser, lexer.get_tokens(), args.max_errors, args.run)
+        if profile is not None:
+            profile.instrument_parser(parser)
+        with phase(profile, "parse"):
+            diagnostics = parser.parse()
+        if args.run and not diagnostics:
+            exit_code = run_script(parser.ast, profile, args.backend, loader, filepath, output=output)
+            if profile is not None:
+                profile.write(profile_path)
+            sys.exit(exit_code)
 
-    parser = Parser(lexer.get_tokens())
-    parser.parse()
+    if profile is not None:
+        profile.write(profile_path)
+    report_diagnostics(diagnostics)
@@ -0,0 +1,202 @@
+import hashlib
+import io
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import ast_arena
+import bytecode
+import compiler
+import scopes
+from artifact_cache import DEFAULT_DIRECTORY, DEFAULT_MAX_BYTES, ArtifactCache
+from bytecode import Program
+from compiler import CompileError, compile_program
+from lexer import Lexer, LexerError
+from syntax import Parser
+
+# states of a module while looking for import cycles
+VISITING, DONE = range(2)
+
+
+# a module that cannot be found or compiled, or an import cycle, reported with the file of the import
+class ModuleError(Exception):
+    def __init__(self, message: str, path: str):
+        super().__init__(message)
+        self.message = message
+        self.path = path
+
+    def __str__(self):
+        return f"{self.path}: {self.message}"
+
+
+# the name a script is imported by, its file name without the extension
+def module_name(path: str):
+    return os.path.basename(path).split(".")[0]
+
+
+# the file of a module, <name>.rook in the first directory of the search path that has one
+def find_module(name: str, search_path: list):
+    for directory in search_path:
+        path = os.path.join(directory, name + ".rook")
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+# lexes, parses and compiles one module, also in a worker process; returns the program and None, or
+# None and the error
+def compile_source(path: str, source: bytes, name: str):
+    try:
+        lexer = Lexer(path, io.TextIOWrapper(io.BytesIO(source)).read())
+        lexer.start_parse()
+        parser = Parser(lexer.get_tokens(), build_ast=True)
+        diagnostics = parser.parse()
+        if diagnostics:
+            return None, "\n".join(str(error) for error in diagnostics)
+        return compile_program(parser.ast, name), None
+    except LexerError as error:
+        return None, f"Error at line {error.line_no}: {error.message}"
+    except (CompileError, UnicodeDecodeError) as error:
+        return None, str(error)
+    except RecursionError:
+        return None, "Script is nested too deeply"
+
+
+# (importer, line, names) of the first import cycle reachable from the module, or None
+def find_cycle(name: str, programs: dict):
+    states = {name: VISITING}
+    path = [name]
+    stack = [(name, iter(programs[name].imports))]
+    while stack:
+        importer, imports = stack[-1]
+        for module, line_no in imports:
+            if states.get(module) == VISITING:
+                return importer, line_no, path[path.index(module) :] + [module]
+            if module not in states:
+                states[module] = VISITING
+                path.append(module)
+                stack.append((module, iter(programs[module].imports)))
+                break
+        else:
+            states[importer] = DONE
+            path.pop()
+            stack.pop()
+    return None
+
+
+# compiled modules, keyed by the module name, its source and everything that changes the bytecode
+class ModuleCache(ArtifactCache):
+    extension = ".rookmod"
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY, max_bytes: int = DEFAULT_MAX_BYTES):
+        super().__init__(directory, max_bytes)
+        digest = hashlib.sha256(self._version.encode())
+        for module in [ast_arena, bytecode, compiler, scopes]:
+            with open(module.__file__, "rb") as file:
+                digest.update(file.read())
+        self._version = digest.hexdigest()
+
+    # returns the cached program of the module, or None on a miss
+    def load(self, name: str, source: bytes):
+        path = self.path_for(name.encode() + b"\0" + source)
+        try:
+            with open(path, "rb") as file:
+                program = pickle.loads(file.read())
+            os.utime(path)
+        except (OSError, EOFError, ValueError, TypeError, AttributeError, pickle.UnpicklingError):
+            return None
+        return program
+
+    def store(self, name: str, source: bytes, program: Program):
+        path = self.path_for(name.encode() + b"\0" + source)
+        self.write_entry(path, [pickle.dumps(program, pickle.HIGHEST_PROTOCOL)])
+        self.evict()
+
+
+# finds and compiles the modules a program imports, directly or through other modules; a module is
+# compiled once per loader however often it is imported, unchanged modules come from the cache, and
+# the modules first imported at the same depth are compiled in parallel
+class ModuleLoader:
+    def __init__(self, search_path: list, cache: ModuleCache | None = None, workers: int = 0):
+        self.search_path = search_path
+        self.cache = cache
+        self.workers = workers or os.cpu_count() or 1
+        # {path: (source, program)} of every module compiled or loaded so far
+        self._compiled = {}
+        self._executor = None
+        # how many modules were compiled, loaded from the cache and reused from an earlier load
+        self.stats = {"compiled": 0, "cached": 0, "reused": 0}
+
+    # {name: Program} of every module the program at path imports, raises ModuleError for a module that
+    # is missing or does not compile and for an import cycle
+    def load(self, path: str, program: Program):
+        name = module_name(path)
+        programs = {name: program}
+        paths = {name: path}
+        level = [name]
+        try:
+            while level:
+                found = {}
+                for importer in level:
+                    for module, line_no in programs[importer].imports:
+                        if module in programs or module in found:
+                            continue
+                        module_path = find_module(module, self.search_path)
+                        if module_path is None:
+                            raise ModuleError(f"Error at line {line_no}: Module '{module}' not found", paths[importer])
+                        found[module] = module_path
+                programs.update(self.compile_modules(found))
+                paths.update(found)
+                level = list(found)
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+        cycle = find_cycle(name, programs)
+        if cycle is not None:
+            importer, line_no, names = cycle
+            raise ModuleError(f"Error at line {line_no}: Import cycle {' -> '.join(names)}", paths[importer])
+        del programs[name]
+        return programs
+
+    # {name: Program} of the modules, the ones not compiled before are compiled across the worker pool
+    def compile_modules(self, paths: dict):
+        programs = {}
+        missing = []
+        for name, path in paths.items():
+            try:
+                with open(path, "rb") as file:
+                    source = file.read()
+            except OSError as error:
+                raise ModuleError(str(error), path) from None
+            compiled = self._compiled.get(path)
+            if compiled is not None and compiled[0] == source:
+                programs[name] = compiled[1]
+                self.stats["reused"] += 1
+                continue
+            program = self.cache.load(name, source) if self.cache is not None else None
+            if program is None:
+                missing.append((path, source, name))
+                continue
+            programs[name] = program
+            self._compiled[path] = (source, program)
+            self.stats["cached"] += 1
+
+        # starting the pool costs more than compiling a single module
+        if len(missing) > 1 and self.workers > 1:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.workers)
+            results = list(self._executor.map(compile_source, *zip(*missing)))
+        else:
+            results = [compile_source(*module) for module in missing]
+
+        for (path, source, name), (program, error) in zip(missing, results):
+            if error is not None:
+                raise ModuleError(error, path)
+            programs[name] = program
+            self._compiled[path] = (source, program)
+            self.stats["compiled"] += 1
+            if self.cache is not None:
+                self.cache.store(name, source, program)
+        return programs
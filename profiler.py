@@ -0,0 +1,188 @@
+import contextlib
+import json
+import os
+import time
+
+import scanner_table
+from lexer import Lexer
+
+# setting this environment variable to a path turns profiling on, like main.py --profile
+ENVIRONMENT_VARIABLE = "ROOKIE_PROFILE"
+# parser methods that are helpers and not productions of the grammar
+PARSER_HELPERS = {
+    "match",
+    "match_any",
+    "consume",
+    "consume_any",
+    "advance",
+    "print_error",
+    "record_error",
+    "parse",
+    "add_node",
+    "reduce_operators",
+}
+# parser helpers whose results are counted as hits and misses
+COUNTED_HELPERS = ("match", "match_any", "consume", "consume_any")
+
+
+# collects timings and counters of one run, the lexer and parser are only changed by instrument_lexer
+# and instrument_parser, so nothing is measured and nothing is slower when no profiler is created
+class Profiler:
+    def __init__(self):
+        self.phases = {}
+        self.state_visits = [0] * len(scanner_table.TRANSITIONS)
+        # name: [calls, cumulative seconds, seconds without the nested productions]
+        self.productions = {}
+        # name: [hits, misses]
+        self.helper_results = {name: [0, 0] for name in COUNTED_HELPERS}
+        # "phase;production;nested production": seconds spent in the last frame of the stack
+        self.stacks = {}
+        self._stack = []
+        self._child_times = []
+        # seconds spent counting state visits so far, left out of the phase they happen in
+        self._counting_time = 0.0
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        self._stack.append(name)
+        start = time.perf_counter()
+        counting_start = self._counting_time
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = time.perf_counter() - start - (self._counting_time - counting_start)
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    # counts the characters seen by each scanner state, only the table-driven scanner is counted; the
+    # counting is timed as a phase of its own, "count_states", so the lexing phase does not include it
+    def instrument_lexer(self, lexer: Lexer):
+        if type(lexer).generate_tokens is not Lexer.generate_tokens:
+            return
+
+        generate_tokens = lexer.generate_tokens
+
+        def counted_generate_tokens(line: str):
+            cursor, state = lexer._cursor, lexer._current_state
+            try:
+                generate_tokens(line)
+            finally:
+                start = time.perf_counter()
+                self.count_state_visits(line, cursor, state)
+                counting = time.perf_counter() - start
+                self._counting_time += counting
+                self.phases["count_states"] = self.phases.get("count_states", 0.0) + counting
+
+        lexer.generate_tokens = counted_generate_tokens
+
+    # runs the transition table over the line again, without emitting tokens
+    def count_state_visits(self, line: str, cursor: int, state: int):
+        char_classes = scanner_table.CHAR_CLASSES
+        transitions = scanner_table.TRANSITIONS
+        visits = self.state_visits
+        while cursor < len(line):
+            visits[state] += 1
+            action, next_state = transitions[state][char_classes.get(line[cursor], scanner_table.OTHER)]
+            if action == scanner_table.CONSUME:
+                cursor += 1
+                state = next_state
+            elif action == scanner_table.EMIT or action == scanner_table.CONSUME_EMIT:
+                if action == scanner_table.CONSUME_EMIT:
+                    cursor += 1
+                state = 0
+            elif action == scanner_table.SKIP:
+                cursor += 1
+            elif action == scanner_table.MOVE:
+                state = next_state
+            else:
+                break
+
+    # wraps the productions and the counted helpers of this parser object only
+    def instrument_parser(self, parser):
+        for name in dir(type(parser)):
+            if name.startswith("_") or not callable(getattr(type(parser), name)):
+                continue
+            if name in COUNTED_HELPERS:
+                setattr(parser, name, self.counted(name, getattr(parser, name)))
+            elif name not in PARSER_HELPERS:
+                setattr(parser, name, self.timed(name, getattr(parser, name)))
+
+    def counted(self, name: str, method):
+        results = self.helper_results[name]
+
+        def counted_method(*args):
+            result = method(*args)
+            results[0 if result else 1] += 1
+            return result
+
+        return counted_method
+
+    def timed(self, name: str, method):
+        stack, child_times = self._stack, self._child_times
+
+        def timed_method(*args, **kwargs):
+            stack.append(name)
+            child_times.append(0.0)
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                own = elapsed - child_times.pop()
+                key = ";".join(stack)
+                stack.pop()
+                if child_times:
+                    child_times[-1] += elapsed
+
+                entry = self.productions.setdefault(name, [0, 0.0, 0.0])
+                entry[0] += 1
+                entry[1] += elapsed
+                entry[2] += own
+                self.stacks[key] = self.stacks.get(key, 0.0) + own
+
+        return timed_method
+
+    def to_dict(self):
+        helpers = {}
+        for name, (hits, misses) in self.helper_results.items():
+            total = hits + misses
+            helpers[name] = {"hits": hits, "misses": misses, "hit_ratio": hits / total if total else 0.0}
+
+        return {
+            "phases": self.phases,
+            "lexer": {
+                "characters": sum(self.state_visits),
+                "state_visits": {str(state): visits for state, visits in enumerate(self.state_visits)},
+            },
+            "parser": {
+                "productions": {
+                    name: {"calls": calls, "cumulative_seconds": cumulative, "own_seconds": own}
+                    for name, (calls, cumulative, own) in sorted(self.productions.items(), key=lambda item: -item[1][1])
+                },
+                **helpers,
+            },
+        }
+
+    # one "frame;frame microseconds" line per stack, phases are the root frames
+    def collapsed_stacks(self):
+        own_times = dict(self.phases)
+        for stack, own in self.stacks.items():
+            root = stack.split(";", 1)[0]
+            if root in own_times:
+                own_times[root] -= own
+
+        lines = [f"{phase} {round(max(0.0, own) * 1e6)}" for phase, own in own_times.items()]
+        lines.extend(f"{stack} {round(own * 1e6)}" for stack, own in self.stacks.items())
+        return "\n".join(lines) + "\n"
+
+    # writes the JSON report to path and the collapsed stacks next to it with a .folded extension
+    def write(self, path: str):
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+        with open(os.path.splitext(path)[0] + ".folded", "w") as file:
+            file.write(self.collapsed_stacks())
+
+
+# times a phase when profiling, does nothing when profile is None
+def phase(profile: Profiler | None, name: str):
+    return profile.phase(name) if profile is not None else contextlib.nullcontext()
@@ -0,0 +1,565 @@
+import dis
+import hashlib
+import importlib.util
+import marshal
+import os
+import re
+import sys
+
+import ast_arena
+import compiler
+import scopes
+import vm
+from artifact_cache import DEFAULT_DIRECTORY, DEFAULT_MAX_BYTES, ArtifactCache
+from bytecode import OPERATOR_SYMBOLS
+from ast_arena import NO_TOKEN, AstArena, NodeKind
+from compiler import LITERAL_KINDS, CompileError, counting_range, declared_values, literal_value, range_step
+from scopes import LocalNames, ScopeWarning, resolve_scopes
+from token_kinds import TokenKind
+from vm import (
+    MAX_CALL_DEPTH,
+    NESTED_VALUE_MESSAGE,
+    RangeArray,
+    RookieRuntimeError,
+    article,
+    build_range,
+    count_range,
+    format_value,
+    not_callable_message,
+    read_input,
+    type_name,
+)
+
+# the file name of the generated code in tracebacks, to find the lines of runtime errors
+FILENAME = "<rookie>"
+# Python rejects deeper parentheses and indentation, such scripts are run by the virtual machine
+MAX_EXPRESSION_DEPTH = 150
+MAX_BLOCK_DEPTH = 90
+# every Rookie name gets a prefix, so it cannot be a Python keyword or one of the runtime helpers
+NAME_PREFIX = "r_"
+PREFIXED_NAME = re.compile(rf"\b{NAME_PREFIX}(\w+)")
+UNBOUND_LOCAL = re.compile(rf"(?:local|free) variable '{NAME_PREFIX}(\w+)'")
+# Python's messages of the type errors a script can cause, as the virtual machine words them (a
+# template or a function of the type names)
+TYPE_ERRORS = [
+    (
+        re.compile(r"(\w+)\(\) missing \d+ required positional arguments?: '(\w+)'"),
+        "'{0}' is missing the argument '{1}'",
+    ),
+    (
+        re.compile(r"(\w+)\(\) takes (\d+) positional arguments? but (\d+) (?:were|was) given"),
+        "'{0}' takes {1} arguments but {2} were given",
+    ),
+    (re.compile(r"unsupported operand type\(s\) for ([^:]+):"), "Unsupported operand types for '{0}'"),
+    (re.compile(r"'(\S+)' not supported between instances"), "Unsupported operand types for '{0}'"),
+    (re.compile(r"bad operand type for unary ([+-])"), "Unsupported operand type for unary '{0}'"),
+    (re.compile(r"can only concatenate"), "Unsupported operand types for '+'"),
+    (re.compile(r"can't multiply sequence"), "Unsupported operand types for '*'"),
+    (re.compile(r"is not iterable|'in <string>' requires"), "Unsupported operand types for 'in'"),
+    (re.compile(r"'(\w+)' object is not callable"), not_callable_message),
+]
+# the sign of the Python instructions of a unary '-' or '+', by the name or argument dis shows for them
+UNARY_INSTRUCTIONS = {
+    "UNARY_NEGATIVE": "-",
+    "UNARY_POSITIVE": "+",
+    "INTRINSIC_UNARY_POSITIVE": "+",
+}
+# the binary instructions of Python before 3.11 had one opcode per operator
+BINARY_INSTRUCTIONS = {
+    "BINARY_ADD": "+",
+    "BINARY_SUBTRACT": "-",
+    "BINARY_MULTIPLY": "*",
+    "BINARY_TRUE_DIVIDE": "/",
+    "BINARY_MODULO": "%",
+}
+ROOKIE_OPERATORS = frozenset(OPERATOR_SYMBOLS.values())
+# the Rookie names of the Python types in messages
+TYPE_NAMES = {
+    "int": "integer",
+    "float": "float",
+    "str": "string",
+    "bool": "boolean",
+    "list": "array",
+    "RangeArray": "array",
+}
+PYTHON_OPERATORS = {
+    TokenKind.PLUS: "+",
+    TokenKind.MINUS: "-",
+    TokenKind.MULTIPLY: "*",
+    TokenKind.DIVIDE: "/",
+    TokenKind.MODULO: "%",
+    TokenKind.LESS: "<",
+    TokenKind.GREATER: ">",
+    TokenKind.EQUAL: "==",
+    TokenKind.NOTEQUAL: "!=",
+    TokenKind.GREATEROREQUAL: ">=",
+    TokenKind.LESSOREQUAL: "<=",
+    TokenKind.IN: "in",
+    TokenKind.NOT: "not in",
+    TokenKind.AND: "and",
+    TokenKind.OR: "or",
+    TokenKind.PLUSASSIGN: "+",
+    TokenKind.MINUSASSIGN: "-",
+    TokenKind.MULTIPLYASSIGN: "*",
+    TokenKind.DIVIDEASSIGN: "/",
+}
+# the nodes whose token is a name the statement or expression uses
+NAMED_KINDS = frozenset(
+    [NodeKind.NAME, NodeKind.DECLARATION, NodeKind.ASSIGN, NodeKind.CALL, NodeKind.WHICH, NodeKind.FUNCTION]
+)
+# the nodes whose token is a name the statement assigns without declaring it
+ASSIGNED_KINDS = frozenset([NodeKind.ASSIGN])
+
+
+# raised for a script the Python compiler cannot take
+class UnsupportedByPython(Exception):
+    pass
+
+
+# raised by the called function, the error is reported at the line of the call
+class MissingArgument(ValueError):
+    pass
+
+
+# the compiled code of a script and the Rookie line of every line of the generated source
+class PythonModule:
+    def __init__(self, code, line_map: tuple, source: str = "", warnings: list | None = None):
+        self.code = code
+        self.line_map = line_map
+        # the generated source, empty when the module was loaded from the cache
+        self.source = source
+        # the ScopeWarning of every variable or function the scope pass found missing
+        self.warnings = warnings if warnings is not None else []
+
+
+# translates the syntax tree of a script to Python source with the same meaning as the bytecode:
+# names assigned in a function are its locals, the locals of the enclosing functions it reads or
+# updates are Python closures, and every other name it uses is declared global
+class Transpiler:
+    def __init__(self, arena: AstArena):
+        self.arena = arena
+        self.tokens = arena.tokens
+        self.lines = []
+        self.line_map = []
+        self._depth = 0
+        self._line = 0
+        # the locals of the functions enclosing the one being translated
+        self._outer_names = set()
+
+    def transpile(self):
+        try:
+            for statement in self.arena.children(self.arena.root):
+                self.statement(statement)
+        except ValueError as error:
+            raise CompileError(str(error), self._line) from None
+        if not self.lines:
+            self.write("pass")
+        return "\n".join(self.lines) + "\n", tuple(self.line_map)
+
+    def write(self, text: str):
+        self.lines.append("    " * self._depth + text)
+        self.line_map.append(self._line)
+
+    def name(self, node: int, data: bool = False):
+        return NAME_PREFIX + self.arena.lexeme(node, data)
+
+    def token_kind(self, token: int):
+        return self.tokens.kind_at(token)
+
+    # ---- Expression ----
+
+    def literal(self, node: int):
+        value = literal_value(self.token_kind(self.arena.token(node)), self.arena.lexeme(node))
+        # a float too long for a double is written as inf by repr
+        return repr(value) if value not in (float("inf"), float("-inf")) else f"float('{value}')"
+
+    # the Python expression of the node, built with an explicit stack like the bytecode compiler
+    def expression(self, root: int):
+        arena = self.arena
+        # (text, depth of parentheses) of the operands built so far
+        results = []
+        pending = [(root, False)]
+        while pending:
+            node, ready = pending.pop()
+            kind = arena.kind(node)
+            if kind in LITERAL_KINDS:
+                results.append((self.literal(node), 0))
+                continue
+            if kind == NodeKind.NAME:
+                results.append((self.name(node), 0))
+                continue
+            children = arena.children(node)
+            if not ready:
+                pending.append((node, True))
+                pending.extend((child, False) for child in reversed(children))
+                continue
+
+            operands = results[len(results) - len(children) :]
+            del results[len(results) - len(children) :]
+            depth = max((operand_depth for _, operand_depth in operands), default=0) + 1
+            if depth > MAX_EXPRESSION_DEPTH:
+                raise UnsupportedByPython("Expression nested too deep")
+            texts = [text for text, _ in operands]
+            if kind == NodeKind.BINARY:
+                text = f"({texts[0]} {PYTHON_OPERATORS[self.token_kind(arena.token(node))]} {texts[1]})"
+            elif kind == NodeKind.NOT:
+                text = f"(not {texts[0]})"
+            elif kind == NodeKind.UNARY:
+                text = f"({PYTHON_OPERATORS[self.token_kind(arena.token(node))]}{texts[0]})"
+            elif kind == NodeKind.ARRAY:
+                text = f"[{', '.join(texts)}]"
+            elif kind == NodeKind.RANGE:
+                text = f"_rt_range([{', '.join(texts[:-1])}], {texts[-1]}, {range_step(arena, node)})"
+            else:
+                raise Exception(f"Cannot transpile {kind.name} as an expression")
+            results.append((text, depth))
+        return results[0][0]
+
+    # an expression or an input() call
+    def value(self, node: int):
+        if self.arena.kind(node) == NodeKind.INPUT:
+            prompt = self.arena.children(node)
+            return f"_rt_input({self.expression(prompt[0]) if prompt else ''})"
+        return self.expression(node)
+
+    # ---- Statement ----
+
+    def statement(self, node: int):
+        self._line = self.arena.line_no(node)
+        getattr(self, STATEMENTS[self.arena.kind(node)])(node)
+
+    def block(self, node: int):
+        self._depth += 1
+        if self._depth > MAX_BLOCK_DEPTH:
+            raise UnsupportedByPython("Blocks nested too deep")
+        for statement in self.arena.children(node):
+            self.statement(statement)
+        self._depth -= 1
+
+    def declaration_statement(self, node: int):
+        names, values = declared_values(self.arena, node)
+        values = [self.value(value) for value in values]
+        if len(names) > 1:
+            targets = [NAME_PREFIX + self.tokens.fields_at(name)[1] for name in names]
+            self.write(f"{', '.join(targets)} = {', '.join(values)}")
+            return
+        self.write(f"{self.name(node)} = {values[0] if len(values) == 1 else '[' + ', '.join(values) + ']'}")
+
+    # written out in full, += would extend an array that other variables share
+    def assign_statement(self, node: int):
+        name = self.name(node)
+        operator = PYTHON_OPERATORS[self.token_kind(self.arena.data(node))]
+        self.write(f"{name} = {name} {operator} ({self.expression(self.arena.child(node, 0))})")
+
+    def output_statement(self, node: int):
+        separator = " " if self.arena.data(node) == NO_TOKEN else self.arena.lexeme(node, True)[1:-1]
+        values = [self.expression(value) for value in self.arena.children(node)]
+        self.write(f"_rt_print({', '.join([repr(separator)] + values)})")
+
+    def call_statement(self, node: int):
+        arguments = [self.expression(argument) for argument in self.arena.children(node)]
+        self.write(f"{self.name(node)}({', '.join(arguments)})")
+
+    def if_statement(self, node: int):
+        arena = self.arena
+        children = arena.children(node)
+        self.write(f"if {self.expression(children[0])}:")
+        self.block(children[1])
+        for branch in children[2:]:
+            self._line = arena.line_no(branch)
+            if arena.kind(branch) == NodeKind.ELIF:
+                condition, block = arena.children(branch)
+                self.write(f"elif {self.expression(condition)}:")
+                self.block(block)
+            else:
+                self.write("else:")
+                self.block(arena.child(branch, 0))
+
+    def which_statement(self, node: int):
+        arena = self.arena
+        name = self.name(node)
+        keyword = "if"
+        for arm in arena.children(node):
+            self._line = arena.line_no(arm)
+            if arena.kind(arm) == NodeKind.DEFAULT:
+                if keyword == "if":
+                    # only a default, it always runs
+                    self._depth -= 1
+                    self.block(arena.child(arm, 0))
+                    self._depth += 1
+                else:
+                    self.write("else:")
+                    self.block(arena.child(arm, 0))
+                continue
+            operator = arena.data(arm)
+            symbol = "==" if operator == NO_TOKEN else PYTHON_OPERATORS[self.token_kind(operator)]
+            self.write(f"{keyword} {name} {symbol} {self.literal(arm)}:")
+            self.block(arena.child(arm, 0))
+            keyword = "elif"
+
+    def while_statement(self, node: int):
+        condition, block = self.arena.children(node)
+        self.write(f"while {self.expression(condition)}:")
+        self.block(block)
+
+    def for_statement(self, node: int):
+        arena = self.arena
+        iterable, block = arena.children(node)
+        pair = arena.data(node) != NO_TOKEN
+        if not pair and counting_range(arena, iterable):
+            # for i in [a to b]: counts through a Python range, the array is never built
+            bounds = ["0"] * (2 - arena.child_count(iterable))
+            bounds += [self.expression(child) for child in arena.children(iterable)]
+            iterator = f"_rt_count({', '.join(bounds)}, {range_step(arena, iterable)})"
+        else:
+            iterator = f"_rt_iter({self.expression(iterable)})"
+        if pair:
+            self.write(f"for {self.name(node)}, {self.name(node, True)} in enumerate({iterator}):")
+        else:
+            self.write(f"for {self.name(node)} in {iterator}:")
+        self.block(block)
+
+    # modules are linked by the virtual machine
+    def import_statement(self, node: int):
+        raise UnsupportedByPython("Scripts with imports run on the virtual machine")
+
+    def function_statement(self, node: int):
+        arena = self.arena
+        children = arena.children(node)
+        parameters, body = children[:-1], children[-1]
+        names = [arena.lexeme(parameter) for parameter in parameters]
+        function_name = arena.lexeme(node)
+        # the defaults are evaluated once, when the function is defined
+        declared = []
+        # parameters after one with a default get a marker default, Python does not allow them without
+        checked = []
+        has_default = False
+        for parameter, name in zip(parameters, names):
+            if names.count(name) > 1:
+                raise CompileError(f"Duplicate parameter '{name}' in '{function_name}'", self._line)
+            if arena.child_count(parameter):
+                declared.append(f"{NAME_PREFIX}{name}={self.expression(arena.child(parameter, 0))}")
+                has_default = True
+            elif has_default:
+                declared.append(f"{NAME_PREFIX}{name}=_rt_missing")
+                checked.append(name)
+            else:
+                declared.append(NAME_PREFIX + name)
+        self.write(f"def {NAME_PREFIX}{function_name}({', '.join(declared)}):")
+
+        collector = LocalNames(arena)
+        collector.visit(arena, body)
+        local_names = set(names) | set(collector.names)
+        global_names = sorted(self.used_names(body) - local_names - self._outer_names)
+        # locals of the enclosing functions updated with an assignment like 'x += 1'
+        outer_assigned = sorted(self.used_names(body, ASSIGNED_KINDS) - local_names & self._outer_names)
+        self._depth += 1
+        if global_names:
+            self.write("global " + ", ".join(NAME_PREFIX + name for name in global_names))
+        if outer_assigned:
+            self.write("nonlocal " + ", ".join(NAME_PREFIX + name for name in outer_assigned))
+        for name in checked:
+            self.write(f"if {NAME_PREFIX}{name} is _rt_missing:")
+            self.write(f"    _rt_missing_argument({function_name!r}, {name!r})")
+        self._depth -= 1
+        outer_names = self._outer_names
+        self._outer_names = outer_names | local_names
+        self.block(body)
+        self._outer_names = outer_names
+
+    # the names used in the body by nodes of the given kinds, the bodies of nested functions have
+    # their own scope
+    def used_names(self, body: int, kinds: frozenset = NAMED_KINDS):
+        arena = self.arena
+        names = set()
+        pending = [body]
+        while pending:
+            node = pending.pop()
+            kind = arena.kind(node)
+            if kind in kinds:
+                names.add(arena.lexeme(node))
+            if kind == NodeKind.FOR:
+                names.add(arena.lexeme(node))
+            children = arena.children(node)
+            pending.extend(children[:-1] if kind == NodeKind.FUNCTION else children)
+        return names
+
+
+# the method translating each statement node
+STATEMENTS = {
+    NodeKind.DECLARATION: "declaration_statement",
+    NodeKind.ASSIGN: "assign_statement",
+    NodeKind.PRINT: "output_statement",
+    NodeKind.CALL: "call_statement",
+    NodeKind.IF: "if_statement",
+    NodeKind.WHICH: "which_statement",
+    NodeKind.WHILE: "while_statement",
+    NodeKind.FOR: "for_statement",
+    NodeKind.FUNCTION: "function_statement",
+    NodeKind.IMPORT: "import_statement",
+}
+
+
+# transpiles the syntax tree and compiles the source, raises UnsupportedByPython when Python rejects it
+def compile_python(arena: AstArena):
+    source, line_map = Transpiler(arena).transpile()
+    try:
+        code = compile(source, FILENAME, "exec")
+    except (SyntaxError, RecursionError, MemoryError) as error:
+        raise UnsupportedByPython(str(error)) from None
+    return PythonModule(code, line_map, source, resolve_scopes(arena).warnings)
+
+
+# the globals of the generated code: the runtime helpers and only the builtins it calls
+def runtime_namespace(output, input_stream):
+    write = output.write
+    missing = object()
+
+    def print_values(separator, *values):
+        write(separator.join([format_value(value) for value in values]) + "\n")
+
+    def input_line(prompt=""):
+        return read_input(output, input_stream, format_value(prompt))
+
+    def iterate(value):
+        if type(value) is not list and type(value) is not str and type(value) is not RangeArray:
+            name = type_name(value)
+            raise ValueError(f"Cannot loop over {article(name)} {name}")
+        return value
+
+    def missing_argument(function_name, name):
+        raise MissingArgument(f"'{function_name}' is missing the argument '{name}'")
+
+    return {
+        "__builtins__": {"enumerate": enumerate, "float": float},
+        "_rt_print": print_values,
+        "_rt_input": input_line,
+        "_rt_iter": iterate,
+        "_rt_range": build_range,
+        "_rt_count": count_range,
+        "_rt_missing": missing,
+        "_rt_missing_argument": missing_argument,
+    }
+
+
+# the Rookie line of every generated frame of the traceback, the innermost last
+def error_lines(error: Exception, line_map: tuple):
+    lines = []
+    traceback = error.__traceback__
+    while traceback is not None:
+        if traceback.tb_frame.f_code.co_filename == FILENAME:
+            lines.append(line_map[traceback.tb_lineno - 1])
+        traceback = traceback.tb_next
+    return lines
+
+
+# the Rookie line of the innermost generated frame of the traceback
+def error_line(error: Exception, line_map: tuple):
+    lines = [0] + error_lines(error, line_map)
+    return lines[-2] if isinstance(error, MissingArgument) and len(lines) > 2 else lines[-1]
+
+
+# the message of the virtual machine for a type error of an operator, found from the instruction of
+# the innermost generated frame, so it names the operator of the script even when Python words the
+# error after another one, like the reflected comparison; None when no operator failed
+def operator_message(error: Exception):
+    frame = None
+    traceback = error.__traceback__
+    while traceback is not None:
+        if traceback.tb_frame.f_code.co_filename == FILENAME:
+            frame = traceback
+        traceback = traceback.tb_next
+    if frame is None:
+        return None
+    instruction = next(
+        (item for item in dis.get_instructions(frame.tb_frame.f_code) if item.offset == frame.tb_lasti), None
+    )
+    if instruction is None:
+        return None
+    name = instruction.opname
+    sign = UNARY_INSTRUCTIONS.get(name, UNARY_INSTRUCTIONS.get(instruction.argrepr))
+    if sign is not None:
+        return f"Unsupported operand type for unary '{sign}'"
+    if name == "CONTAINS_OP":
+        symbol = "not in" if instruction.argval else "in"
+    elif name == "BINARY_OP" or name == "COMPARE_OP":
+        # newer versions show a comparison converted to a boolean as bool(<)
+        symbol = instruction.argrepr.removeprefix("bool(").removesuffix(")")
+    else:
+        symbol = BINARY_INSTRUCTIONS.get(name)
+    if symbol not in ROOKIE_OPERATORS:
+        return None
+    return f"Unsupported operand types for '{symbol}'"
+
+
+def error_message(error: Exception, line_map: tuple):
+    if isinstance(error, ZeroDivisionError):
+        return "Division by zero"
+    if isinstance(error, OverflowError):
+        return "Number too large"
+    # every call is a generated frame, an operation on deeply nested arrays recurses in few of them
+    if isinstance(error, RecursionError):
+        calls = len(error_lines(error, line_map)) >= MAX_CALL_DEPTH
+        return "Too many nested calls" if calls else NESTED_VALUE_MESSAGE
+    # a local of the function or of an enclosing one
+    match = UNBOUND_LOCAL.search(str(error)) if isinstance(error, NameError) else None
+    if isinstance(error, UnboundLocalError) or match:
+        return f"Variable '{match.group(1) if match else '?'}' is used before it is assigned"
+    if isinstance(error, NameError):
+        name = (error.name or "").removeprefix(NAME_PREFIX)
+        return f"Variable '{name}' is not defined"
+    message = PREFIXED_NAME.sub(r"\1", str(error))
+    if isinstance(error, TypeError):
+        operator = operator_message(error)
+        if operator is not None:
+            return operator
+        for pattern, template in TYPE_ERRORS:
+            match = pattern.search(message)
+            if match:
+                names = [TYPE_NAMES.get(group, group) for group in match.groups()]
+                return template(*names) if callable(template) else template.format(*names)
+    return message
+
+
+def run_python(module: PythonModule, output=None, input_stream=None):
+    output = output if output is not None else sys.stdout
+    input_stream = input_stream if input_stream is not None else sys.stdin
+    recursion_limit = sys.getrecursionlimit()
+    # as many nested calls as the virtual machine allows
+    sys.setrecursionlimit(max(recursion_limit, MAX_CALL_DEPTH + 100))
+    try:
+        exec(module.code, runtime_namespace(output, input_stream))
+    except (TypeError, ValueError, NameError, ZeroDivisionError, OverflowError, RecursionError) as error:
+        raise RookieRuntimeError(error_message(error, module.line_map), error_line(error, module.line_map)) from None
+    finally:
+        sys.setrecursionlimit(recursion_limit)
+
+
+# compiled modules of scripts, keyed by the source and everything that changes the generated code
+class CodeCache(ArtifactCache):
+    extension = ".rookpy"
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY, max_bytes: int = DEFAULT_MAX_BYTES):
+        super().__init__(directory, max_bytes)
+        digest = hashlib.sha256(self._version.encode() + importlib.util.MAGIC_NUMBER)
+        for module in [ast_arena, compiler, scopes, vm, sys.modules[__name__]]:
+            with open(module.__file__, "rb") as file:
+                digest.update(file.read())
+        self._version = digest.hexdigest()
+
+    # returns the cached module of the source, or None on a miss
+    def load(self, source: bytes):
+        path = self.path_for(source)
+        try:
+            with open(path, "rb") as file:
+                code, line_map, warnings = marshal.loads(file.read())
+            os.utime(path)
+        except (OSError, ValueError, EOFError, TypeError):
+            return None
+        return PythonModule(code, line_map, warnings=[ScopeWarning(*warning) for warning in warnings])
+
+    # the warnings are kept with the code, a module loaded from the cache skips the scope pass
+    def store(self, source: bytes, module: PythonModule):
+        warnings = tuple((warning.message, warning.line_no) for warning in module.warnings)
+        self.write_entry(self.path_for(source), [marshal.dumps((module.code, module.line_map, warnings))])
+        self.evict()
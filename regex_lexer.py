@@ -0,0 +1,78 @@
+import re
+
+import constants
+import scanner_table
+from lexer import Lexer
+from stream_lexer import StreamingLexer
+from token_kinds import TokenKind
+
+
+def char_class(chars):
+    return "[" + "".join(re.escape(char) for char in chars) + "]"
+
+
+def build_token_pattern():
+    alpha = char_class(constants.ALPHABET)
+    alphanumeric = char_class(constants.ALPHABET + constants.DIGITS)
+    digit = char_class(constants.DIGITS)
+    operator = char_class([operator for operator in constants.OPERATORS if len(operator) == 1])
+
+    # every alternative only matches what the state machine would accept, with the same
+    # lexeme boundaries, anything else leaves a gap and the line is scanned again precisely
+    return re.compile(
+        "|".join(
+            [
+                f"(?P<SPACE>{char_class(constants.SPACES)}+)",
+                # an underscore must be followed by a letter or digit
+                f"(?P<IDENTIFIER>{alpha}{alphanumeric}*(?:_+{alphanumeric}+)*(?!_))",
+                # a dot must be followed by a digit, and a number cannot run into a letter
+                f"(?P<NUMBER>{digit}+(?:\\.{digit}+)*(?!{alpha}|\\.))",
+                '(?P<STRING>"[^"]*")',
+                # double operators cannot be followed by '=', single ones by another operator
+                f"(?P<OPERATOR>(?:{operator}|!)=(?!=)|{operator}(?!{operator}))",
+                f"(?P<DELIMITER>{char_class(constants.DELIMITERS)})",
+            ]
+        )
+    )
+
+
+TOKEN_PATTERN = build_token_pattern()
+
+
+class RegexLexer(Lexer):
+    # Generate tokens for the current line with one regex, falling back to the state machine
+    def generate_tokens(self, line: str):
+        line_tokens = []
+        position = self._cursor
+
+        for match in TOKEN_PATTERN.finditer(line, self._cursor):
+            if match.start() != position:
+                break
+            position = match.end()
+
+            group = match.lastgroup
+            if group == "SPACE":
+                continue
+
+            lexeme = match.group()
+            if group == "NUMBER":
+                kind = TokenKind.FLOAT if "." in lexeme else TokenKind.NUMBER
+            elif group == "STRING":
+                kind = TokenKind.STRING
+            else:
+                # unknown operators like '%=' fall back to IDENTIFIER, as in classify_token
+                kind = scanner_table.TOKEN_KINDS.get(lexeme, TokenKind.IDENTIFIER)
+            line_tokens.append((kind, lexeme, position))
+
+        # the line has an invalid lexeme, let the state machine report it
+        if position != len(line):
+            super().generate_tokens(line)
+            return
+
+        for kind, lexeme, column_no in line_tokens:
+            self.emit(kind, lexeme, column_no, self._current_indentation)
+        self._cursor = position
+
+
+class RegexStreamingLexer(RegexLexer, StreamingLexer):
+    pass
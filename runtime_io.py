@@ -0,0 +1,111 @@
+import io
+
+# when the buffered output of a script is written out, from the most to the least eager; every
+# policy also writes what is left when the script ends
+FLUSH_POLICIES = ["line", "input", "size", "exit"]
+DEFAULT_BUFFER_BYTES = 64 * 1024
+
+
+# the flush policy for a stream: line by line on a terminal, in large writes otherwise
+def default_policy(stream):
+    return "line" if stream is not None and is_interactive(stream) else "input"
+
+
+def is_interactive(stream):
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+# what print() and the prompts of input() write, kept in memory and written to the stream in large
+# pieces:
+#   line   every line as soon as it is complete
+#   input  when the buffer is full and before input() reads, so the prompt is seen
+#   size   only when the buffer is full
+#   exit   only when the script ends
+# Without a stream the output is captured, getvalue() returns all of it
+class OutputBuffer:
+    def __init__(self, stream=None, policy: str | None = None, buffer_bytes: int = DEFAULT_BUFFER_BYTES):
+        if policy is None:
+            policy = default_policy(stream)
+        if policy not in FLUSH_POLICIES:
+            raise ValueError(f"Unknown flush policy '{policy}'")
+        self.stream = stream
+        self.policy = policy
+        self._chunks = []
+        self._size = 0
+        # the buffered characters that make write() flush, never reached under 'exit'
+        self._limit = buffer_bytes if policy in ["input", "size"] else float("inf")
+        self._captured = [] if stream is None else None
+        if policy == "line":
+            self.write = self._write_line
+        elif policy == "exit":
+            # nothing to check on a write
+            self.write = self._chunks.append
+
+    def write(self, text: str):
+        self._chunks.append(text)
+        self._size += len(text)
+        if self._size >= self._limit:
+            self._write_out()
+        return len(text)
+
+    def _write_line(self, text: str):
+        self._chunks.append(text)
+        if text.endswith("\n"):
+            self._write_out()
+        return len(text)
+
+    # called before input() reads a line, writes the prompt out unless the policy holds it back
+    def flush(self):
+        if self.policy in ["line", "input"]:
+            self._write_out()
+
+    # writes everything that is left, when the script ends or stops with an error
+    def close(self):
+        self._write_out()
+
+    def _write_out(self):
+        if not self._chunks:
+            return
+        text = "".join(self._chunks)
+        self._chunks.clear()
+        self._size = 0
+        if self._captured is not None:
+            self._captured.append(text)
+        else:
+            self.stream.write(text)
+            self.stream.flush()
+
+    # all the output captured so far, with what is still buffered
+    def getvalue(self):
+        return "".join((self._captured or []) + self._chunks)
+
+
+# the lines input() reads; when the stream is not a terminal all of it is read at the first input()
+# and the lines are handed out from memory
+class InputBuffer:
+    def __init__(self, stream, preload: bool | None = None):
+        self.stream = stream
+        self.preload = not is_interactive(stream) if preload is None else preload
+        self._lines = None
+        self._next = 0
+
+    # the next line with its newline, or "" when the input is exhausted
+    def readline(self):
+        if not self.preload:
+            return self.stream.readline()
+        if self._lines is None:
+            # split like readline() does, only at '\n'
+            self._lines = io.StringIO(self.stream.read()).readlines()
+        if self._next >= len(self._lines):
+            return ""
+        line = self._lines[self._next]
+        self._next += 1
+        return line
+
+
+# an input buffer over a string, for running scripts in a harness
+def input_from(text: str):
+    return InputBuffer(io.StringIO(text), True)
@@ -0,0 +1,108 @@
+import constants
+from token_kinds import TokenKind
+
+# character classes
+OTHER = 0
+SPACE = 1
+ALPHA = 2
+DIGIT = 3
+UNDERSCORE = 4
+DOT = 5
+DELIMITER = 6
+OPERATOR = 7
+EQUALS = 8
+BANG = 9
+QUOTE = 10
+CLASS_COUNT = 11
+
+# actions taken for a (state, character class) pair
+CONSUME = 0  # add the character to the lexeme and go to the next state
+SKIP = 1  # skip the character without starting a lexeme
+EMIT = 2  # emit the lexeme, the character is scanned again from state 0
+CONSUME_EMIT = 3  # add the character to the lexeme and emit it
+MOVE = 4  # go to the next state and scan the same character again
+ERROR = 5  # the lexeme with the character is invalid
+
+
+def build_char_classes():
+    char_classes = {}
+    for char in constants.SPACES:
+        char_classes[char] = SPACE
+    for char in constants.ALPHABET:
+        char_classes[char] = ALPHA
+    for char in constants.DIGITS:
+        char_classes[char] = DIGIT
+    for char in constants.DELIMITERS:
+        char_classes[char] = DELIMITER
+    for operator in constants.OPERATORS:
+        if len(operator) == 1:
+            char_classes[operator] = OPERATOR
+    char_classes["_"] = UNDERSCORE
+    char_classes["."] = DOT
+    char_classes["="] = EQUALS
+    char_classes["!"] = BANG
+    char_classes['"'] = QUOTE
+    return char_classes
+
+
+def build_row(default, transitions):
+    row = [default] * CLASS_COUNT
+    for char_class, transition in transitions.items():
+        row[char_class] = transition
+    return tuple(row)
+
+
+def build_transitions():
+    return (
+        # initial state
+        build_row(
+            (ERROR, 0),
+            {
+                SPACE: (SKIP, 0),
+                DELIMITER: (CONSUME_EMIT, 0),
+                DOT: (CONSUME_EMIT, 0),
+                ALPHA: (CONSUME, 1),
+                DIGIT: (CONSUME, 3),
+                OPERATOR: (CONSUME, 5),
+                EQUALS: (CONSUME, 5),
+                BANG: (CONSUME, 7),
+                QUOTE: (CONSUME, 8),
+            },
+        ),
+        # identifier, keyword, and boolean literals
+        build_row((EMIT, 0), {ALPHA: (CONSUME, 1), DIGIT: (CONSUME, 1), UNDERSCORE: (MOVE, 2)}),
+        # identifier with underscore
+        build_row((ERROR, 0), {UNDERSCORE: (CONSUME, 2), ALPHA: (MOVE, 1), DIGIT: (MOVE, 1)}),
+        # number
+        build_row((EMIT, 0), {ALPHA: (ERROR, 0), DIGIT: (CONSUME, 3), DOT: (CONSUME, 4)}),
+        # float number
+        build_row((ERROR, 0), {DIGIT: (MOVE, 3)}),
+        # single operators (+ - * / % > < =), invalid double operators (-+, ++, =+, --)
+        build_row((EMIT, 0), {EQUALS: (CONSUME, 6), OPERATOR: (ERROR, 0)}),
+        # double operators (+= -= *= /= >= <= ==)
+        build_row((EMIT, 0), {EQUALS: (ERROR, 0)}),
+        # not equal (!=)
+        build_row((ERROR, 0), {EQUALS: (CONSUME, 6)}),
+        # string
+        build_row((CONSUME, 8), {QUOTE: (CONSUME_EMIT, 0)}),
+    )
+
+
+def build_token_kinds():
+    # later entries win, so the lookup keeps the precedence of the original if/elif chain
+    token_kinds = {}
+    for name in constants.BUILT_IN_FUNCTIONS:
+        token_kinds[name] = TokenKind[name.upper()]
+    for symbols in [constants.DELIMITERS, constants.OPERATORS, constants.LOGICAL_OPERATORS]:
+        for lexeme, name in symbols.items():
+            token_kinds[lexeme] = TokenKind[name]
+    for literal in constants.BOOLEAN_LITERAL:
+        token_kinds[literal] = TokenKind.BOOLEAN_LITERAL
+    for keyword in constants.KEYWORDS:
+        token_kinds[keyword] = TokenKind[keyword.upper()]
+    return token_kinds
+
+
+CHAR_CLASSES = build_char_classes()
+TRANSITIONS = build_transitions()
+TOKEN_KINDS = build_token_kinds()
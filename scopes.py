@@ -0,0 +1,306 @@
+import sys
+from array import array
+
+from ast_arena import NO_TOKEN, AstArena, NodeKind, Visitor, declaration_parts
+
+
+# the names a function body assigns, which are its locals; a nested function is a local of
+# the body, but the names it assigns are not
+class LocalNames(Visitor):
+    def __init__(self, arena: AstArena):
+        self.arena = arena
+        self.names = []
+
+    def add(self, name: str):
+        if name not in self.names:
+            self.names.append(name)
+
+    def enter_declaration(self, node: int):
+        for name in declaration_parts(self.arena, node)[0]:
+            self.add(self.arena.tokens.fields_at(name)[1])
+
+    def enter_for(self, node: int):
+        self.add(self.arena.lexeme(node))
+        if self.arena.data(node) != NO_TOKEN:
+            self.add(self.arena.lexeme(node, True))
+
+    def enter_function(self, node: int):
+        self.add(self.arena.lexeme(node))
+        return False
+
+    def enter_import(self, node: int):
+        for name in self.arena.children(node):
+            self.add(self.arena.lexeme(name))
+
+
+# the functions a script defines at the top level with 'define' and assigns in no other way, so a call
+# to them can be checked against their parameters
+class FunctionDefinitions(Visitor):
+    def __init__(self, arena: AstArena):
+        self.arena = arena
+        self.definitions = {}
+        self.redefined = set()
+
+    def enter_function(self, node: int):
+        name = self.arena.lexeme(node)
+        if name in self.definitions:
+            self.redefined.add(name)
+        self.definitions[name] = node
+        return False
+
+    def functions(self, assigned: set):
+        return {
+            name: node for name, node in self.definitions.items() if name not in self.redefined and name not in assigned
+        }
+
+
+# the variables of the program or of one function by slot, the parameters of a function come first;
+# the names are interned, so looking them up compares pointers
+class Scope:
+    def __init__(self, depth: int, names: list | None = None):
+        # 0 for the globals, the nesting of the function for its locals
+        self.depth = depth
+        self.names = []
+        self.slots = {}
+        for name in names or []:
+            self.slot(name)
+
+    # the slot of the name, a new one the first time
+    def slot(self, name: str):
+        slot = self.slots.get(name)
+        if slot is None:
+            name = sys.intern(name)
+            slot = self.slots[name] = len(self.names)
+            self.names.append(name)
+        return slot
+
+
+# a variable or function that is certainly or likely missing when the script runs; it is reported
+# but the script still runs
+class ScopeWarning:
+    def __init__(self, message: str, line_no: int, module: str = ""):
+        self.message = message
+        self.line_no = line_no
+        self.module = module
+
+    def __str__(self):
+        if self.module:
+            return f"Warning in module '{self.module}' at line {self.line_no}: {self.message}"
+        return f"Warning at line {self.line_no}: {self.message}"
+
+
+# the result of the scope pass: the (depth, slot) of every identifier token, the slots of the globals
+# and of the locals of every function, and the warnings
+class ScopeTable:
+    def __init__(self, token_count: int):
+        # -1 for the tokens that are not identifiers
+        self.depths = array("i", [-1]) * token_count
+        self.slots = array("i", [-1]) * token_count
+        self.globals = Scope(0)
+        # {FUNCTION node: Scope}
+        self.functions = {}
+        self.warnings = []
+
+    def resolve(self, token: int):
+        return self.depths[token], self.slots[token]
+
+
+# resolves every identifier of a script to the global or local slot it uses, walking the statements
+# in source order to find the variables used before they are assigned; names assigned inside a
+# function are its locals, a name it only reads or updates with 'x += 1' is a local of the nearest
+# enclosing function that has it, or else a global of the script
+class ScopeResolver:
+    def __init__(self, arena: AstArena, module: str = ""):
+        self.arena = arena
+        self.module = module
+        self.table = ScopeTable(len(arena.tokens))
+        collector = LocalNames(arena)
+        collector.visit(arena, arena.root)
+        # every name the top level assigns, wherever it is in the script
+        self.module_names = set(collector.names)
+        definitions = FunctionDefinitions(arena)
+        definitions.visit(arena, arena.root)
+        variables = set(collector.names) - set(definitions.definitions)
+        self.functions = definitions.functions(variables)
+        # 'import m' brings names that are only known when m is compiled
+        self.imports_all = any(
+            arena.kind(node) == NodeKind.IMPORT and not arena.child_count(node)
+            for node, entering in arena.walk()
+            if entering
+        )
+        self._scope = self.table.globals
+        # the scopes of the functions enclosing the current one, outermost first
+        self._enclosing = []
+        # the names of the current scope assigned so far, in source order
+        self._assigned = set()
+        self._line = 0
+
+    def resolve(self):
+        for statement in self.arena.children(self.arena.root):
+            self.statement(statement)
+        return self.table
+
+    def warn(self, message: str):
+        self.table.warnings.append(ScopeWarning(message, self._line, self.module))
+
+    # the slot of a name in the current function or the nearest enclosing one, or in the globals
+    def bind(self, token: int, name: str):
+        scope = self._scope
+        if name not in scope.slots:
+            scope = next((outer for outer in reversed(self._enclosing) if name in outer.slots), None)
+        if scope is not None and scope.depth:
+            self.table.depths[token] = scope.depth
+            self.table.slots[token] = scope.slots[name]
+        else:
+            self.table.depths[token] = 0
+            self.table.slots[token] = self.table.globals.slot(name)
+
+    def store(self, token: int):
+        name = self.arena.tokens.fields_at(token)[1]
+        self.bind(token, name)
+        self._assigned.add(name)
+
+    def load(self, token: int, called: bool = False):
+        name = self.arena.tokens.fields_at(token)[1]
+        self.bind(token, name)
+        depth = self.table.depths[token]
+        if depth == 0 and name not in self.module_names:
+            if not self.imports_all:
+                self.warn(f"{'Function' if called else 'Variable'} '{name}' is not defined")
+        # globals and locals of an enclosing function read inside a function are assigned by the time
+        # it is called
+        elif name not in self._assigned and depth == self._scope.depth:
+            if called:
+                self.warn(f"Function '{name}' is called before it is defined")
+            else:
+                self.warn(f"Variable '{name}' is used before it is assigned")
+
+    def expression(self, root: int):
+        arena = self.arena
+        for node, entering in arena.walk(root):
+            if entering and arena.kind(node) == NodeKind.NAME:
+                self.load(arena.token(node))
+
+    def statement(self, node: int):
+        self._line = self.arena.line_no(node)
+        getattr(self, STATEMENTS[self.arena.kind(node)])(node)
+
+    def block(self, node: int):
+        for statement in self.arena.children(node):
+            self.statement(statement)
+
+    def declaration_statement(self, node: int):
+        names, values = declaration_parts(self.arena, node)
+        for value in values:
+            self.expression(value)
+        for name in names:
+            self.store(name)
+
+    def assign_statement(self, node: int):
+        self.load(self.arena.token(node))
+        self.expression(self.arena.child(node, 0))
+        self.store(self.arena.token(node))
+
+    def output_statement(self, node: int):
+        for value in self.arena.children(node):
+            self.expression(value)
+
+    def call_statement(self, node: int):
+        arena = self.arena
+        self.load(arena.token(node), True)
+        arguments = arena.children(node)
+        for argument in arguments:
+            self.expression(argument)
+        definition = self.functions.get(arena.lexeme(node))
+        if definition is None or self.table.depths[arena.token(node)] != 0:
+            return
+        # the checks of the virtual machine's CALL, made before the script runs
+        name = arena.lexeme(node)
+        parameters = arena.children(definition)[:-1]
+        if len(arguments) > len(parameters):
+            self.warn(f"'{name}' takes {len(parameters)} arguments but {len(arguments)} were given")
+        for parameter in parameters[len(arguments) :]:
+            if not arena.child_count(parameter):
+                self.warn(f"'{name}' is missing the argument '{arena.lexeme(parameter)}'")
+                break
+
+    def if_statement(self, node: int):
+        arena = self.arena
+        children = arena.children(node)
+        self.expression(children[0])
+        self.block(children[1])
+        for branch in children[2:]:
+            self._line = arena.line_no(branch)
+            if arena.kind(branch) == NodeKind.ELIF:
+                self.expression(arena.child(branch, 0))
+            self.block(arena.children(branch)[-1])
+
+    def which_statement(self, node: int):
+        self.load(self.arena.token(node))
+        for arm in self.arena.children(node):
+            self._line = self.arena.line_no(arm)
+            self.block(self.arena.child(arm, 0))
+
+    def while_statement(self, node: int):
+        condition, block = self.arena.children(node)
+        self.expression(condition)
+        self.block(block)
+
+    def for_statement(self, node: int):
+        arena = self.arena
+        iterable, block = arena.children(node)
+        self.expression(iterable)
+        self.store(arena.token(node))
+        if arena.data(node) != NO_TOKEN:
+            self.store(arena.data(node))
+        self.block(block)
+
+    # the defaults are expressions of the enclosing scope, evaluated once when the function is defined
+    def function_statement(self, node: int):
+        arena = self.arena
+        children = arena.children(node)
+        parameters, body = children[:-1], children[-1]
+        for parameter in parameters:
+            if arena.child_count(parameter):
+                self.expression(arena.child(parameter, 0))
+        self.store(arena.token(node))
+
+        names = [arena.lexeme(parameter) for parameter in parameters]
+        collector = LocalNames(arena)
+        collector.visit(arena, body)
+        scope = Scope(self._scope.depth + 1, names + collector.names)
+        self.table.functions[node] = scope
+        enclosing = self._scope, self._assigned, self._line
+        if self._scope.depth:
+            self._enclosing.append(self._scope)
+        self._scope = scope
+        self._assigned = set()
+        for parameter in parameters:
+            self.store(arena.token(parameter))
+        self.block(body)
+        self._scope, self._assigned, self._line = enclosing
+        if self._scope.depth:
+            self._enclosing.pop()
+
+    def import_statement(self, node: int):
+        for name in self.arena.children(node):
+            self.store(self.arena.token(name))
+
+
+# the method resolving each statement node
+STATEMENTS = {
+    NodeKind.DECLARATION: "declaration_statement",
+    NodeKind.ASSIGN: "assign_statement",
+    NodeKind.PRINT: "output_statement",
+    NodeKind.CALL: "call_statement",
+    NodeKind.IF: "if_statement",
+    NodeKind.WHICH: "which_statement",
+    NodeKind.WHILE: "while_statement",
+    NodeKind.FOR: "for_statement",
+    NodeKind.FUNCTION: "function_statement",
+    NodeKind.IMPORT: "import_statement",
+}
+
+
+def resolve_scopes(arena: AstArena, module: str = ""):
+    return ScopeResolver(arena, module).resolve()
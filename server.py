@@ -0,0 +1,313 @@
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from compiler import CompileError, compile_program
+from lexer import Lexer, LexerError
+from runtime_io import OutputBuffer, input_from
+from syntax import Parser
+from vm import INSTRUCTION_LIMIT_MESSAGE, VM, RookieRuntimeError
+
+try:
+    import resource
+except ImportError:
+    # there are no resource limits on Windows, runs are not capped in memory there
+    resource = None
+
+DEFAULT_TIMEOUT = 5.0
+DEFAULT_MAX_INSTRUCTIONS = 50_000_000
+DEFAULT_MEMORY_MB = 256
+# the error of a script whose blocks are nested deeper than the parser and the compiler recurse
+NESTING_MESSAGE = "Script is nested too deeply"
+# the largest request body, source and input together
+MAX_REQUEST_BYTES = 1024 * 1024
+# imported once by the fork server, so the workers forked from it start with them loaded
+PRELOADED_MODULES = ["__main__", "lexer", "syntax", "compiler", "vm", "runtime_io"]
+# a run that ends with one of these leaves its worker unusable, it is replaced
+FATAL_STATUSES = frozenset(["timeout", "memory_limit", "crashed"])
+
+
+class RunResult:
+    def __init__(self, status: str, stdout: str = "", diagnostics: list[str] | None = None, stats: dict | None = None):
+        # "ok", "syntax_error", "compile_error", "runtime_error", "instruction_limit", "memory_limit",
+        # "timeout" or "crashed"
+        self.status = status
+        self.stdout = stdout
+        # the errors and the warnings of the scope pass, in the format of main.py
+        self.diagnostics = diagnostics or []
+        # instructions, wall_ms, cpu_ms and max_rss_kb of the run
+        self.stats = stats or {}
+
+    def to_dict(self):
+        return {"status": self.status, "stdout": self.stdout, "diagnostics": self.diagnostics, "stats": self.stats}
+
+
+# caps the address space of the process at its current size plus limit bytes, or lifts the cap
+def limit_memory(limit: int | None):
+    if resource is None:
+        return
+    hard = resource.getrlimit(resource.RLIMIT_AS)[1]
+    if limit is None:
+        resource.setrlimit(resource.RLIMIT_AS, (hard, hard))
+        return
+    try:
+        with open("/proc/self/statm") as file:
+            size = int(file.read().split()[0]) * resource.getpagesize()
+    except OSError:
+        # no way to know the current size, the cap would be a guess
+        return
+    soft = size + limit if hard == resource.RLIM_INFINITY else min(size + limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+def max_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource is not None else 0
+
+
+# lexes, parses, compiles and runs one script with its input in memory, counting its instructions;
+# errors of the script are returned instead of raised
+def run_source(source: str, stdin: str = "", max_instructions: int | None = None, memory_limit: int | None = None):
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    output = OutputBuffer()
+    diagnostics = []
+    status = "ok"
+    vm = None
+    limit_memory(memory_limit)
+    try:
+        lexer = Lexer("<source>", source)
+        lexer.start_parse()
+        parser = Parser(lexer.get_tokens(), build_ast=True)
+        # blocks are parsed and compiled recursively, the virtual machine reports its own recursion as
+        # a runtime error
+        try:
+            errors = [str(error) for error in parser.parse()]
+        except RecursionError:
+            errors = [NESTING_MESSAGE]
+        if errors:
+            status = "syntax_error"
+            diagnostics = errors
+        else:
+            try:
+                program = compile_program(parser.ast, count_instructions=True)
+            except RecursionError:
+                raise CompileError(NESTING_MESSAGE, 1) from None
+            diagnostics = [str(warning) for warning in program.warnings]
+            vm = VM(program, output, input_from(stdin), max_instructions=max_instructions)
+            vm.run()
+    except LexerError as error:
+        status = "syntax_error"
+        diagnostics.append(f"Error at line {error.line_no}: {error.message}")
+    except CompileError as error:
+        status = "compile_error"
+        diagnostics.append(str(error))
+    except RookieRuntimeError as error:
+        status = "instruction_limit" if error.message == INSTRUCTION_LIMIT_MESSAGE else "runtime_error"
+        diagnostics.append(str(error))
+    except MemoryError:
+        # the output is dropped to have memory for the result
+        output = OutputBuffer()
+        status = "memory_limit"
+        diagnostics.append("Memory limit exceeded")
+    finally:
+        limit_memory(None)
+    stats = {
+        "instructions": vm.instructions if vm is not None else 0,
+        "wall_ms": round((time.perf_counter() - start) * 1000, 3),
+        "cpu_ms": round((time.process_time() - cpu_start) * 1000, 3),
+        "max_rss_kb": max_rss_kb(),
+    }
+    return RunResult(status, output.getvalue(), diagnostics, stats)
+
+
+# the loop of a worker process: runs every (source, stdin, max_instructions) it receives until it
+# gets None
+def worker_main(connection, memory_limit: int | None):
+    while True:
+        try:
+            job = connection.recv()
+        except (EOFError, OSError):
+            return
+        if job is None:
+            return
+        result = run_source(*job, memory_limit)
+        connection.send(result)
+        # a MemoryError can leave the interpreter in a bad state, a fresh worker takes over
+        if result.status == "memory_limit":
+            return
+
+
+class Worker:
+    def __init__(self, process, connection):
+        self.process = process
+        self.connection = connection
+
+    def stop(self):
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+# worker processes started ahead of the runs, with the lexer, parser and compiler already imported;
+# every run takes an idle worker and waits for one when all are busy. A worker that runs past the
+# timeout is killed and replaced, so a runaway script only holds up its own run
+class WorkerPool:
+    def __init__(
+        self,
+        workers: int = 0,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_instructions: int | None = DEFAULT_MAX_INSTRUCTIONS,
+        memory_mb: int | None = DEFAULT_MEMORY_MB,
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.max_instructions = max_instructions
+        self.memory_limit = memory_mb * 1024 * 1024 if memory_mb else None
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            self._context = multiprocessing.get_context("forkserver")
+            self._context.set_forkserver_preload(PRELOADED_MODULES)
+        else:
+            self._context = multiprocessing.get_context("spawn")
+        # how many runs there were, and how many workers were replaced after a timeout, a memory error
+        # or a crash
+        self.stats = {"runs": 0, "replaced": 0}
+        self._stats_lock = threading.Lock()
+        self._idle = queue.Queue()
+        for _ in range(self.workers):
+            self._idle.put(self._start_worker())
+
+    def _start_worker(self):
+        connection, child_connection = self._context.Pipe()
+        process = self._context.Process(target=worker_main, args=(child_connection, self.memory_limit), daemon=True)
+        process.start()
+        child_connection.close()
+        return Worker(process, connection)
+
+    def run(self, source: str, stdin: str = ""):
+        worker = self._idle.get()
+        result = None
+        try:
+            worker.connection.send((source, stdin, self.max_instructions))
+            if worker.connection.poll(self.timeout):
+                result = worker.connection.recv()
+            else:
+                stats = {"instructions": 0, "wall_ms": round(self.timeout * 1000, 3), "cpu_ms": 0, "max_rss_kb": 0}
+                result = RunResult("timeout", "", [f"Time limit of {self.timeout:g} seconds exceeded"], stats)
+        except (EOFError, OSError):
+            result = RunResult("crashed", "", ["The worker stopped while running the script"])
+        finally:
+            # a worker that cannot run more scripts is replaced, also when sending the script failed
+            if result is None or result.status in FATAL_STATUSES:
+                worker.stop()
+                worker = self._start_worker()
+                with self._stats_lock:
+                    self.stats["replaced"] += 1
+            self._idle.put(worker)
+        with self._stats_lock:
+            self.stats["runs"] += 1
+        return result
+
+    def close(self):
+        for _ in range(self.workers):
+            worker = self._idle.get()
+            try:
+                worker.connection.send(None)
+            except OSError:
+                pass
+            worker.process.join(1)
+            worker.stop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# POST /run with {"source": ..., "stdin": ...} runs the script and answers with the RunResult as JSON,
+# GET /stats answers with the stats of the pool
+class RunHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if self.path != "/run":
+            self.send_json(404, {"error": "Not found"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_REQUEST_BYTES:
+            self.send_json(413, {"error": f"Requests are limited to {MAX_REQUEST_BYTES} bytes"})
+            return
+        try:
+            request = json.loads(self.rfile.read(length))
+            source = request["source"]
+            stdin = request.get("stdin", "")
+            if type(source) is not str or type(stdin) is not str:
+                raise TypeError
+        except (ValueError, KeyError, TypeError, AttributeError):
+            self.send_json(400, {"error": 'Expected a JSON object with a "source" string and an optional "stdin"'})
+            return
+        self.send_json(200, self.server.pool.run(source, stdin).to_dict())
+
+    def do_GET(self):
+        if self.path != "/stats":
+            self.send_json(404, {"error": "Not found"})
+            return
+        self.send_json(200, {"workers": self.server.pool.workers, **self.server.pool.stats})
+
+    def send_json(self, code: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+# serves the pool over HTTP until interrupted
+def serve(pool: WorkerPool, host: str, port: int, verbose: bool = False):
+    http_server = ThreadingHTTPServer((host, port), RunHandler)
+    http_server.pool = pool
+    http_server.verbose = verbose
+    print(f"Running scripts on {pool.workers} workers at http://{host}:{http_server.server_port}/run")
+    try:
+        http_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        http_server.server_close()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Runs untrusted Rookie scripts sent over HTTP in a worker pool.")
+    arg_parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    arg_parser.add_argument("--port", type=int, default=8080, help="port to listen on, 0 picks a free one")
+    arg_parser.add_argument("--workers", type=int, default=0, help="number of worker processes (default: all cores)")
+    arg_parser.add_argument(
+        "--timeout", type=float, default=DEFAULT_TIMEOUT, metavar="SECONDS", help="wall-clock limit of a run"
+    )
+    arg_parser.add_argument(
+        "--max-instructions",
+        type=int,
+        default=DEFAULT_MAX_INSTRUCTIONS,
+        metavar="N",
+        help="instructions a run may execute, 0 for no limit",
+    )
+    arg_parser.add_argument(
+        "--memory",
+        type=int,
+        default=DEFAULT_MEMORY_MB,
+        metavar="MB",
+        help="memory a run may allocate on top of its worker, 0 for no limit",
+    )
+    arg_parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = arg_parser.parse_args()
+
+    with WorkerPool(args.workers, args.timeout, args.max_instructions or None, args.memory) as pool:
+        serve(pool, args.host, args.port, args.verbose)
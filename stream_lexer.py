@@ -0,0 +1,91 @@
+import re
+from collections import deque
+from typing import Deque, TextIO
+
+import constants
+from lexer import Lexer
+from token_ import Token
+from token_kinds import TokenKind
+
+SINGLE_LINE_COMMENT = re.compile(r"//.*")
+
+
+class StreamingLexer(Lexer):
+    # the file is only opened when tokens() is iterated
+    def load(self, filepath: str):
+        self._filepath = filepath
+        self._line = ""
+        self._pending: Deque[Token] = deque()
+
+    # yields the tokens one line at a time, holding only the current line in memory
+    def tokens(self):
+        self._line_number = 1
+
+        with open(self._filepath, "r") as file:
+            for line_number, line in enumerate(self.read_lines(file)):
+                self._line_number = line_number + 1
+                self._line = line
+
+                if line.strip():  # skip empty lines
+                    self.get_line_tokens(line)
+                    self.emit(TokenKind.NEWLINE, "", self._cursor + 1, self._current_indentation)
+
+                while self._pending:
+                    yield self._pending.popleft()
+
+        while self._current_indentation > 0:
+            yield Token(TokenKind.DEDENT, "", self._line_number)
+            self._current_indentation -= constants.INDENT_SIZE
+
+        yield Token(TokenKind.EOF, "", self._line_number)
+
+    # yields the same lines as preprocess_input(file.read()).split("\n") without reading the whole file
+    def read_lines(self, file: TextIO):
+        current = ""
+
+        while True:
+            raw_line = file.readline()
+            if not raw_line:
+                break
+            ends_with_newline = raw_line.endswith("\n")
+            line = SINGLE_LINE_COMMENT.sub("", raw_line.rstrip("\n"))
+
+            # removing multiline comments, which may join several lines into one
+            start = line.find("/*")
+            while start != -1:
+                current += line[:start]
+                end = line.find("*/", start + 2)
+                if end == -1:
+                    resume_at = file.tell()
+                    end_line = self.skip_comment(file)
+                    if end_line is None:
+                        # an unclosed comment is kept as it is, like in preprocess_input
+                        file.seek(resume_at)
+                        line = line[start:]
+                        break
+                    line, end, ends_with_newline = end_line
+                line = line[end + 2 :]
+                start = line.find("/*")
+
+            current += line
+            if ends_with_newline:
+                yield current
+                current = ""
+
+        # the text after the last newline is a line too, even when it is empty
+        yield current
+
+    # reads lines until the end of a multiline comment, returns (line, position of '*/', ends with newline)
+    def skip_comment(self, file: TextIO):
+        while True:
+            raw_line = file.readline()
+            if not raw_line:
+                return None
+            line = SINGLE_LINE_COMMENT.sub("", raw_line.rstrip("\n"))
+            end = line.find("*/")
+            if end != -1:
+                return line, end, raw_line.endswith("\n")
+
+    def emit(self, kind: TokenKind, lexeme: str, column_no=0, indent_level=0, has_line=True):
+        line_code = self._line if has_line else ""
+        self._pending.append(Token(kind, lexeme, self._line_number, line_code, column_no, indent_level))
@@ -1,293 +1,553 @@
-import os
-
+from ast_arena import LEAF_KINDS, NO_NODE, NO_TOKEN, AstArena, NodeKind
+from token_ import Token
+from token_kinds import KEYWORD_KINDS, TokenKind
 from token_stream import TokenStream
 
+DEFAULT_MAX_ERRORS = 50
+
+# FIRST sets and operator sets, looked up by token kind instead of comparing strings
+VALUE_FIRST = frozenset(
+    [TokenKind.IDENTIFIER, TokenKind.NUMBER, TokenKind.FLOAT, TokenKind.STRING, TokenKind.BOOLEAN_LITERAL]
+)
+RELATIONAL_OPERATORS = frozenset(
+    [
+        TokenKind.LESS,
+        TokenKind.GREATER,
+        TokenKind.EQUAL,
+        TokenKind.NOTEQUAL,
+        TokenKind.GREATEROREQUAL,
+        TokenKind.LESSOREQUAL,
+    ]
+)
+COMPARISON_OPERATORS = RELATIONAL_OPERATORS | {TokenKind.NOT, TokenKind.IN}
+ADDITIVE_OPERATORS = frozenset([TokenKind.PLUS, TokenKind.MINUS])
+MULTIPLICATIVE_OPERATORS = frozenset([TokenKind.MULTIPLY, TokenKind.DIVIDE, TokenKind.MODULO])
+ASSIGN_OPERATORS = frozenset(
+    [TokenKind.PLUSASSIGN, TokenKind.MINUSASSIGN, TokenKind.MULTIPLYASSIGN, TokenKind.DIVIDEASSIGN]
+)
+ARRAY_VALUES_END = frozenset([TokenKind.RBRACKET, TokenKind.TO])
+INSTANCE_LABELS = frozenset([TokenKind.NUMBER, TokenKind.STRING])
+DECLARATION_FIRST = frozenset([TokenKind.COMMA, TokenKind.ASSIGN])
+SIMPLE_STMT_FIRST = frozenset(
+    [TokenKind.IDENTIFIER, TokenKind.PRINT, TokenKind.INPUT, TokenKind.IMPORT, TokenKind.FROM]
+)
+IMPORT_FIRST = frozenset([TokenKind.IMPORT, TokenKind.FROM])
+# the production parsing each compound statement, by its first keyword
+COMPOUND_STATEMENTS = {
+    TokenKind.IF: "if_statement",
+    TokenKind.WHICH: "which_statement",
+    TokenKind.WHILE: "while_statement",
+    TokenKind.FOR: "for_statement",
+    TokenKind.DEFINE: "function_statement",
+}
+# keywords that start a compound statement, parsing resumes at them after an error
+STATEMENT_KEYWORDS = frozenset(COMPOUND_STATEMENTS)
+SYNCHRONIZING_TOKENS = frozenset([TokenKind.NEWLINE, TokenKind.DEDENT, TokenKind.EOF])
+
+# binding powers of the operators, a higher power binds tighter; 'not' and the sign '+' or '-' of
+# a value are the prefix operators
+OR_POWER = 1
+AND_POWER = 2
+NOT_POWER = 3
+COMPARISON_POWER = 4
+ADDITIVE_POWER = 5
+MULTIPLICATIVE_POWER = 6
+UNARY_POWER = 7
+BINDING_POWERS = {
+    TokenKind.OR: OR_POWER,
+    TokenKind.AND: AND_POWER,
+    **dict.fromkeys(COMPARISON_OPERATORS, COMPARISON_POWER),
+    **dict.fromkeys(ADDITIVE_OPERATORS, ADDITIVE_POWER),
+    **dict.fromkeys(MULTIPLICATIVE_OPERATORS, MULTIPLICATIVE_POWER),
+}
+# states of Parser.parse_expression
+NOT_TEST, OPERAND, OPERATOR, ARRAY_START, ARRAY_VALUES, ARRAY_END = range(6)
+# frames on the stack of Parser.parse_expression
+PAREN_FRAME, ARRAY_FRAME = range(2)
+
+
+class ParseError(Exception):
+    def __init__(self, message: str, token: Token):
+        super().__init__(message)
+        self.message = message
+        self.line_no = token.line_no
+        self.column_no = token.column_no
+
+        # caret under the lexeme where the error was found
+        lexeme_length = len(token.lexeme) if token.lexeme else 1
+        self.report = (
+            f"Error at line {token.line_no}: {message}\n{token.line_code}\n"
+            + " " * (token.column_no - token.indent_level - lexeme_length + 2)
+            + "^" * lexeme_length
+        )
+
+    def __str__(self):
+        return self.report
+
+
+# raised when the parser has collected max_errors diagnostics
+class ErrorLimitReached(Exception):
+    pass
+
 
 class Parser:
-    def __init__(self, tokens: TokenStream):
+    def __init__(
+        self, tokens: TokenStream, recover: bool = True, max_errors: int = DEFAULT_MAX_ERRORS, build_ast: bool = False
+    ):
         self.tokens = tokens
-        self.previous_token = None
+        # when False, the first error is raised as ParseError instead of being collected
+        self.recover = recover
+        self.max_errors = max_errors
+        self.diagnostics: list[ParseError] = []
+        # number of tokens consumed, used to tell whether error recovery made progress
+        self._position = 0
+        self._last_error_position = -1
+        # the syntax tree, only built when build_ast is True; its token indices are _position values,
+        # so the tokens must be parsed from the first one
+        self.ast = AstArena(tokens.get_tokens()) if build_ast else None
         self.advance(False)
 
     # ================ HELPER METHODS ================
-    def match(self, type: str, to_match: str | list[str]):
-        if type not in ["token", "lexeme"]:
-            raise Exception("Invalid type")
+    # current_kind is None once every token is consumed, so nothing matches
+    def match(self, kind: TokenKind):
+        return self.current_kind == kind
 
-        if self.tokens.is_empty():
-            return False
+    def match_any(self, kinds: frozenset):
+        return self.current_kind in kinds
 
-        if isinstance(to_match, list):
-            return (self.current_token if type == "token" else self.current_lexeme) in to_match
-        return (self.current_token if type == "token" else self.current_lexeme) == to_match
+    def consume(self, kind: TokenKind):
+        if self.current_kind == kind:
+            self.advance()
+            return True
+        return False
 
-    def consume(self, token):
-        if self.match("token", token):
+    def consume_any(self, kinds: frozenset):
+        if self.current_kind in kinds:
             self.advance()
             return True
         return False
 
     def advance(self, do_advance: bool = True):
         if do_advance:
-            self.previous_token = self.tokens.advance()
-        if not self.tokens.is_empty():
-            next_token = self.tokens.peek()
-            self.current_token = next_token.name
-            self.current_lexeme = next_token.lexeme
+            self.tokens.skip()
+            self._position += 1
+        self.current_kind = None if self.tokens.is_empty() else self.tokens.peek_kind()
 
     def print_error(self, message: str):
-        token = self.tokens.peek()
-        lexeme_length = len(token.lexeme) if token.lexeme else 1
+        raise ParseError(message, self.tokens.peek())
 
-        print(f"Error at line {token.line_no}: {message}\n{token.line_code}")
-        print(" " * (token.column_no - token.indent_level - lexeme_length + 2) + "^" * lexeme_length)
-        os._exit(1)
+    # collects the error, or raises it when not recovering
+    def record_error(self, error: ParseError):
+        if not self.recover:
+            raise error
 
-    def run_statements(self, end_token: str):
-        while not self.tokens.is_empty() and not self.match("token", end_token):
-            if self.consume("INDENT"):
-                self.print_error("Unexpected indentation")
-            self.statement()
+        # an error at the same token as the previous one is a consequence of it
+        if self._position == self._last_error_position:
+            return
+        self._last_error_position = self._position
+        self.diagnostics.append(error)
+        if len(self.diagnostics) >= self.max_errors:
+            raise ErrorLimitReached()
+
+    # skips the rest of the failed statement, returns False if parsing cannot continue
+    def synchronize(self, start: int):
+        while not self.tokens.is_empty() and not self.match_any(SYNCHRONIZING_TOKENS):
+            if self._position > start and self.match_any(STATEMENT_KEYWORDS):
+                return True
+            self.advance()
 
-    # ================ PARSER METHODS ================
-    # ---- Expression ----
+        if self.tokens.is_empty() or (self._position == start and self.match(TokenKind.EOF)):
+            return False
 
-    def expression(self):
-        self.and_test()
-        while self.match("lexeme", "or"):
-            self.consume("KEYWORD")
-            self.and_test()
-
-    def and_test(self):
-        self.not_test()
-        if self.match("lexeme", "and") and self.consume("AND"):
-            self.not_test()
-
-    def not_test(self):
-        self.consume("NOT")
-        self.comparison()
-
-    def comparison(self):
-        comp_ops = ["<", ">", "==", "!=", ">=", "<=", "not", "in"]
-        self.expr()
-        while self.match("lexeme", comp_ops):
-            if self.consume("NOT") and (not self.match("lexeme", "in") or not self.consume("KEYWORD")):
-                self.print_error("Expected 'in' keyword after 'not' keyword")
-            else:
-                self.consume("KEYWORD" if self.match("lexeme", "in") else self.current_token)
-            self.expr()
-
-    def expr(self):
-        self.factor()
-        while self.match("lexeme", ["+", "-"]):
-            self.consume(self.current_token)
-            self.factor()
-
-    def factor(self):
-        self.term()
-        while self.match("lexeme", ["*", "/", "%"]):
-            self.consume(self.current_token)
-            self.term()
-
-    def term(self):
-        self.consume("UNARY")
-        self.value()
-
-    def value(self):
-        if self.match("token", ["IDENTIFIER", "NUMBER", "FLOAT", "STRING", "BOOLEAN_LITERAL"]):
-            self.consume(self.current_token)
-        # array
-        elif self.match("token", "LBRACKET"):
-            self.array()
-        # expression
-        elif self.consume("LPAREN"):
-            self.expression()
-            if not self.consume("RPAREN"):
-                self.print_error("Expected closing parenthesis ')'")
-        else:
-            self.print_error("Invalid value")
+        # the indented lines after a broken header are still parsed, as if they were a block
+        if self.consume(TokenKind.NEWLINE):
+            if self.match(TokenKind.INDENT):
+                self.orphan_block()
+        elif self._position == start:
+            self.advance()
+        return True
 
-    def array(self):
-        self.consume("LBRACKET")
+    # parses an indented block that does not belong to a statement
+    def orphan_block(self, indentation: int = 0):
+        while self.consume(TokenKind.INDENT):
+            indentation += 1
 
-        if self.consume("NUMBER"):
-            self.consume("COMMA")
+        self.run_statements(TokenKind.DEDENT)
+        while self.match(TokenKind.DEDENT) and indentation > 0:
+            indentation -= 1
+            self.consume(TokenKind.DEDENT)
+
+    # records the cursor position of every statement in starts, if given, returns the statement nodes
+    def run_statements(self, end_token: TokenKind, starts: list[int] | None = None):
+        statements = []
+        while not self.tokens.is_empty() and not self.match(end_token):
+            if starts is not None:
+                starts.append(self.tokens.mark())
+            start = self._position
+            try:
+                if self.consume(TokenKind.INDENT):
+                    self.record_error(ParseError("Unexpected indentation", self.tokens.peek()))
+                    self.orphan_block(1)
+                    continue
+                statement = self.statement()
+                # without a syntax tree there is nothing to keep, checking stays in constant memory
+                if self.ast is not None:
+                    statements.append(statement)
+            except ParseError as error:
+                self.record_error(error)
+                if not self.synchronize(start):
+                    break
+        return statements
+
+    # adds a node ending before the current token, does nothing when no syntax tree is built
+    def add_node(self, kind: NodeKind, token: int, start: int, children=(), data: int = NO_TOKEN):
+        if self.ast is None:
+            return NO_NODE
+        return self.ast.add(kind, token, start, self._position, children, data)
+
+    # reduces the operators above base that bind at least as tight as power
+    def reduce_operators(self, operands: list, operators: list, base: int, power: int = 0):
+        ast = self.ast
+        while len(operators) > base and operators[-1][0] >= power:
+            operator_power, token = operators.pop()
+            right = operands.pop()
+            if operator_power == NOT_POWER:
+                node = ast.add(NodeKind.NOT, token, token, ast.span(right)[1], [right])
+            elif operator_power == UNARY_POWER:
+                node = ast.add(NodeKind.UNARY, token, token, ast.span(right)[1], [right])
+            else:
+                left = operands.pop()
+                node = ast.add(NodeKind.BINARY, token, ast.span(left)[0], ast.span(right)[1], [left, right])
+            operands.append(node)
 
-        # get all values in array
-        while not self.match("token", "RBRACKET") and not self.match("lexeme", "to"):
-            self.expression()
-            if not self.consume("COMMA"):
-                break
+    # ================ PARSER METHODS ================
+    # ---- Expression ----
 
-        # array instantiation using 'to' keyword
-        if self.consume("KEYWORD"):
-            if not self.consume("NUMBER"):
-                self.print_error("Expected integer after 'to' keyword")
-            # check if there is an additional step keyword
-            if self.match("lexeme", "step") and self.consume("KEYWORD"):
-                if not self.consume("COLON"):
-                    self.print_error("Expected colon ':'")
-                if not self.consume("NUMBER"):
-                    self.print_error("Expected integer after 'step' keyword")
+    def expression(self):
+        return self.parse_expression()
 
-        if not self.consume("RBRACKET"):
-            self.print_error("Expected closing bracket ']'")
+    def array(self):
+        return self.parse_expression(True)
+
+    # parses one expression (or one array when array is True) with a single precedence-climbing
+    # loop, '(' and '[' push a frame on an explicit stack instead of recursing, so the nesting
+    # depth is only limited by memory; returns its node, or NO_NODE when no syntax tree is built
+    def parse_expression(self, array: bool = False):
+        build = self.ast is not None
+        # (frame, operators and operands below the frame, first token of the frame)
+        stack = []
+        # while building, the nodes and the (binding power, token) of the operators not reduced yet
+        operands = []
+        operators = []
+        state = ARRAY_START if array else NOT_TEST
+        while True:
+            kind = self.current_kind
+            if state == OPERATOR:
+                power = BINDING_POWERS.get(kind)
+                if power is None:
+                    # the expression ends here, return to the frame it is nested in
+                    if build:
+                        self.reduce_operators(operands, operators, stack[-1][1] if stack else 0)
+                    if not stack:
+                        return operands.pop() if build else NO_NODE
+                    if stack[-1][0] == ARRAY_FRAME:
+                        state = ARRAY_VALUES if self.consume(TokenKind.COMMA) else ARRAY_END
+                        continue
+                    stack.pop()
+                    if not self.consume(TokenKind.RPAREN):
+                        self.print_error("Expected closing parenthesis ')'")
+                    continue
+
+                if build:
+                    self.reduce_operators(operands, operators, stack[-1][1] if stack else 0, power)
+                    operators.append((power, self._position))
+                if power >= ADDITIVE_POWER:
+                    self.advance()
+                    state = OPERAND
+                elif power == COMPARISON_POWER:
+                    self.advance()
+                    # 'not in' is one operator of two tokens
+                    if kind == TokenKind.NOT and not self.consume(TokenKind.IN):
+                        self.print_error("Expected 'in' keyword after 'not' keyword")
+                    state = OPERAND
+                else:
+                    # 'and' and 'or', the operand after them can start with 'not'
+                    self.advance()
+                    state = NOT_TEST
+            elif state == NOT_TEST:
+                if self.consume(TokenKind.NOT) and build:
+                    operators.append((NOT_POWER, self._position - 1))
+                state = OPERAND
+            elif state == OPERAND:
+                # an optional sign, a value takes at most one
+                if kind in ADDITIVE_OPERATORS:
+                    self.advance()
+                    if build:
+                        operators.append((UNARY_POWER, self._position - 1))
+                    kind = self.current_kind
+                if kind in VALUE_FIRST:
+                    self.advance()
+                    if build:
+                        token = self._position - 1
+                        operands.append(self.ast.add(LEAF_KINDS[kind], token, token, token + 1))
+                    state = OPERATOR
+                elif kind == TokenKind.LBRACKET:
+                    state = ARRAY_START
+                elif kind == TokenKind.LPAREN:
+                    stack.append((PAREN_FRAME, len(operators), len(operands), self._position))
+                    self.advance()
+                    state = NOT_TEST
+                else:
+                    self.print_error("Invalid value")
+            elif state == ARRAY_START:
+                stack.append((ARRAY_FRAME, len(operators), len(operands), self._position))
+                self.consume(TokenKind.LBRACKET)
+                state = ARRAY_VALUES
+            elif state == ARRAY_VALUES:
+                if kind in ARRAY_VALUES_END:
+                    state = ARRAY_END
+                else:
+                    state = NOT_TEST
+            else:
+                # array instantiation using 'to' keyword, any keyword is accepted in its place
+                to = end = step = NO_TOKEN
+                if self.consume_any(KEYWORD_KINDS):
+                    to = self._position - 1
+                    end = self._position
+                    if not self.consume(TokenKind.NUMBER):
+                        self.print_error("Expected integer after 'to' keyword")
+                    # check if there is an additional step keyword
+                    if self.consume(TokenKind.STEP):
+                        if not self.consume(TokenKind.COLON):
+                            self.print_error("Expected colon ':'")
+                        step = self._position
+                        if not self.consume(TokenKind.NUMBER):
+                            self.print_error("Expected integer after 'step' keyword")
+
+                if not self.consume(TokenKind.RBRACKET):
+                    self.print_error("Expected closing bracket ']'")
+                _, _, operand_base, start = stack.pop()
+                if build:
+                    elements = operands[operand_base:]
+                    del operands[operand_base:]
+                    if to == NO_TOKEN:
+                        operands.append(self.add_node(NodeKind.ARRAY, start, start, elements))
+                    else:
+                        elements.append(self.ast.add(NodeKind.NUMBER, end, end, end + 1))
+                        operands.append(self.add_node(NodeKind.RANGE, to, start, elements, step))
+                if array and not stack:
+                    return operands.pop() if build else NO_NODE
+                state = OPERATOR
 
     # -- Expression End --
 
+    # returns the INSTANCE nodes and the DEFAULT node
     def ins_block(self):
         indentation = 0
-        if not self.consume("NEWLINE"):
+        arms = []
+        if not self.consume(TokenKind.NEWLINE):
             self.print_error("Expected newline")
 
-        if not self.match("token", "INDENT"):
+        if not self.match(TokenKind.INDENT):
             self.print_error("Expected indentation")
 
         # consume all indentation
-        while self.consume("INDENT"):
+        while self.consume(TokenKind.INDENT):
             indentation += 1
 
         # instance part
-        while self.match("lexeme", "instance") and self.consume("KEYWORD"):
+        while self.match(TokenKind.INSTANCE):
+            start = self._position
+            self.consume(TokenKind.INSTANCE)
             # consume optional relational operator
-            if self.match("lexeme", ["<", ">", "==", "!=", ">=", "<="]):
-                self.consume(self.current_token)
+            operator = self._position
+            if not self.consume_any(RELATIONAL_OPERATORS):
+                operator = NO_TOKEN
 
             # comparison part
-            if self.match("token", ["NUMBER", "STRING"]):
-                self.consume(self.current_token)
-            else:
+            label = self._position
+            if not self.consume_any(INSTANCE_LABELS):
                 self.print_error("Expected number or string")
 
-            if not self.consume("COLON"):
+            if not self.consume(TokenKind.COLON):
                 self.print_error("Expected colon ':'")
-            self.block()
+            block = self.block()
+            arms.append(self.add_node(NodeKind.INSTANCE, label, start, [block], operator))
 
         # default part
-        if self.match("lexeme", "default"):
-            self.consume("KEYWORD")
-            if not self.consume("COLON"):
+        if self.match(TokenKind.DEFAULT):
+            start = self._position
+            self.consume(TokenKind.DEFAULT)
+            if not self.consume(TokenKind.COLON):
                 self.print_error("Expected colon ':'")
-            self.block()
+            arms.append(self.add_node(NodeKind.DEFAULT, start, start, [self.block()]))
 
-        if not self.match("token", "DEDENT"):
+        if not self.match(TokenKind.DEDENT):
             self.print_error("Expected dedent")
 
         # consume all dedent tokens for the current block
-        while self.match("token", "DEDENT") and indentation > 0:
+        while self.match(TokenKind.DEDENT) and indentation > 0:
             indentation -= 1
-            self.consume("DEDENT")
+            self.consume(TokenKind.DEDENT)
+        return arms
 
     def block(self):
         indentation = 0
-        if not self.consume("NEWLINE"):
+        if not self.consume(TokenKind.NEWLINE):
             self.print_error("Expected newline")
 
-        if not self.match("token", "INDENT"):
+        if not self.match(TokenKind.INDENT):
             self.print_error("Expected indentation")
 
         # consume all indentation
-        while self.consume("INDENT"):
+        while self.consume(TokenKind.INDENT):
             indentation += 1
 
         # run all statements in block
-        self.run_statements("DEDENT")
-        if not self.match("token", "DEDENT"):
+        start = self._position
+        statements = self.run_statements(TokenKind.DEDENT)
+        if not self.match(TokenKind.DEDENT):
             self.print_error("Expected dedent")
+        node = self.add_node(NodeKind.BLOCK, NO_TOKEN, start, statements)
 
         # consume all dedent tokens for the current block
-        while self.match("token", "DEDENT") and indentation > 0:
+        while self.match(TokenKind.DEDENT) and indentation > 0:
             indentation -= 1
-            self.consume("DEDENT")
+            self.consume(TokenKind.DEDENT)
+        return node
 
     # ---- Simple Statement ----
 
-    def declaration_statement(self):
+    def declaration_statement(self, name: int):
         # optional zero or more identifiers
-        while self.match("token", "COMMA"):
-            if not self.consume("IDENTIFIER"):
+        names = []
+        while self.consume(TokenKind.COMMA):
+            if not self.consume(TokenKind.IDENTIFIER):
                 self.print_error("Expected identifier")
+            names.append(self.add_node(NodeKind.NAME, self._position - 1, self._position - 1))
+        values = [self.add_node(NodeKind.NAMES, name, name, names)] if names else []
 
-        if not self.consume("ASSIGN"):
+        if not self.consume(TokenKind.ASSIGN):
             self.print_error("Expected assignment '='")
 
         # input statement
-        if self.match("lexeme", "input"):
-            self.input_statement()
-            return
+        if self.match(TokenKind.INPUT):
+            values.append(self.input_statement())
+            return self.add_node(NodeKind.DECLARATION, name, name, values)
 
-        self.expression()
+        values.append(self.expression())
 
         # optional zero or more expressions
-        while self.consume("COMMA"):
-            self.expression()
+        while self.consume(TokenKind.COMMA):
+            values.append(self.expression())
+        return self.add_node(NodeKind.DECLARATION, name, name, values)
 
-    def assign_statement(self):
-        self.consume(self.current_token)
-        self.expression()
+    def assign_statement(self, name: int):
+        operator = self._position
+        self.consume(self.current_kind)
+        value = self.expression()
+        return self.add_node(NodeKind.ASSIGN, name, name, [value], operator)
 
     def input_statement(self):
         # consume 'input' keyword
-        self.consume("BUILT_IN_FUNCTION")
-        if not self.consume("LPAREN"):
+        start = self._position
+        self.consume(TokenKind.INPUT)
+        if not self.consume(TokenKind.LPAREN):
             self.print_error("Expected '(' after 'input'")
 
-        if not self.match("token", "RPAREN") and not self.consume("STRING"):
-            self.print_error("Expected string argument for 'input' function")
+        prompt = []
+        if not self.match(TokenKind.RPAREN):
+            if not self.consume(TokenKind.STRING):
+                self.print_error("Expected string argument for 'input' function")
+            prompt.append(self.add_node(NodeKind.STRING, self._position - 1, self._position - 1))
 
-        if not self.consume("RPAREN"):
+        if not self.consume(TokenKind.RPAREN):
             self.print_error("Expected ')' after arguments")
+        return self.add_node(NodeKind.INPUT, start, start, prompt)
 
     def output_statement(self):
         # consume 'print' keyword
-        self.consume("BUILT_IN_FUNCTION")
-        if not self.consume("LPAREN"):
+        start = self._position
+        values = []
+        self.consume(TokenKind.PRINT)
+        if not self.consume(TokenKind.LPAREN):
             self.print_error("Expected '(' after 'print'")
 
         # optional expressions
-        while not self.match("token", "RPAREN") and not self.match("lexeme", "separator"):
-            self.expression()
-            if not self.consume("COMMA"):
+        while not self.match(TokenKind.RPAREN) and not self.match(TokenKind.SEPARATOR):
+            values.append(self.expression())
+            if not self.consume(TokenKind.COMMA):
                 break
 
-        # optional separator argument
-        if self.consume("KEYWORD"):
-            if not self.consume("ASSIGN"):
+        # optional separator argument, any keyword is accepted in its place
+        separator = NO_TOKEN
+        if self.consume_any(KEYWORD_KINDS):
+            if not self.consume(TokenKind.ASSIGN):
                 self.print_error("Argument 'separator' is not defined")
-            if not self.consume("STRING"):
+            separator = self._position
+            if not self.consume(TokenKind.STRING):
                 self.print_error("Expected an argument string value")
 
-        if not self.consume("RPAREN"):
+        if not self.consume(TokenKind.RPAREN):
             self.print_error("Expected ')' after expressions and arguments")
+        return self.add_node(NodeKind.PRINT, start, start, values, separator)
 
-    def call_statement(self):
-        self.consume("LPAREN")
+    def call_statement(self, name: int):
+        arguments = []
+        self.consume(TokenKind.LPAREN)
 
         # optional zero or more arguments
-        while not self.match("token", "RPAREN"):
-            self.expression()
-            if not self.consume("COMMA"):
+        while not self.match(TokenKind.RPAREN):
+            arguments.append(self.expression())
+            if not self.consume(TokenKind.COMMA):
                 break
 
-        if not self.consume("RPAREN"):
+        if not self.consume(TokenKind.RPAREN):
             self.print_error("Expected closing parenthesis ')'")
+        return self.add_node(NodeKind.CALL, name, name, arguments)
+
+    def import_statement(self):
+        start = self._position
+        names = []
+        if self.consume(TokenKind.FROM):
+            module = self._position
+            if not self.consume(TokenKind.IDENTIFIER):
+                self.print_error("Expected module name")
+            if not self.consume(TokenKind.IMPORT):
+                self.print_error("Expected keyword 'import'")
+
+            # one or more names
+            while True:
+                if not self.consume(TokenKind.IDENTIFIER):
+                    self.print_error("Expected identifier")
+                names.append(self.add_node(NodeKind.NAME, self._position - 1, self._position - 1))
+                if not self.consume(TokenKind.COMMA):
+                    break
+        else:
+            self.consume(TokenKind.IMPORT)
+            module = self._position
+            if not self.consume(TokenKind.IDENTIFIER):
+                self.print_error("Expected module name")
+        return self.add_node(NodeKind.IMPORT, module, start, names)
 
     def simple_stmt(self):
-        if self.match("lexeme", "print"):
-            self.output_statement()
-            return
+        if self.match(TokenKind.PRINT):
+            return self.output_statement()
+        if self.match_any(IMPORT_FIRST):
+            return self.import_statement()
 
-        self.consume("IDENTIFIER")
+        name = self._position
+        self.consume(TokenKind.IDENTIFIER)
 
         # declaration statement
-        if self.match("token", ["COMMA", "ASSIGN"]):
-            self.declaration_statement()
+        if self.match_any(DECLARATION_FIRST):
+            return self.declaration_statement(name)
         # assignment statement
-        elif self.match("lexeme", ["+=", "-=", "*=", "/="]):
-            self.assign_statement()
+        elif self.match_any(ASSIGN_OPERATORS):
+            return self.assign_statement(name)
         # call statement
-        elif self.match("token", "LPAREN"):
-            self.call_statement()
+        elif self.match(TokenKind.LPAREN):
+            return self.call_statement(name)
         else:
             self.print_error("Invalid statement")
 
@@ -296,124 +556,144 @@ class Parser:
     # ---- Compound Statement ----
 
     def if_statement(self):
-        self.consume("KEYWORD")
-        self.expression()
+        start = self._position
+        self.consume(TokenKind.IF)
+        children = [self.expression()]
 
-        if not self.consume("COLON"):
+        if not self.consume(TokenKind.COLON):
             self.print_error("Expected colon ':'")
-        self.block()
+        children.append(self.block())
 
         # optional zero or more elif statements
-        while self.match("lexeme", "elif"):
-            self.consume("KEYWORD")
-            self.expression()
+        while self.match(TokenKind.ELIF):
+            branch = self._position
+            self.consume(TokenKind.ELIF)
+            condition = self.expression()
 
-            if not self.consume("COLON"):
+            if not self.consume(TokenKind.COLON):
                 self.print_error("Expected colon ':'")
-            self.block()
+            children.append(self.add_node(NodeKind.ELIF, branch, branch, [condition, self.block()]))
 
         # optional else statement
-        if self.match("lexeme", "else"):
-            self.consume("KEYWORD")
+        if self.match(TokenKind.ELSE):
+            branch = self._position
+            self.consume(TokenKind.ELSE)
 
-            if not self.consume("COLON"):
+            if not self.consume(TokenKind.COLON):
                 self.print_error("Expected colon ':'")
-            self.block()
+            children.append(self.add_node(NodeKind.ELSE, branch, branch, [self.block()]))
+        return self.add_node(NodeKind.IF, start, start, children)
 
     def which_statement(self):
-        self.consume("KEYWORD")
-        if not self.consume("IDENTIFIER"):
+        start = self._position
+        self.consume(TokenKind.WHICH)
+        name = self._position
+        if not self.consume(TokenKind.IDENTIFIER):
             self.print_error("Expected identifier")
 
-        if not self.consume("COLON"):
+        if not self.consume(TokenKind.COLON):
             self.print_error("Expected colon ':'")
-        self.ins_block()
+        return self.add_node(NodeKind.WHICH, name, start, self.ins_block())
 
     def while_statement(self):
-        self.consume("KEYWORD")
-        self.expression()
-        if not self.consume("COLON"):
+        start = self._position
+        self.consume(TokenKind.WHILE)
+        condition = self.expression()
+        if not self.consume(TokenKind.COLON):
             self.print_error("Expected colon ':'")
-        self.block()
+        return self.add_node(NodeKind.WHILE, start, start, [condition, self.block()])
 
     def for_statement(self):
-        self.consume("KEYWORD")
-        if not self.consume("IDENTIFIER"):
+        start = self._position
+        self.consume(TokenKind.FOR)
+        name = self._position
+        if not self.consume(TokenKind.IDENTIFIER):
             self.print_error("Expected identifier")
 
         # optional another identifier
-        if self.consume("COMMA") and not self.consume("IDENTIFIER"):
-            self.print_error("Expected identifier")
+        second_name = NO_TOKEN
+        if self.consume(TokenKind.COMMA):
+            second_name = self._position
+            if not self.consume(TokenKind.IDENTIFIER):
+                self.print_error("Expected identifier")
 
-        if not self.consume("KEYWORD"):
+        # any keyword is accepted in place of 'in'
+        if not self.consume_any(KEYWORD_KINDS):
             self.print_error("Expected keyword 'in'")
 
-        if self.match("token", "LBRACKET"):
-            self.array()
-        elif self.match("token", "IDENTIFIER"):
-            self.consume("IDENTIFIER")
+        if self.match(TokenKind.LBRACKET):
+            iterable = self.array()
+        elif self.match(TokenKind.IDENTIFIER):
+            self.consume(TokenKind.IDENTIFIER)
+            iterable = self.add_node(NodeKind.NAME, self._position - 1, self._position - 1)
         else:
             self.print_error("Expected array or identifier")
 
-        if not self.consume("COLON"):
+        if not self.consume(TokenKind.COLON):
             self.print_error("Expected colon ':'")
-        self.block()
+        return self.add_node(NodeKind.FOR, name, start, [iterable, self.block()], second_name)
 
     def function_statement(self):
-        self.consume("KEYWORD")
-        if not self.consume("IDENTIFIER"):
+        start = self._position
+        children = []
+        self.consume(TokenKind.DEFINE)
+        name = self._position
+        if not self.consume(TokenKind.IDENTIFIER):
             self.print_error("Expected identifier")
 
-        if not self.consume("LPAREN"):
+        if not self.consume(TokenKind.LPAREN):
             self.print_error("Expected opening parenthesis '('")
 
         # optional zero or more parameters
-        while not self.match("token", "RPAREN"):
-            if not self.consume("IDENTIFIER"):
+        while not self.match(TokenKind.RPAREN):
+            parameter = self._position
+            if not self.consume(TokenKind.IDENTIFIER):
                 self.print_error("Expected identifier")
-            if self.consume("ASSIGN"):
-                self.expression()
-            if not self.consume("COMMA"):
+            default = [self.expression()] if self.consume(TokenKind.ASSIGN) else []
+            children.append(self.add_node(NodeKind.PARAMETER, parameter, parameter, default))
+            if not self.consume(TokenKind.COMMA):
                 break
 
-        if not self.consume("RPAREN"):
+        if not self.consume(TokenKind.RPAREN):
             self.print_error("Expected closing parenthesis ')'")
 
-        if not self.consume("COLON"):
+        if not self.consume(TokenKind.COLON):
             self.print_error("Expected colon ':'")
-        self.block()
+        children.append(self.block())
+        return self.add_node(NodeKind.FUNCTION, name, start, children)
 
+    # the production is looked up by name, so wrappers set on the instance (see profiler.py) are used
     def compound_stmt(self):
-        if self.match("lexeme", "if"):
-            self.if_statement()
-        elif self.match("lexeme", "which"):
-            self.which_statement()
-        elif self.match("lexeme", "while"):
-            self.while_statement()
-        elif self.match("lexeme", "for"):
-            self.for_statement()
-        elif self.match("lexeme", "define"):
-            self.function_statement()
+        production = COMPOUND_STATEMENTS.get(self.current_kind)
+        if production is None:
+            self.print_error("Invalid statement")
+        return getattr(self, production)()
 
     # ---- Compound Statement End ----
 
     def statement(self):
         # simple stmt
-        if self.match("token", ["IDENTIFIER", "BUILT_IN_FUNCTION"]):
-            self.simple_stmt()
-            if not self.consume("NEWLINE"):
+        if self.match_any(SIMPLE_STMT_FIRST):
+            node = self.simple_stmt()
+            if not self.consume(TokenKind.NEWLINE):
                 self.print_error("Expected newline at the end of the statement")
+            return node
         # compound stmt
-        elif self.match("token", "KEYWORD"):
-            self.compound_stmt()
+        elif self.match_any(KEYWORD_KINDS):
+            return self.compound_stmt()
         else:
             self.print_error("Invalid statement")
 
     def rook_pl(self):
-        self.run_statements("EOF")
-        self.consume("EOF")
+        statements = self.run_statements(TokenKind.EOF)
+        self.consume(TokenKind.EOF)
+        if self.ast is not None:
+            self.ast.root = self.add_node(NodeKind.PROGRAM, NO_TOKEN, 0, statements)
 
+    # returns the syntax errors of the whole script, at most max_errors
     def parse(self):
-        self.rook_pl()
-        if self.tokens.is_empty():
-            print("Parsing successful")
+        try:
+            self.rook_pl()
+        except ErrorLimitReached:
+            pass
+        return self.diagnostics
@@ -0,0 +1,134 @@
+import csv
+import json
+import mmap
+import os
+import re
+
+import wcwidth
+
+from token_buffer import TokenBuffer, pack_header, unpack_sections
+
+FORMATS = {
+    "table": ".rtable",
+    "jsonl": ".jsonl",
+    "csv": ".csv",
+    "binary": ".rtokens",
+}
+OUTPUT_DIRECTORY = "rookie-tables"
+HEADERS = ["TOKEN", "LEXEME", "COLUM_NO"]
+BINARY_MAGIC = b"RKT2"
+# number of rows formatted before they are written to the file
+CHUNK_ROWS = 4096
+
+# ANSI escape codes take no space when the table measures its cells
+ANSI_ESCAPES = re.compile(r"\033\[[0-9;]*m|\033\(B")
+
+
+def default_output_path(filename: str, table_format: str):
+    return os.path.join(OUTPUT_DIRECTORY, filename + FORMATS[table_format])
+
+
+def write_table(tokens: TokenBuffer, output_path: str, table_format: str = "table"):
+    if table_format == "table":
+        with open(output_path, "w") as file:
+            write_text_table(tokens, file)
+    elif table_format == "jsonl":
+        with open(output_path, "w") as file:
+            write_jsonl(tokens, file)
+    elif table_format == "csv":
+        with open(output_path, "w", newline="") as file:
+            write_csv(tokens, file)
+    elif table_format == "binary":
+        with open(output_path, "wb") as file:
+            write_binary(tokens, file)
+    else:
+        raise Exception(f"Unknown table format: {table_format}")
+
+
+# display width of a cell, measured the same way as PrettyTable does
+def cell_width(text: str):
+    if text.isascii() and text.isprintable():
+        return len(text)
+    return wcwidth.wcswidth(ANSI_ESCAPES.sub("", text))
+
+
+# centers text like PrettyTable and str.center, extra space goes right for odd widths
+def center(text: str, width: int):
+    text_width = cell_width(text)
+    excess = width - text_width
+    if excess % 2:
+        if text_width % 2:
+            return (excess // 2) * " " + text + (excess // 2 + 1) * " "
+        return (excess // 2 + 1) * " " + text + (excess // 2) * " "
+    return (excess // 2) * " " + text + (excess // 2) * " "
+
+
+# writes the same layout as PrettyTable.get_string(), without building the table in memory
+def write_text_table(tokens: TokenBuffer, file):
+    # an empty table is an empty string
+    if not len(tokens):
+        return
+
+    names, lexemes = tokens.used_values()
+    column_nos = {column_no: str(column_no) for column_no in set(tokens.columns()[3])}
+
+    # one pass over the distinct values gives the width of every column
+    widths = [
+        max([cell_width(HEADERS[0])] + [cell_width(name) for name in names.values()]),
+        max([cell_width(HEADERS[1])] + [cell_width(lexeme) for lexeme in lexemes.values()]),
+        max([cell_width(HEADERS[2])] + [cell_width(text) for text in column_nos.values()]),
+    ]
+    hrule = "+" + "+".join("-" * (width + 2) for width in widths) + "+"
+
+    # every distinct cell is centered once
+    name_cells = {kind: center(name, widths[0]) for kind, name in names.items()}
+    lexeme_cells = {lexeme_id: center(lexeme, widths[1]) for lexeme_id, lexeme in lexemes.items()}
+    column_cells = {column_no: center(text, widths[2]) for column_no, text in column_nos.items()}
+
+    header = "| " + " | ".join(center(title, width) for title, width in zip(HEADERS, widths)) + " |"
+    file.write(f"{hrule}\n{header}\n{hrule}\n")
+
+    chunk = []
+    for kind, lexeme_id, _, column_no, _ in tokens.id_rows():
+        chunk.append(f"| {name_cells[kind]} | {lexeme_cells[lexeme_id]} | {column_cells[column_no]} |\n")
+        if len(chunk) == CHUNK_ROWS:
+            file.write("".join(chunk))
+            chunk.clear()
+    chunk.append(hrule)
+    file.write("".join(chunk))
+
+
+def write_jsonl(tokens: TokenBuffer, file):
+    names, lexemes = tokens.used_values()
+    name_values = {kind: json.dumps(name) for kind, name in names.items()}
+    lexeme_values = {lexeme_id: json.dumps(lexeme) for lexeme_id, lexeme in lexemes.items()}
+
+    chunk = []
+    for kind, lexeme_id, line_no, column_no, indent_level in tokens.id_rows():
+        chunk.append(
+            f'{{"token": {name_values[kind]}, "lexeme": {lexeme_values[lexeme_id]}, "line_no": {line_no}, '
+            f'"column_no": {column_no}, "indent_level": {indent_level}}}\n'
+        )
+        if len(chunk) == CHUNK_ROWS:
+            file.write("".join(chunk))
+            chunk.clear()
+    file.write("".join(chunk))
+
+
+def write_csv(tokens: TokenBuffer, file):
+    writer = csv.writer(file)
+    writer.writerow(["TOKEN", "LEXEME", "LINE_NO", "COLUMN_NO", "INDENT_LEVEL"])
+    writer.writerows(tokens.rows())
+
+
+# the token columns without the source lines, readable with read_binary
+def write_binary(tokens: TokenBuffer, file):
+    sections = tokens.to_sections()
+    file.write(pack_header(BINARY_MAGIC, sections))
+    for section in sections:
+        file.write(section)
+
+
+def read_binary(input_path: str):
+    with open(input_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        return TokenBuffer.from_sections(unpack_sections(BINARY_MAGIC, data))
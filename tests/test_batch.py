@@ -0,0 +1,55 @@
+# Checks that batch.py reports a file it cannot read or check as an error of that file and goes on
+# with the others, in one process and across a pool.
+# Run from the project root: python -m unittest tests.test_batch
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import batch
+from batch import check_files
+
+
+class BatchTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name: str, content: bytes):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "wb") as file:
+            file.write(content)
+        return path
+
+    def test_unreadable_files(self):
+        files = [
+            self.write("a.rook", b"x = 1\n"),
+            self.write("b.rook", b'x = "\xff\xfe"\n'),
+            os.path.join(self.directory.name, "missing.rook"),
+            self.write("c.rook", b"x = \n"),
+        ]
+        for workers in [1, 2]:
+            with self.subTest(workers=workers):
+                results = check_files(files, workers=workers, chunk_size=1)
+                self.assertEqual([result.path for result in results], files)
+                kinds = [error.kind for result in results for error in result.errors]
+                self.assertEqual(kinds, ["read", "read", "parser"])
+
+    def test_unexpected_error(self):
+        files = [self.write("a.rook", b"x = 1\n"), self.write("b.rook", b"x = 2\n")]
+        lexer = batch.ENGINES["table"]
+
+        def failing_lexer(path: str, code: str):
+            if path == files[0]:
+                raise IndexError("out of range")
+            return lexer(path, code)
+
+        with mock.patch.dict(batch.ENGINES, {"table": failing_lexer}):
+            results = check_files(files, workers=1)
+        self.assertEqual(results[0].errors[0].kind, "internal")
+        self.assertEqual(results[0].errors[0].message, "IndexError: out of range")
+        self.assertTrue(results[1].is_ok())
+
+
+if __name__ == "__main__":
+    unittest.main()
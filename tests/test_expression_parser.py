@@ -0,0 +1,69 @@
+# The precedence-climbing expression parser against the recursive descent productions it replaced:
+# on randomly generated expressions, valid and broken ones, both must accept the same language with
+# the same errors at the same tokens.
+# Run from the project root: python -m unittest tests.test_expression_parser
+import random
+import unittest
+
+from benchmarks.expression_parser import ReferenceParser, tokenize
+from benchmarks.program_generator import ProgramGenerator
+from syntax import ParseError, Parser
+
+CASES = 20000
+SEED = 1903
+# the pieces broken expressions are made of
+FRAGMENTS = ["a", "1", "2.5", '"s"', "true", "+", "-", "*", "/", "%", "<", "==", ">=", "!="]
+FRAGMENTS += ["and", "or", "not", "in", "to", "step", ":", ",", "(", ")", "[", "]"]
+# statements the expression is placed in, the parser reaches expressions from each of them
+CONTEXTS = [
+    "x = {}\n",
+    "print({})\n",
+    "if {}:\n    y = 1\n",
+    "while {}:\n    y = 1\n",
+    "define f(a = {}):\n    y = 1\n",
+    "for a in [{}]:\n    y = 1\n",
+    "x = {}\ny = 2\n",
+]
+
+
+# the diagnostics, the tokens consumed, and the first error when not recovering
+def parse_result(parser_class, code: str):
+    parser = parser_class(tokenize(code))
+    diagnostics = [str(error) for error in parser.parse()]
+
+    try:
+        parser_class(tokenize(code), recover=False).parse()
+        first_error = None
+    except ParseError as error:
+        first_error = str(error)
+    return diagnostics, parser._position, first_error
+
+
+def random_expression(rng: random.Random, generator: ProgramGenerator):
+    if rng.random() < 0.5:
+        return generator.expression()
+
+    # a valid expression with a few fragments inserted, or fragments only
+    parts = generator.expression().split(" ") if rng.random() < 0.5 else []
+    for _ in range(rng.randint(1, 8)):
+        parts.insert(rng.randint(0, len(parts)), rng.choice(FRAGMENTS))
+    return " ".join(parts)
+
+
+class ExpressionParserTest(unittest.TestCase):
+    def test_identical_results(self):
+        rng = random.Random(SEED)
+        generator = ProgramGenerator(SEED, expression_terms=8, array_size=3)
+        for _ in range(CASES):
+            code = rng.choice(CONTEXTS).format(random_expression(rng, generator))
+            try:
+                expected = parse_result(ReferenceParser, code)
+            except Exception:
+                # fragments the lexer rejects
+                continue
+            with self.subTest(code=code):
+                self.assertEqual(parse_result(Parser, code), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+# The incremental lexer and parser against lexing and parsing the whole file again: after every
+# randomized edit the tokens and the first error must be the same.
+# Run from the project root: python -m unittest tests.test_incremental
+import os
+import random
+import tempfile
+import unittest
+
+from benchmarks.incremental_edits import SAMPLE_PATH, full_result, random_edit, token_rows
+from incremental import IncrementalDocument
+from syntax import ParseError
+
+COPIES = 100
+EDITS = 300
+SEEDS = [1903, 7, 42]
+
+
+# the tokens and error of the document, in the form of full_result
+def incremental_result(document: IncrementalDocument):
+    result = document.result
+    error = result.error
+    if error is None:
+        return token_rows(result.tokens), None
+    if isinstance(error, ParseError):
+        return token_rows(result.tokens), str(error)
+    return None, f"{type(error).__name__}: {error}"
+
+
+class IncrementalTest(unittest.TestCase):
+    def test_randomized_edits(self):
+        with open(SAMPLE_PATH, "r") as file:
+            sample = file.read().rstrip("\n") + "\n"
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "edited.rook")
+            for seed in SEEDS:
+                rng = random.Random(seed)
+                document = IncrementalDocument(sample * COPIES)
+                for edit in range(EDITS):
+                    start_line, end_line, text = random_edit(rng, len(document.get_text().split("\n")))
+                    document.edit(start_line, end_line, text)
+                    with open(path, "w") as file:
+                        file.write(document.get_text())
+                    with self.subTest(seed=seed, edit=edit, lines=(start_line, end_line), text=text):
+                        self.assertEqual(incremental_result(document), full_result(path))
+
+    def test_lexeme_table_stays_bounded(self):
+        document = IncrementalDocument("total = 0\nvalue = 1\n")
+        for edit in range(5000):
+            document.edit(2, 2, f"value{edit} = {edit}")
+            tokens = document.result.tokens
+            # the limit of incremental.py plus the lexemes of the last edit
+            self.assertLessEqual(tokens.lexeme_count(), 3 * len(tokens) + 1024)
+        self.assertEqual([token.lexeme for token in tokens][:6], ["total", "=", "0", "", "value4999", "="])
+
+
+if __name__ == "__main__":
+    unittest.main()
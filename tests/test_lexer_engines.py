@@ -0,0 +1,66 @@
+# The table-driven scanner and the regex engine against the per-character if/elif scanner they
+# replaced: all three must produce the same tokens and errors on every sample script.
+# Run from the project root: python -m unittest tests.test_lexer_engines
+import glob
+import os
+import tempfile
+import unittest
+
+from benchmarks.lexer_throughput import ReferenceLexer
+from lexer import Lexer
+from regex_lexer import RegexLexer
+
+SCRIPT_PATTERNS = [os.path.join("rookie-scripts", "*.rook"), os.path.join("benchmarks", "programs", "*.rook")]
+# malformed scripts, the scanners must agree on them as well
+BROKEN = [
+    "x = 1.\n",
+    "x = 1a\n",
+    "a_ = 1\n",
+    "x == = 1\n",
+    "x =+ 1\n",
+    "x = !1\n",
+    'x = "unterminated\n',
+    "x = $\n",
+    "x = 1\n  y = 2\n",
+]
+
+
+# returns every token field, or the message of the error raised while lexing; the reference scanner
+# raises a plain Exception where the others raise LexerError
+def lex_result(lexer_class, path: str):
+    try:
+        lexer = lexer_class(path)
+        lexer.start_parse()
+    except Exception as error:
+        return str(error)
+
+    return [
+        (token.kind, token.lexeme, token.line_no, token.column_no, token.indent_level, token.line_code)
+        for token in lexer.get_tokens().get_tokens()
+    ]
+
+
+class LexerEnginesTest(unittest.TestCase):
+    def test_identical_tokens(self):
+        paths = sorted(path for pattern in SCRIPT_PATTERNS for path in glob.glob(pattern))
+        self.assertTrue(paths)
+        for path in paths:
+            expected = lex_result(ReferenceLexer, path)
+            for lexer_class in [Lexer, RegexLexer]:
+                with self.subTest(path=path, lexer=lexer_class.__name__):
+                    self.assertEqual(lex_result(lexer_class, path), expected)
+
+    def test_identical_errors(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "broken.rook")
+            for source in BROKEN:
+                with open(path, "w") as file:
+                    file.write(source)
+                expected = lex_result(ReferenceLexer, path)
+                for lexer_class in [Lexer, RegexLexer]:
+                    with self.subTest(source=source, lexer=lexer_class.__name__):
+                        self.assertEqual(lex_result(lexer_class, path), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+# The hand-written parser against the LL(1) parser generated from new_grammar.ebnf, the grammar is the
+# reference for the language: both must accept and reject the same scripts, apart from the gaps and
+# bugs of the hand-written parser listed below.
+# Run from the project root: python -m unittest tests.test_ll1_parser
+import glob
+import importlib
+import os
+import unittest
+from unittest import mock
+
+import ll1_generator
+import ll1_parser
+import ll1_tables
+from benchmarks.program_generator import SHAPES, generate_program
+from lexer import Lexer
+from ll1_parser import LL1Parser
+from syntax import Parser
+
+SCRIPT_PATTERNS = [os.path.join("rookie-scripts", "*.rook"), os.path.join("benchmarks", "programs", "*.rook")]
+PROGRAM_SIZE = 16 * 1024
+# scripts both parsers accept
+ACCEPTED = [
+    "x = 1 + 2 * 3 % 4\n",
+    "x = a and not b\n",
+    "x = (a and b) and (c and d)\n",
+    "x = a and b and c or not d\n",
+    "x = a or b or (c and d) and e\n",
+    "x = a < b == c in d\n",
+    "x = a not in b\n",
+    "x = -5\n",
+    "x = 1 - -5 * +a\n",
+    "x = not -a < (-b)\n",
+    "x = [a, 2, 3]\n",
+    "x = [1 to 10 step: 2]\n",
+    "x = [1 + 2, -3 to 10]\n",
+    "x = [1 and 3]\n",
+    "x = []\n",
+    "x = input()\n",
+    "x, y = 1, 2\n",
+    "x, y = input()\n",
+    "x += 1 and 2\n",
+    "f()\n",
+    "f(1, a)\n",
+    'print(1, a, separator=",")\n',
+    'print(separator=",")\n',
+    "from m import a, b\n",
+    "if a:\n    x = 1\nelif b:\n    x = 2\nelse:\n    x = 3\n",
+    "which a:\n    instance < 3:\n        x = 1\n    default:\n        x = 2\n",
+    "for i, v in [1 to 3]:\n    print(i)\n",
+    "define f(a, b = 2):\n    print(a)\n",
+]
+# scripts both parsers reject
+REJECTED = [
+    "x = not not a\n",
+    "x = a < not b\n",
+    'input("a")\n',
+    "from m import a,\n",
+    "x = 1, 2,\n",
+    "x = [1 2]\n",
+    "x = [1 1 to 5]\n",
+    "x = a not in b c\n",
+    "x = a not in in b\n",
+    "x = - -5\n",
+    "x = -not a\n",
+    "x, = 1\n",
+]
+# (script, what differs) for the scripts only the hand-written parser accepts, although the grammar
+# does not; it is more lenient in places, mostly where it skips a token without checking it
+ONLY_RECURSIVE_ACCEPTS = [
+    ("x = [1, 2,]\n", "an array can end with a comma"),
+    ("x = [a if 5]\n", "any keyword is accepted in place of 'to'"),
+    ("f(1,)\n", "the arguments of a call can end with a comma"),
+    ("print(1,)\n", "the values of a print can end with a comma"),
+    ('print(1 separator=",")\n', "no comma is needed before the separator"),
+    ('print(1 if=",")\n', "any keyword is accepted in place of 'separator'"),
+]
+# the same for the scripts of the language the hand-written parser rejects
+ONLY_LL1_ACCEPTS = []
+
+
+# whether each parser rejects the source, as (recursive, ll1)
+def rejects(source: str, path: str = "test.rook"):
+    lexer = Lexer(path, source)
+    lexer.start_parse()
+    tokens = lexer.get_tokens()
+    recursive = bool(Parser(tokens).parse())
+    tokens.reset(0)
+    return recursive, bool(LL1Parser(tokens).parse())
+
+
+class LL1ParserTest(unittest.TestCase):
+    def test_tables_up_to_date(self):
+        self.assertEqual(ll1_tables.GRAMMAR_HASH, ll1_generator.grammar_hash())
+
+    # stale tables only stop the LL(1) parser, importing it still works for the hand-written one
+    def test_stale_tables(self):
+        with mock.patch.object(ll1_generator, "grammar_hash", return_value="stale"):
+            importlib.reload(ll1_parser)
+            try:
+                lexer = Lexer("test.rook", "x = 1\n")
+                lexer.start_parse()
+                self.assertEqual(Parser(lexer.get_tokens()).parse(), [])
+                with self.assertRaises(ll1_parser.StaleTablesError):
+                    ll1_parser.LL1Parser(lexer.get_tokens())
+            finally:
+                importlib.reload(ll1_parser)
+
+    def test_accepted(self):
+        for source in ACCEPTED:
+            with self.subTest(source=source):
+                self.assertEqual(rejects(source), (False, False))
+
+    def test_rejected(self):
+        for source in REJECTED:
+            with self.subTest(source=source):
+                self.assertEqual(rejects(source), (True, True))
+
+    def test_known_differences(self):
+        for expected, cases in [((False, True), ONLY_RECURSIVE_ACCEPTS), ((True, False), ONLY_LL1_ACCEPTS)]:
+            for source, difference in cases:
+                with self.subTest(source=source, difference=difference):
+                    self.assertEqual(rejects(source), expected)
+
+    def test_scripts(self):
+        paths = sorted(path for pattern in SCRIPT_PATTERNS for path in glob.glob(pattern))
+        self.assertTrue(paths)
+        for path in paths:
+            with open(path) as file:
+                source = file.read()
+            with self.subTest(path=path):
+                recursive, ll1 = rejects(source, path)
+                self.assertEqual(recursive, ll1)
+
+    def test_generated_programs(self):
+        for shape in SHAPES:
+            with self.subTest(shape=shape):
+                self.assertEqual(rejects(generate_program(shape, PROGRAM_SIZE)), (False, False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+# Error recovery of the parser: one parse reports every syntax error of the script with its line,
+# and --max-errors N stops after N of them.
+# Run from the project root: python -m unittest tests.test_syntax_errors
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from benchmarks.expression_parser import tokenize
+from syntax import Parser
+
+SOURCE = """x = 1 +
+y = 2
+print(y
+z = 3
+if x >:
+    z = 4
+w = [1, 2
+total = x * 2
+"""
+# line and message of every error in SOURCE
+ERRORS = [
+    (1, "Invalid value"),
+    (3, "Expected ')' after expressions and arguments"),
+    (5, "Invalid value"),
+    (7, "Expected closing bracket ']'"),
+]
+
+
+def error_lines(diagnostics: list):
+    return [(error.line_no, str(error).split("\n")[0].split(": ", 1)[1]) for error in diagnostics]
+
+
+class SyntaxErrorsTest(unittest.TestCase):
+    def test_every_error_reported(self):
+        self.assertEqual(error_lines(Parser(tokenize(SOURCE)).parse()), ERRORS)
+
+    def test_max_errors(self):
+        for max_errors in [1, 2, 3]:
+            with self.subTest(max_errors=max_errors):
+                diagnostics = Parser(tokenize(SOURCE), max_errors=max_errors).parse()
+                self.assertEqual(error_lines(diagnostics), ERRORS[:max_errors])
+
+    def test_max_errors_option(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "errors.rook")
+            with open(path, "w") as file:
+                file.write(SOURCE)
+            process = subprocess.run(
+                [sys.executable, "main.py", path, "--check", "--max-errors", "2"],
+                capture_output=True,
+                text=True,
+            )
+        reported = [line for line in (process.stdout + process.stderr).split("\n") if line.startswith("Error at")]
+        self.assertEqual(reported, [f"Error at line {line_no}: {message}" for line_no, message in ERRORS[:2]])
+        self.assertEqual(process.returncode, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,300 @@
+# Runs scripts on the virtual machine and on the Python backend and checks what they print, the
+# runtime errors they stop with, and that both backends agree.
+# Run from the project root: python -m unittest tests.test_vm
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from bytecode import COMPARISON_JUMPS, Opcode
+from compiler import CompileError, compile_program
+from lexer import Lexer
+from python_backend import compile_python, run_python
+from syntax import Parser
+from vm import MAX_CALL_DEPTH, RangeArray, RookieRuntimeError, run_program
+
+BACKENDS = {"vm": (compile_program, run_program), "python": (compile_python, run_python)}
+
+
+def parse(source: str):
+    lexer = Lexer("test.rook", source)
+    lexer.start_parse()
+    parser = Parser(lexer.get_tokens(), build_ast=True)
+    errors = parser.parse()
+    if errors:
+        raise AssertionError(f"The script does not parse:\n{errors[0]}")
+    return parser.ast
+
+
+# what the script prints on the backend, and the runtime error it stops with or None
+def run(source: str, backend: str, stdin: str = ""):
+    compile_script, run_script = BACKENDS[backend]
+    output = io.StringIO()
+    try:
+        run_script(compile_script(parse(source)), output, io.StringIO(stdin))
+    except RookieRuntimeError as error:
+        return output.getvalue(), str(error)
+    return output.getvalue(), None
+
+
+# main.py --run on the script with the backend, as (stdout, stderr, exit code)
+def run_main(source: str, backend: str):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "test.rook")
+        with open(path, "w") as file:
+            file.write(source)
+        process = subprocess.run(
+            [sys.executable, "main.py", path, "--run", "--no-table", "--backend", backend],
+            capture_output=True,
+            text=True,
+        )
+    return process.stdout, process.stderr, process.returncode
+
+
+class BackendTest(unittest.TestCase):
+    # runs the script on both backends and checks the output and the error of each
+    def assertRuns(self, source: str, expected: str, error: str | None = None, stdin: str = ""):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                self.assertEqual(run(source, backend, stdin), (expected, error))
+
+
+class ShortCircuitTest(BackendTest):
+    def test_values(self):
+        source = "\n".join(
+            [
+                "a = true",
+                "b = false",
+                "print(a or b, b or a, b or b, a and b and a, a and a and a)",
+                "print(1 or 2, 0 or 2, 0 and 1, 3 and 4)",
+                "print(not b and a or b, b or not a and a, (a or b) and b)",
+                "print(1 < 2 or 3 < 2 and false)",
+            ]
+        )
+        self.assertRuns(source, "true true false false true\n1 2 0 4\ntrue false false\ntrue\n")
+
+    # the right side would stop the script with an error if it was evaluated
+    def test_right_side_skipped(self):
+        source = "\n".join(
+            [
+                "a = true",
+                "b = false",
+                "print(a or 1 / 0, b and 1 / 0, a or missing, b and missing and 1 / 0)",
+                "if b and 1 / 0 or a:",
+                '    print("taken")',
+            ]
+        )
+        self.assertRuns(source, "true false true false\ntaken\n")
+
+    def test_right_side_evaluated(self):
+        self.assertRuns("a = false\nprint(a or 1 / 0)\n", "", "Runtime error at line 2: Division by zero")
+
+    def test_main_run(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                stdout, _, code = run_main("a = 0\nprint(a and 1 / 0, a or 2 or 1 / 0)\n", backend)
+                self.assertEqual((stdout, code), ("0 2\n", 0))
+
+
+class ExecutionTest(BackendTest):
+    def test_arithmetic(self):
+        source = 'print(7 + 3 * 2, 7 - 10 / 4, 17 % 5, 2.5 * 2, (1 + 2) * 3, 10 / 2, "ab" + "cd")\n'
+        self.assertRuns(source, "13 4.5 2 5.0 9 5.0 abcd\n")
+
+    # every comparison that ends a condition is compiled to a fused jump, in 'if' and in 'while'
+    def test_comparison_jumps(self):
+        lines = []
+        for operator in ["<", ">", "==", "!=", ">=", "<="]:
+            lines += [
+                "count = 0",
+                "i = 0",
+                "while i < 5:",
+                f"    if i {operator} 2:",
+                "        count += 1",
+                "    i += 1",
+                "print(count)",
+            ]
+        source = "\n".join(lines) + "\n"
+        fused = set(compile_program(parse(source)).code.ops)
+        self.assertTrue(all(int(jump) in fused for jump in COMPARISON_JUMPS.values()))
+        self.assertRuns(source, "2\n2\n1\n4\n3\n3\n")
+
+    def test_for_index_and_value(self):
+        source = "\n".join(
+            [
+                "for i, v in [10, 20, 30]:",
+                "    print(i, v)",
+                "for i, v in [1 to 5 step: 2]:",
+                "    print(i, v)",
+            ]
+        )
+        self.assertRuns(source, "0 10\n1 20\n2 30\n0 1\n1 3\n2 5\n")
+
+    def test_not_in(self):
+        source = "x = 3\nprint(x not in [1 to 10], x in [1 to 10], 20 not in [1, 2], not x not in [3])\n"
+        self.assertRuns(source, "false true true true\n")
+
+    def test_sign(self):
+        source = "x = -5\nprint(x, 1 - -5, -x * 2, -(x + 1), +x, 2 * -x, -2.5, [-1, +2])\n"
+        self.assertRuns(source, "-5 6 10 4 -5 10 -2.5 [-1, 2]\n")
+        self.assertRuns('x = -"s"\n', "", "Runtime error at line 1: Unsupported operand type for unary '-'")
+
+    # several names take one value each, the values are computed before any name is assigned
+    def test_several_names(self):
+        source = 'x, y = 1, "s"\nx, y = y, x\nprint(x, y)\nz = 1, 2\nprint(z)\n'
+        self.assertRuns(source, "s 1\n[1, 2]\n")
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                with self.assertRaisesRegex(CompileError, "Expected 2 values for 2 names but got 1"):
+                    BACKENDS[backend][0](parse("x, y = 1\n"))
+
+    # a nested function reads and updates the locals of the calls that enclose it, a name it declares is its own
+    def test_nested_functions(self):
+        source = "\n".join(
+            [
+                "x = 5",
+                "define outer(a):",
+                "    b = a * 2",
+                "    define inner(c):",
+                "        define innermost():",
+                "            print(a, b, c, x)",
+                "        innermost()",
+                "        y = 7",
+                "        print(y)",
+                "    inner(3)",
+                "    b = 0",
+                "    inner(4)",
+                "outer(1)",
+                "outer(10)",
+            ]
+        )
+        self.assertRuns(source, "1 2 3 5\n7\n1 0 4 5\n7\n10 20 3 5\n7\n10 0 4 5\n7\n")
+        source = "define f():\n    define g():\n        print(a)\n    g()\n    a = 1\nf()\n"
+        self.assertRuns(source, "", "Runtime error at line 3: Variable 'a' is used before it is assigned")
+        # an update like 'x += 1' changes the local of the enclosing function, as it changes a global
+        source = "\n".join(
+            [
+                "define outer():",
+                "    x = 10",
+                "    define inner(y):",
+                "        x += 1",
+                "        print(x, y)",
+                "    define counter():",
+                "        define bump():",
+                "            x += 1",
+                "        bump()",
+                "        x *= 2",
+                "    inner(5)",
+                "    counter()",
+                "    print(x)",
+                "outer()",
+            ]
+        )
+        self.assertRuns(source, "11 5\n24\n")
+        source = "define f():\n    define g():\n        a += 1\n    g()\n    a = 1\nf()\n"
+        self.assertRuns(source, "", "Runtime error at line 3: Variable 'a' is used before it is assigned")
+
+    def test_default_arguments(self):
+        source = "\n".join(
+            [
+                'define f(a, b = 2, c = "x"):',
+                "    print(a, b, c)",
+                "f(1)",
+                "f(1, 5)",
+                'f(1, 5, "y")',
+            ]
+        )
+        self.assertRuns(source, "1 2 x\n1 5 x\n1 5 y\n")
+
+    def test_separator(self):
+        source = 'print(1, 2, 3, separator=", ")\nprint("a", true, [1, "s"], separator="-")\nprint(separator="-")\n'
+        self.assertRuns(source, '1, 2, 3\na-true-[1, "s"]\n\n')
+
+    def test_runtime_errors(self):
+        # the scope pass also prints its warnings about names and calls on stderr
+        cases = [
+            ("x = 1\nprint(x)\ny = x / 0\nprint(2)\n", "1\n", "Runtime error at line 3: Division by zero", ""),
+            (
+                "print(1)\nprint(missing)\n",
+                "1\n",
+                "Runtime error at line 2: Variable 'missing' is not defined",
+                "Warning at line 2: Variable 'missing' is not defined\n",
+            ),
+            ('x = "a" + 1\n', "", "Runtime error at line 1: Unsupported operand types for '+'", ""),
+            ('for i in [1, 2]:\n    y = i < "s"\n', "", "Runtime error at line 2: Unsupported operand types for '<'", ""),
+            (
+                "define f(a):\n    print(a)\nf()\n",
+                "",
+                "Runtime error at line 3: 'f' is missing the argument 'a'",
+                "Warning at line 3: 'f' is missing the argument 'a'\n",
+            ),
+            ("x = input()\n", "", "Runtime error at line 1: No input left to read", ""),
+            ("x = 5\nx()\n", "", "Runtime error at line 2: An integer cannot be called", ""),
+            ('x = "s"\nx()\n', "", "Runtime error at line 2: A string cannot be called", ""),
+            ("x = 5\nfor i in x:\n    print(i)\n", "", "Runtime error at line 2: Cannot loop over an integer", ""),
+        ]
+        for source, output, error, warnings in cases:
+            self.assertRuns(source, output, error)
+            for backend in BACKENDS:
+                with self.subTest(source=source, backend=backend):
+                    self.assertEqual(run_main(source, backend), (output + error + "\n", warnings, 1))
+
+    # arrays deeper than Python recurses are printed, and comparing them is a runtime error
+    def test_deeply_nested_arrays(self):
+        build = "x = []\ny = []\ni = 0\nwhile i < 100000:\n    x = [x]\n    y = [y]\n    i += 1\n"
+        nested = "[" * 100001 + "]" * 100001
+        self.assertRuns(build + "print(x)\n", nested + "\n")
+        error = "Runtime error at line 9: Value nested too deeply"
+        self.assertRuns(build + "print(1)\nz = x == y\n", "1\n", error)
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                self.assertEqual(run_main(build + "print(1)\nz = x == y\n", backend), ("1\n" + error + "\n", "", 1))
+
+    # the Python backend raises the recursion limit of the interpreter above MAX_CALL_DEPTH, so it
+    # only matches the virtual machine up to the limit and on unbounded recursion
+    def test_call_depth(self):
+        source = "define down(n):\n    if n > 1:\n        down(n - 1)\n    else:\n        print(n)\ndown({})\n"
+        self.assertRuns(source.format(MAX_CALL_DEPTH), "1\n")
+        self.assertEqual(
+            run(source.format(MAX_CALL_DEPTH + 1), "vm"), ("", "Runtime error at line 3: Too many nested calls")
+        )
+        self.assertRuns("define up(n):\n    up(n + 1)\nup(0)\n", "", "Runtime error at line 2: Too many nested calls")
+
+
+class AgreementTest(unittest.TestCase):
+    # the backends print the same and stop with the same error for every operator on every pair of
+    # value types, including the type errors Python words after another operator
+    def test_operators(self):
+        values = ["0", "2", "2.5", '"s"', '"%s-%s"', "true", '[1, "a"]', "[1 to 3]"]
+        operators = ["+", "-", "*", "/", "%", "<", ">", "==", "!=", ">=", "<=", "in", "not in"]
+        sources = [f"print({sign}{value})\n" for sign in "-+" for value in values]
+        for left in values:
+            for right in values:
+                sources += [f"print({left} {operator} {right})\n" for operator in operators]
+                sources.append(f"print(1 < 2 > {left} < {right})\n")
+        for source in sources:
+            with self.subTest(source=source):
+                self.assertEqual(run(source, "python"), run(source, "vm"))
+
+
+class RangeTest(BackendTest):
+    # membership of a range literal is looked up in its bounds, the elements are never built
+    def test_membership_stays_lazy(self):
+        source = "\n".join(
+            [
+                "x = 10",
+                "print(x not in [1 to 100000000 step: 3], x in [1 to 100000000 step: 3])",
+                "print(11 not in [1 to 100000000 step: 3], 10.0 not in [1 to 100000000 step: 3])",
+                "print(x not in [0, 5 to 100000000 step: 5], 7 not in [20 to 1 step: 2])",
+            ]
+        )
+        self.assertIn(int(Opcode.NOT_IN), compile_program(parse(source)).code.ops)
+        with mock.patch.object(RangeArray, "materialize", side_effect=AssertionError("range was built")):
+            self.assertRuns(source, "false true\ntrue false\nfalse true\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,28 @@
+from token_kinds import KIND_NAMES, TokenKind
+
+
 class Token:
-    def __init__(self, name: str, lexeme: str, line_no: int, line_code="", column_no=0, indent_level=0) -> None:
-        self.name = name
+    __slots__ = ("kind", "lexeme", "line_no", "column_no", "indent_level", "_line_code", "_lines")
+
+    def __init__(
+        self, kind: TokenKind, lexeme: str, line_no: int, line_code="", column_no=0, indent_level=0, lines=None
+    ) -> None:
+        self.kind = kind
         self.lexeme = lexeme
         self.line_no = line_no
         self.column_no = column_no
-        self.line_code = "  " + line_code.strip()
         self.indent_level = indent_level
+        # the line is looked up in the shared line table only when it is displayed
+        self._line_code = line_code
+        self._lines = lines
+
+    # the name shown in token tables and error messages
+    @property
+    def name(self):
+        return KIND_NAMES[self.kind]
+
+    @property
+    def line_code(self):
+        if self._lines is not None:
+            return self._lines.line_code(self.line_no)
+        return "  " + self._line_code.strip()
@@ -0,0 +1,170 @@
+import struct
+from array import array
+from typing import Optional
+
+from line_table import LineTable
+from token_ import Token
+from token_kinds import KIND_NAMES, TokenKind
+
+
+class TokenBuffer:
+    def __init__(self, lines: Optional[LineTable] = None, share_ids_with: Optional["TokenBuffer"] = None):
+        self.lines = lines
+        self.frozen = False
+
+        # lexemes are interned, the columns only store their ids, buffers sharing
+        # the table can copy tokens from each other without remapping
+        if share_ids_with is not None:
+            self._lexeme_values = share_ids_with._lexeme_values
+            self._lexeme_ids = share_ids_with._lexeme_ids
+        else:
+            self._lexeme_values: list[str] = []
+            self._lexeme_ids: dict[str, int] = {}
+
+        # one entry per token in each column, kinds are TokenKind values
+        self._kinds = array("B")
+        self._lexemes = array("I")
+        self._line_nos = array("I")
+        self._column_nos = array("I")
+        self._indent_levels = array("I")
+        # whether the token points to its source line in the line table
+        self._has_line = array("B")
+
+    def __len__(self):
+        return len(self._kinds)
+
+    # builds a Token object for the token at the given index
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += len(self._kinds)
+        line_no = self._line_nos[index]
+        return Token(
+            TokenKind(self._kinds[index]),
+            self._lexeme_values[self._lexemes[index]],
+            line_no,
+            column_no=self._column_nos[index],
+            indent_level=self._indent_levels[index],
+            lines=self.lines if self._has_line[index] else None,
+        )
+
+    def __iter__(self):
+        for index in range(len(self._kinds)):
+            yield self[index]
+
+    # returns (kind, lexeme) of the token at the given index
+    def fields_at(self, index: int):
+        return self._kinds[index], self._lexeme_values[self._lexemes[index]]
+
+    def kind_at(self, index: int):
+        return self._kinds[index]
+
+    # number of interned lexemes, including those of buffers sharing the table
+    def lexeme_count(self):
+        return len(self._lexeme_values)
+
+    # yields (name, lexeme, line_no, column_no, indent_level) without creating Token objects
+    def rows(self):
+        kind_names, lexeme_values = KIND_NAMES, self._lexeme_values
+        for kind, lexeme, line_no, column_no, indent_level in zip(
+            self._kinds, self._lexemes, self._line_nos, self._column_nos, self._indent_levels
+        ):
+            yield kind_names[kind], lexeme_values[lexeme], line_no, column_no, indent_level
+
+    # yields (kind, lexeme id, line_no, column_no, indent_level), the kinds and ids index used_values()
+    def id_rows(self):
+        return zip(self._kinds, self._lexemes, self._line_nos, self._column_nos, self._indent_levels)
+
+    # names and lexemes referenced by at least one token, keyed by their kinds and ids
+    def used_values(self):
+        names = {kind: KIND_NAMES[kind] for kind in set(self._kinds)}
+        lexemes = {lexeme_id: self._lexeme_values[lexeme_id] for lexeme_id in set(self._lexemes)}
+        return names, lexemes
+
+    def append(self, kind: TokenKind, lexeme: str, line_no: int, column_no=0, indent_level=0, has_line=False):
+        if self.frozen:
+            raise Exception("Cannot add a token to a frozen token stream")
+
+        lexeme_id = self._lexeme_ids.get(lexeme)
+        if lexeme_id is None:
+            lexeme_id = self._lexeme_ids[lexeme] = len(self._lexeme_values)
+            self._lexeme_values.append(lexeme)
+
+        self._kinds.append(kind)
+        self._lexemes.append(lexeme_id)
+        self._line_nos.append(line_no)
+        self._column_nos.append(column_no)
+        self._indent_levels.append(indent_level)
+        self._has_line.append(has_line)
+
+    # adds an existing Token, its line must come from this buffer's line table
+    def add(self, token: Token):
+        has_line = token._lines is not None and token._lines is self.lines
+        self.append(token.kind, token.lexeme, token.line_no, token.column_no, token.indent_level, has_line)
+
+    # appends tokens start to end of a buffer sharing the same ids, shifting their line numbers
+    def extend_from(self, other: "TokenBuffer", start: int, end: int, line_delta=0):
+        if self.frozen:
+            raise Exception("Cannot add a token to a frozen token stream")
+        if other._lexeme_values is not self._lexeme_values:
+            raise Exception("Cannot copy tokens between buffers with different ids")
+
+        self._kinds.extend(other._kinds[start:end])
+        self._lexemes.extend(other._lexemes[start:end])
+        if line_delta:
+            self._line_nos.extend(array("I", [line_no + line_delta for line_no in other._line_nos[start:end]]))
+        else:
+            self._line_nos.extend(other._line_nos[start:end])
+        self._column_nos.extend(other._column_nos[start:end])
+        self._indent_levels.extend(other._indent_levels[start:end])
+        self._has_line.extend(other._has_line[start:end])
+
+    # returns the buffer as a list of byte strings, the line table is not included
+    def to_sections(self):
+        encoded = [lexeme.encode() for lexeme in self._lexeme_values]
+        sections = [array("I", map(len, encoded)).tobytes(), b"".join(encoded)]
+        for column in self.columns():
+            sections.append(column.tobytes())
+        return sections
+
+    # rebuilds a frozen buffer from the sections returned by to_sections
+    @classmethod
+    def from_sections(cls, sections: list, lines: Optional[LineTable] = None):
+        buffer = cls(lines)
+        lengths = array("I")
+        lengths.frombytes(sections[0])
+        offset = 0
+        for length in lengths:
+            buffer._lexeme_values.append(bytes(sections[1][offset : offset + length]).decode())
+            offset += length
+
+        buffer._lexeme_ids = {lexeme: lexeme_id for lexeme_id, lexeme in enumerate(buffer._lexeme_values)}
+        for column, section in zip(buffer.columns(), sections[2:]):
+            column.frombytes(section)
+        buffer.freeze()
+        return buffer
+
+    def columns(self):
+        return (self._kinds, self._lexemes, self._line_nos, self._column_nos, self._indent_levels, self._has_line)
+
+    def freeze(self):
+        self.frozen = True
+
+
+# header of a binary file made of sections: magic, section count and the length of each section
+def pack_header(magic: bytes, sections: list):
+    return magic + struct.pack(f"<I{len(sections)}I", len(sections), *map(len, sections))
+
+
+# splits a binary file written with pack_header back into its sections
+def unpack_sections(magic: bytes, data):
+    if data[: len(magic)] != magic:
+        raise ValueError("Unknown binary token format")
+    (section_count,) = struct.unpack_from("<I", data, len(magic))
+    lengths = struct.unpack_from(f"<{section_count}I", data, len(magic) + 4)
+
+    sections = []
+    offset = len(magic) + 4 + 4 * section_count
+    for length in lengths:
+        sections.append(data[offset : offset + length])
+        offset += length
+    return sections
@@ -0,0 +1,93 @@
+from enum import IntEnum
+
+import constants
+
+
+# kinds are numbered from 0, so they can index KIND_NAMES and fit in a byte
+class TokenKind(IntEnum):
+    NEWLINE = 0
+    INDENT = 1
+    DEDENT = 2
+    EOF = 3
+    IDENTIFIER = 4
+    NUMBER = 5
+    FLOAT = 6
+    STRING = 7
+    BOOLEAN_LITERAL = 8
+
+    # built-in functions
+    PRINT = 9
+    INPUT = 10
+
+    # keywords
+    FOR = 11
+    WHILE = 12
+    BREAK = 13
+    CONTINUE = 14
+    IN = 15
+    DEFINE = 16
+    RETURN = 17
+    IF = 18
+    ELIF = 19
+    ELSE = 20
+    PASS = 21
+    IMPORT = 22
+    FROM = 23
+    TO = 24
+    STEP = 25
+    WHICH = 26
+    INSTANCE = 27
+    DEFAULT = 28
+    SEPARATOR = 29
+
+    # logical operators
+    AND = 30
+    OR = 31
+    NOT = 32
+
+    # operators
+    PLUS = 33
+    MINUS = 34
+    MULTIPLY = 35
+    DIVIDE = 36
+    MODULO = 37
+    GREATER = 38
+    LESS = 39
+    ASSIGN = 40
+    GREATEROREQUAL = 41
+    LESSOREQUAL = 42
+    EQUAL = 43
+    NOTEQUAL = 44
+    PLUSASSIGN = 45
+    MINUSASSIGN = 46
+    MULTIPLYASSIGN = 47
+    DIVIDEASSIGN = 48
+
+    # delimiters
+    DOT = 49
+    COMMA = 50
+    COLON = 51
+    LPAREN = 52
+    RPAREN = 53
+    LBRACKET = 54
+    RBRACKET = 55
+
+
+KEYWORD_KINDS = frozenset(TokenKind[keyword.upper()] for keyword in constants.KEYWORDS)
+BUILT_IN_FUNCTION_KINDS = frozenset(TokenKind[name.upper()] for name in constants.BUILT_IN_FUNCTIONS)
+
+
+# the name shown in token tables, keywords and built-in functions keep their shared names
+def build_kind_names():
+    names = []
+    for kind in TokenKind:
+        if kind in KEYWORD_KINDS:
+            names.append("KEYWORD")
+        elif kind in BUILT_IN_FUNCTION_KINDS:
+            names.append("BUILT_IN_FUNCTION")
+        else:
+            names.append(kind.name)
+    return tuple(names)
+
+
+KIND_NAMES = build_kind_names()
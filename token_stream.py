@@ -1,31 +1,129 @@
-from typing import List
+from collections import deque
+from typing import Deque, Iterable, Optional
 
 from token_ import Token
+from token_buffer import TokenBuffer
 
 
 class TokenStream:
-    def __init__(self):
-        self._tokens: List[Token] = []
+    def __init__(self, tokens: Optional[TokenBuffer] = None):
+        # a frozen buffer can be shared between streams without copying
+        self._tokens = tokens if tokens is not None else TokenBuffer()
+        # index of the next token to be read, tokens before it are consumed
+        self._cursor = 0
 
     def get_tokens(self):
         return self._tokens
 
-    # checks if the list is empty
+    # checks if every token has been consumed
     def is_empty(self):
-        return len(self._tokens) == 0
+        return self._cursor >= len(self._tokens)
 
-    # returns the first token
-    def peek(self):
-        if self._tokens:
-            return self._tokens[0]
+    # returns the token k positions ahead of the cursor
+    def peek(self, k: int = 0):
+        index = self._cursor + k
+        if 0 <= index < len(self._tokens):
+            return self._tokens[index]
         else:
             raise Exception("Cannot peek to an empty token stream")
 
-    # adds a token to the end of the list
+    # returns only the kind and lexeme of a token ahead, without creating a Token object
+    def peek_fields(self, k: int = 0):
+        index = self._cursor + k
+        if 0 <= index < len(self._tokens):
+            return self._tokens.fields_at(index)
+        else:
+            raise Exception("Cannot peek to an empty token stream")
+
+    # returns only the kind of a token ahead
+    def peek_kind(self, k: int = 0):
+        index = self._cursor + k
+        if 0 <= index < len(self._tokens):
+            return self._tokens.kind_at(index)
+        else:
+            raise Exception("Cannot peek to an empty token stream")
+
+    # adds a token to the end of the buffer
     def add(self, token: Token):
-        self._tokens.append(token)
+        self._tokens.add(token)
 
-    # removes the first token from the list
+    # moves the cursor past the current token and returns it
     def advance(self):
-        if len(self._tokens) > 0:
-            return self._tokens.pop(0)
+        if self._cursor < len(self._tokens):
+            token = self._tokens[self._cursor]
+            self._cursor += 1
+            return token
+
+    # moves the cursor past the current token without returning it
+    def skip(self):
+        if self._cursor < len(self._tokens):
+            self._cursor += 1
+
+    # saves the cursor position so the stream can be rewound later
+    def mark(self):
+        return self._cursor
+
+    # rewinds the cursor to a position returned by mark()
+    def reset(self, position: int):
+        if not 0 <= position <= len(self._tokens):
+            raise Exception(f"Invalid token stream position: {position}")
+        self._cursor = position
+
+    # makes the buffer read-only so it can be shared through views
+    def freeze(self):
+        self._tokens.freeze()
+
+    def is_frozen(self):
+        return self._tokens.frozen
+
+    # returns a new stream over the same frozen buffer with its own cursor
+    def view(self):
+        if not self.is_frozen():
+            raise Exception("Cannot share a token stream that is still being built")
+        return TokenStream(self._tokens)
+
+
+class LazyTokenStream:
+    def __init__(self, tokens: Iterable[Token]):
+        self._source = iter(tokens)
+        # tokens pulled from the source but not consumed yet, only as many as the parser looks ahead
+        self._lookahead: Deque[Token] = deque()
+
+    # pulls tokens from the source until there are at least count tokens ahead
+    def _fill(self, count: int):
+        while len(self._lookahead) < count:
+            token = next(self._source, None)
+            if token is None:
+                return False
+            self._lookahead.append(token)
+        return True
+
+    # checks if every token has been consumed
+    def is_empty(self):
+        return not self._fill(1)
+
+    # returns the token k positions ahead of the cursor
+    def peek(self, k: int = 0):
+        if self._fill(k + 1):
+            return self._lookahead[k]
+        else:
+            raise Exception("Cannot peek to an empty token stream")
+
+    # returns only the kind and lexeme of a token ahead
+    def peek_fields(self, k: int = 0):
+        token = self.peek(k)
+        return token.kind, token.lexeme
+
+    # returns only the kind of a token ahead
+    def peek_kind(self, k: int = 0):
+        return self.peek(k).kind
+
+    # removes the current token and returns it
+    def advance(self):
+        if self._fill(1):
+            return self._lookahead.popleft()
+
+    # removes the current token without returning it
+    def skip(self):
+        if self._fill(1):
+            self._lookahead.popleft()
@@ -0,0 +1,505 @@
+import itertools
+import operator
+import re
+import sys
+
+from bytecode import BINARY_FUNCTIONS, OPERATOR_SYMBOLS, UNARY_SYMBOLS, UNDEFINED, Function, Opcode, Program
+
+# the deepest chain of calls, a runaway recursion stops here instead of exhausting the memory
+MAX_CALL_DEPTH = 10000
+# the runtime error of a run that used up its instruction budget
+INSTRUCTION_LIMIT_MESSAGE = "Instruction limit exceeded"
+# the runtime error of an operation, like comparing two arrays, on arrays nested deeper than Python recurses
+NESTED_VALUE_MESSAGE = "Value nested too deeply"
+INTEGER_INPUT = re.compile(r"\s*[0-9]+\s*")
+FLOAT_INPUT = re.compile(r"\s*[0-9]+\.[0-9]+\s*")
+
+# the opcodes as plain ints, comparing against them is faster than against the enum
+LOAD_LOCAL = int(Opcode.LOAD_LOCAL)
+LOAD_CONST = int(Opcode.LOAD_CONST)
+LOAD_GLOBAL = int(Opcode.LOAD_GLOBAL)
+STORE_LOCAL = int(Opcode.STORE_LOCAL)
+STORE_GLOBAL = int(Opcode.STORE_GLOBAL)
+JUMP_IF_FALSE = int(Opcode.JUMP_IF_FALSE)
+JUMP = int(Opcode.JUMP)
+FOR_ITER = int(Opcode.FOR_ITER)
+LAST_BINARY = int(Opcode.NOT_IN)
+LAST_COMPARISON_JUMP = int(Opcode.JUMP_UNLESS_LESS_OR_EQUAL)
+NOT = int(Opcode.NOT)
+NEGATE = int(Opcode.NEGATE)
+POSITIVE = int(Opcode.POSITIVE)
+JUMP_IF_FALSE_OR_POP = int(Opcode.JUMP_IF_FALSE_OR_POP)
+JUMP_IF_TRUE_OR_POP = int(Opcode.JUMP_IF_TRUE_OR_POP)
+FOR_ITER_PAIR = int(Opcode.FOR_ITER_PAIR)
+GET_ITER = int(Opcode.GET_ITER)
+GET_PAIR_ITER = int(Opcode.GET_PAIR_ITER)
+BUILD_ARRAY = int(Opcode.BUILD_ARRAY)
+BUILD_RANGE = int(Opcode.BUILD_RANGE)
+GET_RANGE_ITER = int(Opcode.GET_RANGE_ITER)
+IMPORT = int(Opcode.IMPORT)
+IMPORT_ALL = int(Opcode.IMPORT_ALL)
+LOAD_IMPORTED = int(Opcode.LOAD_IMPORTED)
+WHICH_TABLE = int(Opcode.WHICH_TABLE)
+CHARGE = int(Opcode.CHARGE)
+LOAD_OUTER = int(Opcode.LOAD_OUTER)
+STORE_OUTER = int(Opcode.STORE_OUTER)
+PRINT = int(Opcode.PRINT)
+PRINT_SEPARATOR = int(Opcode.PRINT_SEPARATOR)
+INPUT = int(Opcode.INPUT)
+MAKE_FUNCTION = int(Opcode.MAKE_FUNCTION)
+CALL = int(Opcode.CALL)
+RETURN = int(Opcode.RETURN)
+HALT = int(Opcode.HALT)
+
+
+class RookieRuntimeError(Exception):
+    def __init__(self, message: str, line_no: int, module: str = ""):
+        super().__init__(message)
+        self.message = message
+        self.line_no = line_no
+        # the imported module the error happened in, empty for the script that was run
+        self.module = module
+
+    def __str__(self):
+        if self.module:
+            return f"Runtime error in module '{self.module}' at line {self.line_no}: {self.message}"
+        return f"Runtime error at line {self.line_no}: {self.message}"
+
+
+# how print shows a value, strings inside arrays keep their quotes; nested arrays are written with a
+# stack of iterators instead of recursing, so any depth can be printed
+def format_value(value):
+    kind = type(value)
+    if kind is str:
+        return value
+    if kind is bool:
+        return "true" if value else "false"
+    if kind is not list and kind is not RangeArray:
+        return str(value)
+
+    parts = ["["]
+    iterators = [iter(value)]
+    # whether the array being written has no element written yet
+    first = [True]
+    while iterators:
+        item = next(iterators[-1], UNDEFINED)
+        if item is UNDEFINED:
+            iterators.pop()
+            first.pop()
+            parts.append("]")
+            continue
+        if first[-1]:
+            first[-1] = False
+        else:
+            parts.append(", ")
+        kind = type(item)
+        if kind is list or kind is RangeArray:
+            parts.append("[")
+            iterators.append(iter(item))
+            first.append(True)
+        elif kind is str:
+            parts.append(f'"{item}"')
+        else:
+            parts.append(format_value(item))
+    return "".join(parts)
+
+
+def type_name(value):
+    names = {
+        int: "integer",
+        float: "float",
+        str: "string",
+        bool: "boolean",
+        list: "array",
+        RangeArray: "array",
+        Function: "function",
+    }
+    return names.get(type(value), type(value).__name__)
+
+
+# the article of a type name: "an integer" but "a string"
+def article(name: str):
+    return "an" if name[:1] in "aeiou" else "a"
+
+
+# the error of calling a value that is not a function, by the name type_name gives its type
+def not_callable_message(name: str):
+    return f"{article(name).capitalize()} {name} cannot be called"
+
+
+# what input() returns for a line, numbers are converted so they can be compared and counted
+def input_value(text: str):
+    if INTEGER_INPUT.fullmatch(text):
+        return int(text)
+    if FLOAT_INPUT.fullmatch(text):
+        return float(text)
+    return text
+
+
+# shows the prompt and reads one line for input(), the output is flushed first so the prompt is seen
+def read_input(output, input_stream, prompt: str = ""):
+    if prompt:
+        output.write(prompt)
+    output.flush()
+    line = input_stream.readline()
+    if not line:
+        raise ValueError("No input left to read")
+    return input_value(line.rstrip("\n"))
+
+
+# the numbers from start to end, inclusive, up or down
+def count_range(start: int, end: int, step: int):
+    if type(start) is not int:
+        raise ValueError(f"Range elements must be integers, not {type_name(start)}")
+    if step <= 0:
+        raise ValueError("Range step must be greater than 0")
+    direction = 1 if end >= start else -1
+    return range(start, end + direction, step * direction)
+
+
+# the elements of [a, b to end step: s], the last start element counts towards the end; a range without
+# start elements starts at 0
+def build_range(starts: list, end: int, step: int):
+    for value in starts[:-1]:
+        if type(value) is not int:
+            raise ValueError(f"Range elements must be integers, not {type_name(value)}")
+    return RangeArray(starts[:-1], count_range(starts[-1] if starts else 0, end, step))
+
+
+# the array of a range, kept as the start elements before the counted ones and a Python range, so its
+# length, elements and membership take constant time; operators that build a new array from it, like
+# + and *, get the elements as a list first
+class RangeArray:
+    __slots__ = ("prefix", "numbers")
+
+    def __init__(self, prefix: list, numbers: range):
+        self.prefix = prefix
+        self.numbers = numbers
+
+    def __len__(self):
+        return len(self.prefix) + len(self.numbers)
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += len(self)
+        if 0 <= index < len(self.prefix):
+            return self.prefix[index]
+        return self.numbers[index - len(self.prefix)]
+
+    def __iter__(self):
+        return itertools.chain(self.prefix, self.numbers) if self.prefix else iter(self.numbers)
+
+    def __contains__(self, value):
+        if value in self.prefix:
+            return True
+        # 2.0 and true are in the array like 2 and 1 are, the rest of the numbers is looked up in the range
+        if type(value) is bool or type(value) is float and value.is_integer():
+            value = int(value)
+        return type(value) is int and value in self.numbers
+
+    def __eq__(self, other):
+        if type(other) is RangeArray and not self.prefix and not other.prefix:
+            return self.numbers == other.numbers
+        if type(other) is not list and type(other) is not RangeArray:
+            return NotImplemented
+        return len(self) == len(other) and self.materialize() == list(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self.materialize())
+
+    def materialize(self):
+        return self.prefix + list(self.numbers)
+
+    def __add__(self, other):
+        return operator.add(self.materialize(), other)
+
+    def __radd__(self, other):
+        return operator.add(other, self.materialize())
+
+    def __mul__(self, other):
+        return operator.mul(self.materialize(), other)
+
+    def __rmul__(self, other):
+        return operator.mul(other, self.materialize())
+
+    def __lt__(self, other):
+        return operator.lt(self.materialize(), other)
+
+    def __le__(self, other):
+        return operator.le(self.materialize(), other)
+
+    def __gt__(self, other):
+        return operator.gt(self.materialize(), other)
+
+    def __ge__(self, other):
+        return operator.ge(self.materialize(), other)
+
+
+# runs a compiled program with a dispatch loop over its instructions, calls push a frame on an
+# explicit stack instead of recursing; every module has its own globals, and its top-level code
+# runs like a call the first time it is imported
+class VM:
+    def __init__(
+        self,
+        program: Program,
+        output=None,
+        input_stream=None,
+        modules: dict | None = None,
+        max_instructions: int | None = None,
+    ):
+        self.program = program
+        self.output = output if output is not None else sys.stdout
+        self.input = input_stream if input_stream is not None else sys.stdin
+        self.globals = [UNDEFINED] * len(program.global_names)
+        # {name: Program} of the modules the program may import, see modules.py
+        self.modules = modules if modules is not None else {}
+        # {name: globals} of the modules imported so far, and {name: {global name: slot}}
+        self.module_values = {}
+        self.module_slots = {}
+        # the instructions charged so far by code compiled with count_instructions, and the most the
+        # run may use
+        self.instructions = 0
+        self.max_instructions = max_instructions if max_instructions is not None else float("inf")
+
+    def run(self):
+        code = self.program.code
+        ops, args, constants = code.ops, code.args, code.constants
+        global_values = self.globals
+        local_values = []
+        # the locals of the enclosing functions of the running code, see Function.outer_values
+        outer_values = ()
+        stack = []
+        # (code, pc, stack, locals, globals, outer locals) of every caller
+        frames = []
+        write = self.output.write
+        binary = [BINARY_FUNCTIONS.get(opcode) for opcode in range(LAST_COMPARISON_JUMP + 1)]
+        pc = 0
+        # errors of the program are raised as ValueError inside the loop and get the line of their
+        # instruction here
+        try:
+            while True:
+                op = ops[pc]
+                arg = args[pc]
+                pc += 1
+                if op == LOAD_LOCAL:
+                    value = local_values[arg]
+                    if value is UNDEFINED:
+                        raise ValueError(f"Variable '{code.local_names[arg]}' is used before it is assigned")
+                    stack.append(value)
+                elif op == LOAD_CONST:
+                    stack.append(constants[arg])
+                elif op == LOAD_GLOBAL:
+                    value = global_values[arg]
+                    if value is UNDEFINED:
+                        raise ValueError(f"Variable '{code.global_names[arg]}' is not defined")
+                    stack.append(value)
+                elif op == STORE_LOCAL:
+                    local_values[arg] = stack.pop()
+                elif op == STORE_GLOBAL:
+                    global_values[arg] = stack.pop()
+                elif op == JUMP_IF_FALSE:
+                    if not stack.pop():
+                        pc = arg
+                elif op == JUMP:
+                    pc = arg
+                elif op == FOR_ITER:
+                    value = next(stack[-1], UNDEFINED)
+                    if value is UNDEFINED:
+                        stack.pop()
+                        pc = arg
+                    else:
+                        stack.append(value)
+                elif op <= LAST_BINARY:
+                    right = stack.pop()
+                    stack[-1] = binary[op](stack[-1], right)
+                elif op <= LAST_COMPARISON_JUMP:
+                    right = stack.pop()
+                    if not binary[op](stack.pop(), right):
+                        pc = arg
+                elif op == CHARGE:
+                    self.instructions += arg
+                    if self.instructions > self.max_instructions:
+                        raise ValueError(INSTRUCTION_LIMIT_MESSAGE)
+                elif op == NOT:
+                    stack[-1] = not stack[-1]
+                elif op == NEGATE:
+                    stack[-1] = -stack[-1]
+                elif op == POSITIVE:
+                    stack[-1] = +stack[-1]
+                elif op == JUMP_IF_FALSE_OR_POP:
+                    if stack[-1]:
+                        stack.pop()
+                    else:
+                        pc = arg
+                elif op == JUMP_IF_TRUE_OR_POP:
+                    if stack[-1]:
+                        pc = arg
+                    else:
+                        stack.pop()
+                elif op == LOAD_OUTER:
+                    depth, slot, name = constants[arg]
+                    value = outer_values[depth][slot]
+                    if value is UNDEFINED:
+                        raise ValueError(f"Variable '{name}' is used before it is assigned")
+                    stack.append(value)
+                elif op == STORE_OUTER:
+                    depth, slot, _ = constants[arg]
+                    outer_values[depth][slot] = stack.pop()
+                elif op == FOR_ITER_PAIR:
+                    item = next(stack[-1], UNDEFINED)
+                    if item is UNDEFINED:
+                        stack.pop()
+                        pc = arg
+                    else:
+                        stack.append(item[1])
+                        stack.append(item[0])
+                elif op == GET_ITER or op == GET_PAIR_ITER:
+                    value = stack[-1]
+                    if type(value) is not list and type(value) is not str and type(value) is not RangeArray:
+                        name = type_name(value)
+                        raise ValueError(f"Cannot loop over {article(name)} {name}")
+                    stack[-1] = iter(value) if op == GET_ITER else enumerate(value)
+                elif op == GET_RANGE_ITER:
+                    step = stack.pop()
+                    end = stack.pop()
+                    stack.append(iter(count_range(stack.pop() if arg else 0, end, step)))
+                elif op == BUILD_ARRAY:
+                    if arg:
+                        values = stack[-arg:]
+                        del stack[-arg:]
+                    else:
+                        values = []
+                    stack.append(values)
+                elif op == BUILD_RANGE:
+                    step = stack.pop()
+                    end = stack.pop()
+                    starts = stack[len(stack) - arg :]
+                    del stack[len(stack) - arg :]
+                    stack.append(build_range(starts, end, step))
+                elif op == PRINT and arg == 1:
+                    write(format_value(stack.pop()) + "\n")
+                elif op == PRINT or op == PRINT_SEPARATOR:
+                    separator = stack.pop() if op == PRINT_SEPARATOR else " "
+                    values = stack[len(stack) - arg :]
+                    del stack[len(stack) - arg :]
+                    write(separator.join([format_value(value) for value in values]) + "\n")
+                elif op == INPUT:
+                    stack.append(read_input(self.output, self.input, format_value(stack.pop()) if arg else ""))
+                elif op == MAKE_FUNCTION:
+                    function_code = constants[arg]
+                    count = len(function_code.parameter_names)
+                    defaults = stack[len(stack) - count :]
+                    del stack[len(stack) - count :]
+                    stack.append(Function(function_code, defaults, global_values, outer_values + (local_values,)))
+                elif op == CALL:
+                    arguments = stack[len(stack) - arg :]
+                    del stack[len(stack) - arg :]
+                    callee = stack.pop()
+                    arguments = self.bind_arguments(callee, arguments)
+                    if len(frames) >= MAX_CALL_DEPTH:
+                        raise ValueError("Too many nested calls")
+                    frames.append((code, pc, stack, local_values, global_values, outer_values))
+                    code = callee.code
+                    local_values = arguments
+                    global_values = callee.global_values
+                    outer_values = callee.outer_values
+                    ops, args, constants = code.ops, code.args, code.constants
+                    stack = []
+                    pc = 0
+                elif op == RETURN or op == HALT and frames:
+                    code, pc, stack, local_values, global_values, outer_values = frames.pop()
+                    ops, args, constants = code.ops, code.args, code.constants
+                elif op == HALT:
+                    return
+                elif op == IMPORT:
+                    name = constants[arg]
+                    if name not in self.module_values:
+                        module = self.modules.get(name)
+                        if module is None:
+                            raise ValueError(f"Module '{name}' is not loaded")
+                        if len(frames) >= MAX_CALL_DEPTH:
+                            raise ValueError("Too many nested calls")
+                        # the import runs again once the module halts, and then finds it
+                        frames.append((code, pc - 1, stack, local_values, global_values, outer_values))
+                        global_values = self.module_values[name] = [UNDEFINED] * len(module.global_names)
+                        self.module_slots[name] = {
+                            global_name: slot for slot, global_name in enumerate(module.global_names)
+                        }
+                        code = module.code
+                        ops, args, constants = code.ops, code.args, code.constants
+                        stack = []
+                        local_values = []
+                        outer_values = ()
+                        pc = 0
+                elif op == IMPORT_ALL:
+                    name = constants[arg]
+                    values = self.module_values[name]
+                    slots = self.module_slots[name]
+                    for slot, global_name in enumerate(code.global_names):
+                        if global_name in slots and values[slots[global_name]] is not UNDEFINED:
+                            global_values[slot] = values[slots[global_name]]
+                elif op == LOAD_IMPORTED:
+                    name, global_name = constants[arg]
+                    slot = self.module_slots[name].get(global_name)
+                    value = UNDEFINED if slot is None else self.module_values[name][slot]
+                    if value is UNDEFINED:
+                        raise ValueError(f"Module '{name}' does not define '{global_name}'")
+                    stack.append(value)
+                elif op == WHICH_TABLE:
+                    table = constants[arg]
+                    value = stack.pop()
+                    index = table.arm(value)
+                    if index is None:
+                        index = self.match_arms(table, value, code)
+                    pc = table.targets[index]
+                else:
+                    raise ValueError(f"Unknown opcode {op}")
+        except (TypeError, ValueError, ZeroDivisionError, OverflowError, RecursionError) as error:
+            raise RookieRuntimeError(self.error_message(error, ops[pc - 1]), code.lines[pc - 1], code.module) from None
+
+    # the locals of a call: the arguments, the defaults of the missing ones, then unassigned slots
+    def bind_arguments(self, callee, arguments: list):
+        if type(callee) is not Function:
+            raise ValueError(not_callable_message(type_name(callee)))
+        code = callee.code
+        parameter_count = len(code.parameter_names)
+        if len(arguments) > parameter_count:
+            raise ValueError(f"'{code.name}' takes {parameter_count} arguments but {len(arguments)} were given")
+        for index in range(len(arguments), parameter_count):
+            default = callee.defaults[index]
+            if default is UNDEFINED:
+                raise ValueError(f"'{code.name}' is missing the argument '{code.parameter_names[index]}'")
+            arguments.append(default)
+        arguments.extend([UNDEFINED] * (len(code.local_names) - parameter_count))
+        return arguments
+
+    # the first arm of a jump table the value matches, comparing it with each label in turn like the
+    # arms compiled without a table; an error has the line of the arm that raised it
+    def match_arms(self, table, value, code):
+        for index, (opcode, label) in enumerate(table.arms):
+            try:
+                if BINARY_FUNCTIONS[opcode](value, label):
+                    return index
+            except TypeError as error:
+                raise RookieRuntimeError(self.error_message(error, opcode), table.lines[index], code.module) from None
+        return len(table.arms)
+
+    def error_message(self, error: Exception, opcode: int):
+        if isinstance(error, ZeroDivisionError):
+            return "Division by zero"
+        if isinstance(error, OverflowError):
+            return "Number too large"
+        # calls do not recurse in the virtual machine, only operations on nested arrays do
+        if isinstance(error, RecursionError):
+            return NESTED_VALUE_MESSAGE
+        if isinstance(error, TypeError) and opcode in OPERATOR_SYMBOLS:
+            return f"Unsupported operand types for '{OPERATOR_SYMBOLS[opcode]}'"
+        if isinstance(error, TypeError) and opcode in UNARY_SYMBOLS:
+            return f"Unsupported operand type for unary '{UNARY_SYMBOLS[opcode]}'"
+        return str(error)
+
+
+def run_program(program: Program, output=None, input_stream=None, modules: dict | None = None):
+    VM(program, output, input_stream, modules).run()